@@ -1,8 +1,26 @@
+from aggregates import ExerciseStats
+from budget import MetricsBudget
+from cache import MetricsCache
 from extractor import CodebenchExtractor
+from index import DatasetIndex
+from journal import Journal
+from manifest import Manifest
 from util import Util, Logger
 from parser import CSVParser
+from output import Output
+from prefetch import Prefetcher
+from profiler import Profiler
+from shard import Shard
+from source import DatasetSource
 
+import argparse
+import logging
+import multiprocessing
 import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import repeat
 
 __version__ = '3.1.0'
 # cwd (current working dir): diretório de trabalho atual
@@ -11,43 +29,421 @@ __cwd__ = os.getcwd()
 __dataset_dir__ = f'{__cwd__}/cb_dataset_v1.11/'
 
 
-def main():
+def parse_shard(spec: str):
+    """Interpreta a partição informada em '--shard' ('i/n', com 'i' de 0 a n - 1)."""
+    try:
+        index, count = (int(parte) for parte in spec.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'partição inválida: {spec} (esperado i/n)')
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f'partição inválida: {spec} (i deve estar entre 0 e n - 1)')
+    return index, count
+
+
+def parse_args(argv=None):
+    """Interpreta os argumentos de linha de comando da extração."""
+    arg_parser = argparse.ArgumentParser(description='Extrai as entidades do dataset Codebench para arquivos CSV.')
+    arg_parser.add_argument('--dataset', default=__dataset_dir__, metavar='CAMINHO',
+                            help='pasta do dataset ou arquivo compactado (.zip, .tar, .tar.gz, .tar.xz ou .tar.bz2) lido '
+                                 'diretamente, sem extrair seus arquivos (padrão: cb_dataset_v1.11/)')
+    arg_parser.add_argument('--level', choices=['metadata', 'counts', 'full'], default='full',
+                            help='nível da extração: metadata (Períodos, Turmas, Atividades e Estudantes), counts '
+                                 '(também as Execuções, sem as métricas de código) ou full (padrão: todas as métricas)')
+    arg_parser.add_argument('--workers', type=int, default=1,
+                            help='quantidade de processos usados na extração das Execuções (padrão: 1, serial)')
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='reaproveita as Execuções dos Estudantes cujos arquivos não mudaram desde a extração anterior')
+    arg_parser.add_argument('--batch-size', type=int, default=1000,
+                            help='quantidade de linhas acumuladas em memória antes de cada gravação nos arquivos .csv')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='desabilita o cache persistente de métricas de código (cache/metricas.db)')
+    arg_parser.add_argument('--cache-size', type=int, default=1000000,
+                            help='quantidade máxima de códigos mantidos no cache de métricas (padrão: 1000000)')
+    arg_parser.add_argument('--metrics-timeout', type=float, default=10.0,
+                            help='tempo máximo (segundos) da análise de cada código, num processo auxiliar '
+                                 '(padrão: 10, 0 analisa no próprio processo, sem limite)')
+    arg_parser.add_argument('--metrics-max-size', type=int, default=262144,
+                            help='tamanho máximo (caracteres) dos códigos analisados (padrão: 262144, 0 sem limite)')
+    arg_parser.add_argument('--no-index', action='store_true',
+                            help='consulta diretamente o sistema de arquivos, sem o índice do dataset (cache/dataset.db)')
+    arg_parser.add_argument('--reindex', action='store_true',
+                            help='indexa novamente todo o dataset, detectando também os arquivos alterados')
+    arg_parser.add_argument('--prefetch', type=int, default=4,
+                            help='quantidade de Estudantes cujos arquivos são lidos antecipadamente (padrão: 4, 0 desabilita)')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='mede o tempo, a quantidade de arquivos e de bytes de cada etapa da extração')
+    arg_parser.add_argument('--profile-json', metavar='ARQUIVO',
+                            help='grava as medidas de cada etapa num arquivo JSON (implica --profile)')
+    arg_parser.add_argument('--log-level', default='INFO', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+                            help='nível mínimo das mensagens de log (padrão: INFO)')
+    arg_parser.add_argument('--log-sync', action='store_true',
+                            help='grava cada mensagem de log imediatamente, em vez de numa thread separada')
+    arg_parser.add_argument('--log-rate', type=int, default=0,
+                            help='máximo de mensagens INFO de um mesmo tipo gravadas por segundo (padrão: 0, sem limite)')
+    arg_parser.add_argument('--output', nargs='+', choices=Output.backends(), default=['csv'],
+                            help='formatos de saída: csv (pasta csv), columnar (pasta columnar, Parquet ou NumPy), '
+                                 'sqlite (sqlite/codebench.db) e/ou features (matriz de atributos, pasta features)')
+    arg_parser.add_argument('--tentativas', action='store_true',
+                            help='registra cada submissão e teste das Execuções, com as métricas do código, na tabela '
+                                 'tentativas')
+    arg_parser.add_argument('--resume', action='store_true',
+                            help='retoma a extração interrompida a partir do último ponto de controle do diário (csv/.journal)')
+    arg_parser.add_argument('--checkpoint', type=int, default=100,
+                            help='quantidade de Estudantes extraídos entre dois pontos de controle do diário '
+                                 '(padrão: 100, 0 desabilita)')
+    arg_parser.add_argument('--shard', type=parse_shard, metavar='I/N',
+                            help='extrai somente a partição I (de 0 a N - 1) de N do dataset, na pasta shards/I-of-N/csv')
+    arg_parser.add_argument('--merge', type=int, metavar='N',
+                            help='une os arquivos .csv das N partições (ver --shard) na pasta csv e encerra')
+    args = arg_parser.parse_args(argv)
+    # somente os arquivos '.csv' da extração anterior podem ser reaproveitados
+    if args.incremental and set(args.output) != {'csv'}:
+        arg_parser.error('--incremental só pode ser usado com a saída csv')
+    # as Execuções da extração anterior podem ter sido extraídas em outro nível
+    if args.incremental and args.level != 'full':
+        arg_parser.error('--incremental só pode ser usado com --level full')
+    # as Tentativas não são copiadas da extração anterior, que pode não tê-las registrado
+    if args.incremental and args.tentativas:
+        arg_parser.error('--tentativas não pode ser usado com --incremental')
+    # somente os arquivos '.csv' podem ser truncados no ponto de controle do diário
+    if args.resume and (set(args.output) != {'csv'} or args.incremental or not args.checkpoint):
+        arg_parser.error('--resume só pode ser usado com a saída csv, sem --incremental e com --checkpoint')
+    # as partições são unidas a partir dos seus arquivos '.csv'
+    if args.shard and set(args.output) != {'csv'}:
+        arg_parser.error('--shard só pode ser usado com a saída csv')
+    return args
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
     # limpa o console de saída
     Util.clear_console()
-    # cria a pasta para os arquivos de saídade (CSV), caso já exista, recria os arquivos
-    CSVParser.create_output_dir()
     # configura o módulo de log
-    Logger.configure()
+    Logger.configure(getattr(logging, args.log_level), not args.log_sync, args.log_rate)
+    # une os arquivos '.csv' das partições extraídas separadamente
+    if args.merge:
+        concluida = Shard.merge(__cwd__, args.merge)
+        Logger.close()
+        # a falha é indicada pelo código de saída, permitindo que scripts de várias máquinas a detectem
+        if not concluida:
+            sys.exit(1)
+        return
+    # cada partição grava seus arquivos '.csv' e seu manifesto numa pasta própria
+    if args.shard:
+        Shard.configure(*args.shard)
+        CSVParser.set_output_dir(Shard.output_dir(__cwd__, *args.shard))
+        Manifest.set_output_dir(CSVParser.output_dir())
+    # o dataset pode ser lido diretamente de um arquivo compactado, cujos membros são indexados em memória
+    # (antes de as saídas serem recriadas, de modo que um arquivo inválido não apague a extração anterior)
+    compactado = DatasetSource.configure(args.dataset)
+    Output.configure(args.output)
+    # o diário da extração registra os pontos de controle dos arquivos '.csv' (exceto na extração incremental)
+    if set(args.output) == {'csv'} and not args.incremental and args.checkpoint > 0:
+        Journal.configure(CSVParser.output_dir(), args.checkpoint)
+    if args.resume and Journal.resume():
+        if Journal.is_finished():
+            Logger.info('A extração retomada já havia sido concluída')
+            Logger.close()
+            return
+        # as estatísticas dos Exercícios são acumuladas novamente a partir das Execuções já salvas
+        ExerciseStats.add_csv_file(f'{CSVParser.output_dir()}/execucoes.csv')
+    else:
+        # cria as pastas para os arquivos de saída (CSV e/ou colunares), caso já existam, recria os arquivos
+        # na extração incremental, as saídas anteriores são mantidas e o manifesto da extração anterior é carregado
+        if Output.create_output_dir(args.incremental):
+            Manifest.load()
+        Journal.start()
+    # as métricas de código (e o 'radon', importado somente quando necessário) são usadas apenas no nível 'full'
+    metricas = args.level == 'full'
+    # habilita o cache das métricas de código
+    if metricas and not args.no_cache:
+        MetricsCache.configure(max_entries=args.cache_size)
+    # os arquivos do dataset são listados a partir do índice persistente, atualizado antes da extração
+    # na extração incremental todo o dataset é indexado novamente, detectando também os arquivos alterados
+    if not args.no_index and not compactado:
+        DatasetIndex.configure(args.dataset, rebuild=args.reindex or args.incremental)
+    # limites de tempo e tamanho da análise de cada código
+    MetricsBudget.configure(args.metrics_timeout, args.metrics_max_size)
+    # registra as Tentativas (submissões e testes) de cada Execução
+    CodebenchExtractor.configure(tentativas=args.tentativas, metricas=metricas)
+    # as linhas dos arquivos '.csv' são gravadas em lotes
+    CSVParser.configure(args.batch_size)
+    # os arquivos dos próximos Estudantes são lidos antecipadamente, enquanto o Estudante atual é extraído
+    # (os membros de um arquivo compactado são lidos somente quando usados)
+    Prefetcher.configure(0 if compactado else args.prefetch, codes=metricas)
+    # instrumentação das etapas da extração (tempos, arquivos e bytes)
+    Profiler.configure(args.profile or bool(args.profile_json))
+
+    try:
+        # recupera a lista de 'Periodos' dentro da pasta do dataset Codebench
+        periodos = CodebenchExtractor.extract_periodos(args.dataset)
+        # os 'Periodos' são então salvos no arquivo '.csv'
+        periodos_salvos = [periodo for periodo in periodos if Shard.owns(periodo) and not Journal.skip(periodo)]
+        Output.salvar_periodos(periodos_salvos)
+        for periodo in periodos_salvos:
+            Journal.done(periodo)
+
+        # com mais de um 'worker', as Execuções de cada Estudante e as Soluções são extraídas num pool de processos
+        execucoes = args.level != 'metadata'
+        executor = None
+        if args.workers > 1 and execucoes:
+            # com o método de início 'fork' os processos herdam a configuração do processo principal
+            initializer = None if multiprocessing.get_start_method() == 'fork' else configurar_worker
+            executor = ProcessPoolExecutor(max_workers=args.workers, initializer=initializer, initargs=(args,))
+        try:
+            extrair_periodos(periodos, executor, args.incremental, janela=2 * args.workers, execucoes=execucoes)
+
+            # extrai as métricas das 'Soluções' propostas pelos professores (somente na primeira partição)
+            if metricas and Shard.is_first():
+                solucoes = extrair_solucoes(f'{__cwd__}/solutions/solucoes.csv', executor)
+                # salva as 'Soluções'  no arquivo '.csv'
+                Output.salvar_solucoes(solucoes)
+        finally:
+            if executor:
+                executor.shutdown()
+        # salva as estatísticas de dificuldade dos 'Exercícios', acumuladas durante a extração das 'Execuções'
+        Output.salvar_exercicios(ExerciseStats.exercicios())
+    finally:
+        Prefetcher.close()
+        DatasetSource.close()
+        # grava as linhas pendentes e fecha os arquivos de saída, inclusive quando a extração é interrompida
+        Output.close()
+
+    if args.incremental:
+        CSVParser.remove_old_files()
+        Manifest.save()
+    # registra a conclusão da extração no diário
+    Journal.finish()
+    # indica que a extração da partição foi concluída
+    if Shard.enabled():
+        Shard.save(CSVParser.output_dir())
+
+    MetricsCache.close()
+    MetricsBudget.close()
+    if metricas and not args.no_cache:
+        hits, misses = MetricsCache.stats()
+        print(f'Cache de Métricas: {hits} acertos, {misses} falhas')
+
+    ignorados = MetricsBudget.stats()
+    if ignorados:
+        motivos = ', '.join(f'{motivo}: {n}' for motivo, n in sorted(ignorados.items()))
+        print(f'Métricas Ignoradas: {sum(ignorados.values())} códigos ({motivos})')
+
+    if Profiler.enabled():
+        Profiler.print_summary()
+        if args.profile_json:
+            Profiler.dump(args.profile_json)
+
+    # grava as mensagens de log pendentes
+    Logger.close()
+
+
+def configurar_worker(args):
+    """
+    Reaplica num processo do pool a configuração da extração feita pelo processo principal (ver :func:`main`).
+
+    Com os métodos de início 'spawn' e 'forkserver' (padrão no macOS e no Windows), os processos do pool importam os
+    módulos novamente e não herdam a configuração das classes: o log, o cache e os limites das métricas, as
+    Tentativas, o índice e a origem (pasta ou arquivo compactado) do dataset e a instrumentação.
+
+    :param args: Argumentos de linha de comando da extração (ver :func:`parse_args`).
+    """
+    Logger.configure(getattr(logging, args.log_level), not args.log_sync, args.log_rate)
+    metricas = args.level == 'full'
+    if metricas and not args.no_cache:
+        MetricsCache.configure(max_entries=args.cache_size)
+    # o índice do dataset já foi atualizado pelo processo principal
+    if not DatasetSource.configure(args.dataset) and not args.no_index:
+        DatasetIndex.attach(args.dataset)
+    MetricsBudget.configure(args.metrics_timeout, args.metrics_max_size)
+    CodebenchExtractor.configure(tentativas=args.tentativas, metricas=metricas)
+    Profiler.configure(args.profile or bool(args.profile_json))
+
+
+def extrair_execucoes(estudante):
+    """
+    Extrai as Execuções de um Estudante, possivelmente num processo do pool.
+
+    As métricas calculadas são gravadas no cache ao final de cada Estudante, e os contadores do cache, as medidas das
+    etapas (ver :class:`Profiler`) e as quantidades de códigos ignorados (ver :class:`MetricsBudget`) do processo são
+    retornados junto com as Execuções para serem acumulados no processo principal.
+
+    :param estudante: O Estudante cujas Execuções devem ser extraídas.
+    :return: Tupla (execuções, contadores do cache, medidas das etapas, códigos ignorados).
+    """
+    # as Execuções não são armazenadas no Estudante, evitando a referência circular entre eles
+    execucoes = list(CodebenchExtractor.iter_execucoes(estudante))
+    MetricsCache.flush()
+    return execucoes, MetricsCache.pop_stats(), Profiler.pop_stats(), MetricsBudget.pop_stats()
+
 
-    # recupera a lista de 'Periodos' dentro da pasta do dataset Codebench
-    periodos = CodebenchExtractor.extract_periodos(__dataset_dir__)
-    # os 'Periodos' são então salvos no arquivo '.csv'
-    CSVParser.salvar_periodos(periodos)
+def extrair_lote_solucoes(lote, path):
+    """
+    Extrai as métricas de um lote de Soluções, possivelmente num processo do pool (ver :func:`extrair_execucoes`).
 
+    :param lote: Lista de pares (código do exercício, código-fonte da solução).
+    :param path: Caminho do arquivo 'solucoes.csv', registrado caso as métricas de uma solução sejam ignoradas.
+    :return: Tupla (soluções, contadores do cache, medidas das etapas, códigos ignorados).
+    """
+    solucoes = [CodebenchExtractor.extract_solucao(codigo, texto, f'{path}:{codigo}') for codigo, texto in lote]
+    MetricsCache.flush()
+    return solucoes, MetricsCache.pop_stats(), Profiler.pop_stats(), MetricsBudget.pop_stats()
+
+
+def extrair_solucoes(path, executor=None, tamanho_lote=64):
+    """
+    Extrai as Soluções propostas pelos Professores diretamente do arquivo 'solucoes.csv', sem arquivos intermediários.
+
+    O arquivo é lido uma única vez (ver :meth:`CodebenchExtractor.read_solucoes`) e, quando um 'executor' é informado,
+    as métricas das Soluções são calculadas em paralelo, em lotes de 'tamanho_lote' Soluções, mantendo a ordem do
+    arquivo.
+
+    :param path: Caminho absoluto do arquivo 'solucoes.csv'.
+    :type path: str
+    :param executor: Pool de processos (opcional) usado para calcular as métricas.
+    :type executor: concurrent.futures.Executor
+    :param tamanho_lote: Quantidade de Soluções enviadas de uma vez a cada processo do pool.
+    :type tamanho_lote: int
+    :return: Lista de Soluções e suas métricas.
+    """
+    codigos = CodebenchExtractor.read_solucoes(path)
+    lotes = [codigos[i:i + tamanho_lote] for i in range(0, len(codigos), tamanho_lote)]
+    if executor:
+        resultados = executor.map(extrair_lote_solucoes, lotes, repeat(path))
+    else:
+        resultados = map(extrair_lote_solucoes, lotes, repeat(path))
+    solucoes = []
+    for lote, cache_stats, profiler_stats, budget_stats in resultados:
+        MetricsCache.merge_stats(cache_stats)
+        Profiler.merge_stats(profiler_stats)
+        MetricsBudget.merge_stats(budget_stats)
+        solucoes.extend(lote)
+    return solucoes
+
+
+def extrair_periodos(periodos, executor=None, incremental=False, janela=1, execucoes=True):
+    """
+    Extrai e salva as Turmas, Atividades, Estudantes e Execuções de cada Período.
+
+    A extração é feita em fluxo (streaming): cada Turma, Estudante e Execução é salva assim que extraída e então
+    descartada, de modo que a memória utilizada é limitada pelos dados dos Estudantes em processamento, e não pelo
+    tamanho do dataset.
+
+    Quando um 'executor' é informado, as Execuções de até 'janela' Estudantes são extraídas em paralelo, mas salvas
+    na mesma ordem da extração serial, de modo que os arquivos '.csv' gerados são idênticos.
+
+    Na extração incremental, as Execuções dos Estudantes cujos arquivos não mudaram (ver :class:`Manifest`) são
+    copiadas da extração anterior em vez de extraídas novamente. Turmas, Atividades e Estudantes, que correspondem a
+    um único arquivo cada, são sempre extraídos.
+
+    Sem as Execuções (ver '--level metadata'), somente as Turmas, Atividades e Estudantes são salvos, sem que os
+    arquivos de execuções dos Estudantes sejam lidos.
+
+    :param periodos: Lista de Períodos a serem extraídos.
+    :param executor: Pool de processos (opcional) usado para extrair as Execuções.
+    :type executor: concurrent.futures.Executor
+    :param incremental: Indica se as Execuções da extração anterior devem ser reaproveitadas.
+    :type incremental: bool
+    :param janela: Quantidade máxima de Estudantes em extração simultânea no 'executor'.
+    :type janela: int
+    :param execucoes: Indica se as Execuções (e seus Erros e Tentativas) devem ser extraídas.
+    :type execucoes: bool
+    """
+    if not execucoes:
+        for estudante in iterar_estudantes(periodos):
+            Output.salvar_estudantes([estudante])
+            Journal.done(estudante)
+        return
+    for estudante, resultado in extrair_em_ordem(iterar_estudantes(periodos), executor, incremental, janela):
+        # salva o 'Estudante' no arquivo '.csv'
+        Output.salvar_estudantes([estudante])
+        if resultado is None:
+            ExerciseStats.add_csv(CSVParser.reutilizar_execucoes(estudante))
+            continue
+        execucoes, cache_stats, profiler_stats, budget_stats = resultado
+        MetricsCache.merge_stats(cache_stats)
+        Profiler.merge_stats(profiler_stats)
+        MetricsBudget.merge_stats(budget_stats)
+        # salva os 'Erros' de cada 'Execução' no arquivo '.csv'
+        for execucao in execucoes:
+            if len(execucao.erros):
+                Output.salvar_erros(execucao.erros)
+            # salva as 'Tentativas' de cada 'Execução' (ver '--tentativas')
+            if execucao.tentativas:
+                Output.salvar_tentativas(execucao.tentativas)
+        # salva as 'Execuções' no arquivo '.csv'
+        Output.salvar_execucoes(execucoes)
+        # acumula as estatísticas de dificuldade dos 'Exercícios'
+        ExerciseStats.add(execucoes)
+        # registra o 'Estudante' concluído no diário da extração
+        Journal.done(estudante)
+
+
+def iterar_estudantes(periodos):
+    """
+    Gera os Estudantes de todas as Turmas dos Períodos, salvando cada Turma e suas Atividades antes de seus Estudantes.
+
+    Com partições (ver :class:`Shard`), somente as Turmas e os Estudantes da partição atual são salvos e gerados, e
+    numa extração retomada (ver :class:`Journal`), somente os que não foram salvos antes da interrupção.
+
+    :param periodos: Lista de Períodos a serem extraídos.
+    """
     for periodo in periodos:
-        # extrai as 'Turmas' para o 'Período'
-        CodebenchExtractor.extract_turmas(periodo)
-        # salva as 'Turmas' no arquivo .'csv'
-        CSVParser.salvar_turmas(periodo.turmas)
-        for turma in periodo.turmas:
-            # extrai as 'Atividades' da 'Turma'
+        # extrai as 'Turmas' do 'Período', uma a uma
+        for turma in CodebenchExtractor.iter_turmas(periodo):
+            Prefetcher.prefetch_turma(turma)
+            # com partições, a Turma e seus Estudantes podem pertencer a partições diferentes (ver 'Shard')
+            particao = Shard.owns(turma) and not Journal.skip(turma)
+            # salva a 'Turma' no arquivo '.csv'
+            if particao:
+                Output.salvar_turmas([turma])
+            # extrai as 'Atividades' da 'Turma', mantidas na Turma para o cálculo dos tempos das Execuções
             CodebenchExtractor.extract_atividades(turma)
             # salva as 'Atividades' no arquivo '.csv'
-            CSVParser.salvar_atividades(turma.atividades)
-            # extrai os 'Estudantes' da 'Turma'
-            CodebenchExtractor.extract_estudantes(turma)
-            # salva os 'Estudantes' no arquivo '.csv'
-            CSVParser.salvar_estudantes(turma.estudantes)
-            for estudante in turma.estudantes:
-                # extrai as 'Execuções' do 'Estudante'
-                CodebenchExtractor.extract_execucoes(estudante)
-                # salva as 'Execuções' no arquivo '.csv'
-                CSVParser.salvar_execucoes(estudante.execucoes)
-
-    # extrai as métricas das 'Soluções' propostas pelos professores
-    solucoes = CodebenchExtractor.extract_solucoes(f'{__cwd__}/solutions')
-    # salva as 'Soluções'  no arquivo '.csv'
-    CSVParser.salvar_solucoes(solucoes)
+            if particao:
+                Output.salvar_atividades(turma.atividades)
+                Journal.done(turma)
+            # extrai os 'Estudantes' da 'Turma', um a um
+            for estudante in CodebenchExtractor.iter_estudantes(turma):
+                if Shard.owns(estudante) and not Journal.skip(estudante):
+                    yield estudante
+
+
+def extrair_em_ordem(estudantes, executor=None, incremental=False, janela=1):
+    """
+    Extrai as Execuções dos Estudantes, gerando os pares (estudante, resultado) na ordem dos Estudantes.
+
+    Com um 'executor', no máximo 'janela' Estudantes aguardam na fila de extração, limitando a memória ocupada pelos
+    resultados ainda não salvos. O resultado é 'None' para os Estudantes reaproveitados da extração anterior. Os
+    arquivos dos próximos Estudantes são lidos antecipadamente pelo :class:`Prefetcher`.
+
+    :param estudantes: Estudantes (iterável) cujas Execuções devem ser extraídas.
+    :param executor: Pool de processos (opcional) usado para extrair as Execuções.
+    :param incremental: Indica se as Execuções da extração anterior devem ser reaproveitadas.
+    :param janela: Quantidade máxima de Estudantes em extração simultânea no 'executor'.
+    """
+    # na extração incremental, somente os 'Estudantes' com arquivos alterados são extraídos
+    pares = ((estudante, incremental and Manifest.is_unchanged(estudante)) for estudante in estudantes)
+    pendentes = deque()
+    for estudante, reaproveitado in Prefetcher.iterate(pares):
+        if reaproveitado:
+            pendentes.append((estudante, None))
+        elif executor:
+            pendentes.append((estudante, executor.submit(extrair_execucoes, estudante)))
+        else:
+            pendentes.append((estudante, extrair_execucoes(estudante)))
+        while len(pendentes) > (janela if executor else 0):
+            yield resultado_pendente(pendentes.popleft())
+    while pendentes:
+        yield resultado_pendente(pendentes.popleft())
+
+
+def resultado_pendente(pendente):
+    estudante, resultado = pendente
+    if isinstance(resultado, Future):
+        resultado = resultado.result()
+    return estudante, resultado
 
 
 if __name__ == '__main__':
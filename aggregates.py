@@ -0,0 +1,234 @@
+import csv
+import math
+import re
+from collections import Counter
+from datetime import timedelta
+
+from model import *
+from profiler import Profiler
+
+
+class QuantileSketch:
+    """
+    Estimador de quantis em fluxo (streaming), com memória limitada.
+
+    Os valores são contados em intervalos (buckets) de tamanho relativo fixo: cada intervalo cobre valores entre
+    'gamma^(i-1)' e 'gamma^i', e o quantil retornado difere do quantil exato em no máximo 'relative_accuracy' (ex: 1%).
+    Com 'relative_accuracy' igual a 0 os próprios valores são contados (adequado a valores inteiros pequenos, como
+    quantidades de submissões). Como somente contagens são mantidas, o resultado não depende da ordem dos valores.
+    """
+
+    __slots__ = ('counts', 'gamma', 'n')
+
+    def __init__(self, relative_accuracy: float = 0.0):
+        self.counts = Counter()
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy) if relative_accuracy else None
+        self.n = 0
+
+    def add(self, valor: int):
+        self.n += 1
+        if self.gamma is None:
+            self.counts[valor] += 1
+        elif valor <= 0:
+            # valores nulos (ou negativos) são contados num intervalo à parte, com valor 0
+            self.counts[None] += 1
+        else:
+            self.counts[math.ceil(math.log(valor, self.gamma))] += 1
+
+    def quantile(self, q: float):
+        """
+        Retorna o quantil 'q' (entre 0 e 1) dos valores, pelo critério do posto mais próximo (nearest rank).
+
+        :return: O quantil estimado ou 'None', caso nenhum valor tenha sido adicionado.
+        """
+        if not self.n:
+            return None
+        rank = max(1, math.ceil(q * self.n))
+        # o intervalo dos valores nulos precede todos os demais
+        chaves = sorted(self.counts, key=lambda chave: -math.inf if chave is None else chave)
+        acumulado = 0
+        for chave in chaves:
+            acumulado += self.counts[chave]
+            if acumulado >= rank:
+                break
+        if self.gamma is None:
+            return chave
+        if chave is None:
+            return 0
+        # o ponto do intervalo com o mesmo erro relativo para ambos os extremos
+        return 2 * self.gamma ** chave / (self.gamma + 1)
+
+
+class Accumulator:
+    """
+    Acumulador em fluxo da quantidade, média, variância e quantis de uma variável inteira.
+
+    As somas são inteiras (os tempos são acumulados em microssegundos), de modo que a média e a variância são exatas e
+    não dependem da ordem em que os valores foram adicionados.
+    """
+
+    __slots__ = ('n', 'soma', 'soma_quadrados', 'sketch')
+
+    def __init__(self, relative_accuracy: float = 0.0):
+        self.n = 0
+        self.soma = 0
+        self.soma_quadrados = 0
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, valor: int):
+        self.n += 1
+        self.soma += valor
+        self.soma_quadrados += valor * valor
+        self.sketch.add(valor)
+
+    def media(self):
+        return self.soma / self.n if self.n else None
+
+    def variancia(self):
+        # variância amostral
+        if self.n < 2:
+            return None
+        return (self.n * self.soma_quadrados - self.soma * self.soma) / (self.n * (self.n - 1))
+
+
+class ExerciseStats:
+    """
+    Estatísticas de dificuldade de cada Exercício, acumuladas em fluxo durante a extração das :class:`Execucao`.
+
+    Cada Execução extraída é adicionada aos acumuladores do seu Exercício (quantidade, acertos, e média, variância e
+    quantis das quantidades de submissões e erros e dos tempos de implementação e interação); ao final da extração os
+    acumuladores são convertidos em :class:`Exercicio`, salvos na tabela 'exercicios', sem que as Execuções precisem
+    ser lidas novamente.
+
+    Exemplo de uso:
+        ExerciseStats.add(execucoes)
+        ...
+        Output.salvar_exercicios(ExerciseStats.exercicios())
+    """
+
+    # erro relativo máximo dos quantis dos tempos
+    __relative_accuracy = 0.01
+    # variáveis acumuladas e se são tempos (acumulados em microssegundos, salvos em segundos)
+    __variaveis = [('n_submissoes', False), ('n_erros', False), ('t_implementacao', True), ('t_interacao', True)]
+    # Exercício -> [quantidade de execuções, quantidade de acertos, acumuladores das variáveis]
+    __exercicios = {}
+    # duração salva nos arquivos '.csv' (ex: '0:05:22.582000' ou '1 day, 2:03:04')
+    __duration_pattern = re.compile(r'(?:(-?\d+) days?, )?(\d+):(\d+):(\d+)(?:\.(\d+))?')
+    # tamanho aproximado dos blocos de linhas lidos por 'add_csv_file'
+    __chunk_size = 1 << 20
+
+    @staticmethod
+    def reset():
+        """Descarta as estatísticas acumuladas."""
+        ExerciseStats.__exercicios = {}
+
+    @staticmethod
+    def __acumuladores(exercicio: int) -> list:
+        acumuladores = ExerciseStats.__exercicios.get(exercicio)
+        if acumuladores is None:
+            acumuladores = ExerciseStats.__exercicios[exercicio] = [0, 0, [
+                Accumulator(ExerciseStats.__relative_accuracy if tempo else 0.0)
+                for _, tempo in ExerciseStats.__variaveis]]
+        return acumuladores
+
+    @staticmethod
+    def __add(exercicio: int, acertou: bool, valores):
+        acumuladores = ExerciseStats.__acumuladores(exercicio)
+        acumuladores[0] += 1
+        if acertou:
+            acumuladores[1] += 1
+        for acumulador, valor in zip(acumuladores[2], valores):
+            if valor is not None:
+                acumulador.add(valor)
+
+    @staticmethod
+    @Profiler.timed('exercise_stats.add', list_arg=0)
+    def add(execucoes: List[Execucao]):
+        """
+        Adiciona as Execuções às estatísticas dos seus Exercícios.
+
+        :param execucoes: Lista de Execuções extraídas.
+        :type execucoes: List[Execucao]
+        """
+        micro = timedelta(microseconds=1)
+        for execucao in execucoes:
+            valores = []
+            for nome, tempo in ExerciseStats.__variaveis:
+                valor = getattr(execucao, nome)
+                valores.append(valor // micro if tempo and valor is not None else valor)
+            ExerciseStats.__add(execucao.exercicio, execucao.acertou, valores)
+
+    @staticmethod
+    @Profiler.timed('exercise_stats.add_csv')
+    def add_csv(data: bytes):
+        """
+        Adiciona as Execuções de linhas do arquivo 'execucoes.csv' (ex: reaproveitadas da extração anterior).
+
+        :param data: Linhas do arquivo 'execucoes.csv', sem o cabeçalho.
+        :type data: bytes
+        """
+        header = Execucao.get_csv_header()
+        exercicio, acertou = header.index('exercicio'), header.index('acertou')
+        colunas = [(header.index(nome), tempo) for nome, tempo in ExerciseStats.__variaveis]
+        for row in csv.reader(data.decode('utf-8').splitlines()):
+            valores = []
+            for coluna, tempo in colunas:
+                valor = row[coluna]
+                if not valor:
+                    valores.append(None)
+                elif tempo:
+                    valores.append(ExerciseStats.__parse_duration(valor))
+                else:
+                    valores.append(int(valor))
+            ExerciseStats.__add(int(row[exercicio]), row[acertou] == 'True', valores)
+
+    @staticmethod
+    def add_csv_file(path: str):
+        """
+        Adiciona as Execuções de um arquivo 'execucoes.csv' (ex: as já salvas por uma extração retomada).
+
+        :param path: Caminho absoluto do arquivo, lido em blocos de linhas.
+        :type path: str
+        """
+        with open(path, 'rb') as f:
+            f.readline()
+            while True:
+                linhas = f.readlines(ExerciseStats.__chunk_size)
+                if not linhas:
+                    break
+                ExerciseStats.add_csv(b''.join(linhas))
+
+    @staticmethod
+    def __parse_duration(texto: str) -> int:
+        """Converte uma duração no formato de 'str(timedelta)' em microssegundos."""
+        m = ExerciseStats.__duration_pattern.fullmatch(texto)
+        dias, horas, minutos, segundos, fracao = m.groups()
+        micros = int((fracao or '0').ljust(6, '0'))
+        return (((int(dias or 0) * 24 + int(horas)) * 60 + int(minutos)) * 60 + int(segundos)) * 1000000 + micros
+
+    @staticmethod
+    def exercicios() -> List[Exercicio]:
+        """
+        Retorna as estatísticas acumuladas de cada Exercício, ordenadas pelo código do Exercício.
+
+        :return: Lista de :class:`Exercicio`.
+        """
+        exercicios = []
+        for codigo in sorted(ExerciseStats.__exercicios):
+            n_execucoes, n_acertos, acumuladores = ExerciseStats.__exercicios[codigo]
+            exercicio = Exercicio(codigo)
+            exercicio.n_execucoes = n_execucoes
+            exercicio.taxa_acerto = n_acertos / n_execucoes
+            for (nome, tempo), acumulador in zip(ExerciseStats.__variaveis, acumuladores):
+                media, variancia = acumulador.media(), acumulador.variancia()
+                mediana, p90 = acumulador.sketch.quantile(0.5), acumulador.sketch.quantile(0.9)
+                if tempo and acumulador.n:
+                    # os tempos são salvos em segundos
+                    media, mediana, p90 = media / 1e6, mediana / 1e6, p90 / 1e6
+                    variancia = variancia / 1e12 if variancia is not None else None
+                setattr(exercicio, f'{nome}_media', media)
+                setattr(exercicio, f'{nome}_variancia', variancia)
+                setattr(exercicio, f'{nome}_mediana', mediana)
+                setattr(exercicio, f'{nome}_p90', p90)
+            exercicios.append(exercicio)
+        return exercicios
@@ -0,0 +1,226 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from synthetic import SyntheticDataset
+
+# diretório do extrator e arquivo com os 'hashes' das saídas de referência (golden) de cada configuração do dataset
+__src_dir__ = os.path.dirname(os.path.abspath(__file__))
+__golden_path__ = f'{__src_dir__}/benchmark_golden.json'
+
+
+def parse_args(argv=None):
+    """Interpreta os argumentos de linha de comando do benchmark."""
+    arg_parser = argparse.ArgumentParser(
+        description='Mede o tempo de cada etapa do extrator num dataset Codebench sintético e verifica se as saídas '
+                    'permanecem iguais às de referência (golden).')
+    arg_parser.add_argument('--work-dir', help='diretório de trabalho (padrão: diretório temporário, removido ao final)')
+    arg_parser.add_argument('--repeat', type=int, default=3,
+                            help='quantidade de repetições de cada etapa, é informado o menor tempo (padrão: 3)')
+    arg_parser.add_argument('--update-golden', action='store_true',
+                            help='grava as saídas desta execução como referência para a configuração do dataset')
+    arg_parser.add_argument('--skip-golden', action='store_true', help='não executa a verificação das saídas')
+    arg_parser.add_argument('--periodos', type=int, default=2)
+    arg_parser.add_argument('--turmas', type=int, default=2, help='Turmas por Período')
+    arg_parser.add_argument('--atividades', type=int, default=4, help='Atividades por Turma')
+    arg_parser.add_argument('--exercicios', type=int, default=4, help='Exercícios por Atividade')
+    arg_parser.add_argument('--estudantes', type=int, default=20, help='Estudantes por Turma')
+    arg_parser.add_argument('--execucoes', type=int, default=6, help='máximo de submissões/testes por Exercício')
+    arg_parser.add_argument('--eventos', type=int, default=60, help='máximo de eventos do CodeMirror por Exercício')
+    arg_parser.add_argument('--seed', type=int, default=1)
+    return arg_parser.parse_args(argv)
+
+
+def main(args=None):
+    if args is None:
+        args = parse_args()
+    dataset = SyntheticDataset(args.periodos, args.turmas, args.atividades, args.exercicios, args.estudantes,
+                               args.execucoes, args.eventos, args.seed)
+    work_dir = os.path.abspath(args.work_dir) if args.work_dir else tempfile.mkdtemp(prefix='cb_benchmark_')
+    if os.path.exists(f'{work_dir}/cb_dataset_v1.11'):
+        shutil.rmtree(f'{work_dir}/cb_dataset_v1.11')
+    os.makedirs(work_dir, exist_ok=True)
+    print(f'Gerando dataset sintético ({dataset.descricao()}) em: {work_dir}')
+    dataset.generate(f'{work_dir}/cb_dataset_v1.11', f'{work_dir}/solutions')
+
+    ok = True
+    try:
+        if not args.skip_golden:
+            ok = verificar_saidas(work_dir, dataset.descricao(), args.update_golden)
+        medir_etapas(work_dir, args.repeat)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir)
+    return 0 if ok else 1
+
+
+def verificar_saidas(work_dir: str, descricao: str, update_golden: bool = False) -> bool:
+    """
+    Executa a extração completa do dataset sintético e compara as saídas com as saídas de referência (golden).
+
+    As saídas são comparadas pelo 'hash' das linhas de cada arquivo '.csv', ordenadas, pois a ordem em que os arquivos
+    do dataset são listados depende do sistema de arquivos.
+
+    :param work_dir: Diretório de trabalho, com o dataset sintético.
+    :param descricao: Descrição da configuração do dataset (ver :meth:`SyntheticDataset.descricao`).
+    :param update_golden: Indica se as saídas devem ser gravadas como referência.
+    :return: 'True' se as saídas são iguais às de referência (ou não existe referência para a configuração).
+    """
+    env = dict(os.environ, TERM='dumb')
+    subprocess.run([sys.executable, f'{__src_dir__}/__init__.py', '--no-cache'], cwd=work_dir, env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    hashes = {}
+    for nome in sorted(os.listdir(f'{work_dir}/csv')):
+        if nome.endswith('.csv'):
+            with open(f'{work_dir}/csv/{nome}', 'rb') as f:
+                header, *linhas = f.readlines()
+            linhas.sort()
+            hashes[nome] = hashlib.sha256(header + b''.join(linhas)).hexdigest()
+
+    golden = {}
+    if os.path.exists(__golden_path__):
+        with open(__golden_path__) as f:
+            golden = json.load(f)
+
+    if update_golden:
+        golden[descricao] = hashes
+        with open(__golden_path__, 'w') as f:
+            json.dump(golden, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Saídas de referência atualizadas: {__golden_path__}')
+        return True
+    if descricao not in golden:
+        print('Não há saídas de referência para esta configuração do dataset (ver --update-golden)')
+        return True
+
+    diferentes = [nome for nome in sorted(set(hashes) | set(golden[descricao]))
+                  if hashes.get(nome) != golden[descricao].get(nome)]
+    if diferentes:
+        print(f"FALHA: saídas diferentes das de referência: {', '.join(diferentes)}")
+        return False
+    print(f'OK: {len(hashes)} arquivos de saída iguais aos de referência')
+    return True
+
+
+def medir_etapas(work_dir: str, repeat: int = 3):
+    """
+    Mede o tempo de cada etapa da extração do dataset sintético, isoladamente, e imprime uma tabela com os resultados.
+
+    :param work_dir: Diretório de trabalho, com o dataset sintético.
+    :param repeat: Quantidade de repetições de cada etapa, é considerado o menor tempo.
+    """
+    # os módulos do extrator definem seus diretórios a partir do diretório de trabalho atual no momento da importação
+    os.chdir(work_dir)
+    sys.path.insert(0, __src_dir__)
+    from extractor import CodebenchExtractor
+    from parser import CSVParser
+    from util import Logger
+
+    Logger.configure()
+    logging.getLogger('cblogger').setLevel(logging.ERROR)
+
+    extract_executions_count = getattr(CodebenchExtractor, '_CodebenchExtractor__extract_executions_count')
+    extract_solution_interval = getattr(CodebenchExtractor, '_CodebenchExtractor__extract_solution_interval')
+    get_code_metrics = getattr(CodebenchExtractor, '_CodebenchExtractor__get_code_metrics')
+
+    periodos = CodebenchExtractor.extract_periodos(f'{work_dir}/cb_dataset_v1.11/')
+    turmas = [turma for periodo in periodos for turma in CodebenchExtractor.iter_turmas(periodo)]
+    for turma in turmas:
+        CodebenchExtractor.extract_atividades(turma)
+    estudantes = [estudante for turma in turmas for estudante in CodebenchExtractor.iter_estudantes(turma)]
+    arquivos = {pasta: [(estudante, entry.path, entry.name) for estudante in estudantes
+                        for entry in os.scandir(f'{estudante.path}/{pasta}')]
+                for pasta in ('executions', 'codemirror', 'codes')}
+
+    def bytes_lidos(paths):
+        return sum(os.path.getsize(path) for path in paths)
+
+    def etapa_atividades():
+        for turma in turmas:
+            turma.atividades = []
+            CodebenchExtractor.extract_atividades(turma)
+
+    def etapa_estudantes():
+        for turma in turmas:
+            list(CodebenchExtractor.iter_estudantes(turma))
+
+    def etapa_executions_count():
+        from model import Execucao
+        for estudante, path, _ in arquivos['executions']:
+            extract_executions_count(path, Execucao(estudante.periodo, estudante.turma, estudante, None, 0))
+
+    def etapa_solution_interval():
+        from model import Execucao
+        for estudante, path, nome in arquivos['codemirror']:
+            atividade = next(a for a in estudante.turma.atividades if a.codigo == int(nome.split('_')[0]))
+            extract_solution_interval(path, Execucao(estudante.periodo, estudante.turma, estudante, atividade, 0))
+
+    codigos = []
+    for _, path, _ in arquivos['codes']:
+        with open(path) as f:
+            codigos.append(f.read())
+
+    def etapa_code_metrics():
+        for codigo in codigos:
+            get_code_metrics(codigo)
+
+    execucoes = []
+
+    def etapa_execucoes():
+        execucoes.clear()
+        for estudante in estudantes:
+            execucoes.extend(CodebenchExtractor.iter_execucoes(estudante))
+
+    def etapa_csv():
+        CSVParser.create_output_dir()
+        CSVParser.salvar_periodos(periodos)
+        CSVParser.salvar_turmas(turmas)
+        for turma in turmas:
+            CSVParser.salvar_atividades(turma.atividades)
+        CSVParser.salvar_estudantes(estudantes)
+        for execucao in execucoes:
+            if len(execucao.erros):
+                CSVParser.salvar_erros(execucao.erros)
+        CSVParser.salvar_execucoes(execucoes)
+        CSVParser.close()
+
+    n_atividades = sum(len(turma.atividades) for turma in turmas)
+    etapas = [
+        ('extract_atividades', etapa_atividades, n_atividades,
+         bytes_lidos(entry.path for turma in turmas for entry in os.scandir(f'{turma.path}/assessments'))),
+        ('extract_estudantes', etapa_estudantes, len(estudantes),
+         bytes_lidos(f'{estudante.path}/user.data' for estudante in estudantes)),
+        # inclui as métricas do código das submissões corretas
+        ('extract_executions_count', etapa_executions_count, len(arquivos['executions']),
+         bytes_lidos(path for _, path, _ in arquivos['executions'])),
+        ('extract_solution_interval', etapa_solution_interval, len(arquivos['codemirror']),
+         bytes_lidos(path for _, path, _ in arquivos['codemirror'])),
+        ('get_code_metrics', etapa_code_metrics, len(codigos), sum(len(codigo) for codigo in codigos)),
+        ('iter_execucoes (total)', etapa_execucoes, len(arquivos['executions']),
+         sum(bytes_lidos(path for _, path, _ in lista) for lista in arquivos.values())),
+        ('salvar CSV', etapa_csv, None, None),
+    ]
+
+    print(f"\n{'Etapa':<28}{'Itens':>9}{'Tempo (s)':>12}{'Itens/s':>12}{'MB/s':>10}")
+    for nome, etapa, itens, n_bytes in etapas:
+        tempos = []
+        for _ in range(max(repeat, 1)):
+            inicio = time.perf_counter()
+            etapa()
+            tempos.append(time.perf_counter() - inicio)
+        tempo = min(tempos)
+        if itens is None:
+            itens = len(execucoes) + len(estudantes) + n_atividades
+            n_bytes = sum(os.path.getsize(f'{work_dir}/csv/{nome_csv}') for nome_csv in os.listdir(f'{work_dir}/csv'))
+        print(f'{nome:<28}{itens:>9}{tempo:>12.3f}{itens / tempo:>12.0f}{n_bytes / tempo / 1e6:>10.2f}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import multiprocessing
+import os
+from collections import Counter
+
+from model import Metricas
+
+
+class MetricsBudget:
+    """
+    Limita o tempo e o tamanho de cada código analisado pelo :class:`MetricsAnalyzer`.
+
+    Códigos muito grandes ou muito aninhados podem ocupar o 'radon' por vários minutos e bloquear toda a extração.
+    Códigos maiores que 'max_size' caracteres não são analisados, e os demais são analisados num processo auxiliar
+    supervisionado: se a análise não termina em 'timeout' segundos, o processo é encerrado (e recriado para o próximo
+    código). Como a análise ocorre em outro processo, um código que esgote a memória encerra somente o processo
+    auxiliar.
+
+    Os códigos que excedem os limites resultam em métricas vazias ('None') e são registrados com o motivo ('tamanho',
+    'tempo' ou 'falha', quando o processo auxiliar termina inesperadamente), sem serem gravados no cache de métricas.
+    Um mesmo código ignorado não é analisado novamente no mesmo processo.
+
+    Exemplo de uso:
+        MetricsBudget.configure(timeout=10, max_size=262144)
+
+        metricas, motivo = MetricsBudget.analyze(codigo, chave)
+        if motivo:
+            ...
+        MetricsBudget.close()
+    """
+
+    # tempo máximo (segundos) da análise de um código, 0 analisa no próprio processo, sem limite de tempo
+    __timeout = 0.0
+    # tamanho máximo (caracteres) de um código, 0 desabilita o limite
+    __max_size = 0
+    # processo auxiliar (e a conexão com ele) do processo atual
+    __process = None
+    __conn = None
+    __pid = None
+    # códigos ignorados no processo atual (chave -> motivo)
+    __ignorados = {}
+    # quantidade de códigos ignorados por motivo, no processo atual e recebidas dos demais processos
+    __stats = Counter()
+    __merged_stats = Counter()
+
+    @staticmethod
+    def configure(timeout: float = 0.0, max_size: int = 0):
+        """
+        Configura os limites da análise de cada código.
+
+        :param timeout: Tempo máximo (segundos) da análise de um código (0 desabilita o processo auxiliar).
+        :type timeout: float
+        :param max_size: Tamanho máximo (caracteres) de um código (0 desabilita o limite).
+        :type max_size: int
+        """
+        MetricsBudget.close()
+        MetricsBudget.__timeout = max(0.0, timeout)
+        MetricsBudget.__max_size = max(0, max_size)
+
+    @staticmethod
+    def serve(conn):
+        """
+        Laço do processo auxiliar: recebe os códigos e responde com os valores das métricas.
+
+        Método público para que o processo auxiliar possa ser criado com qualquer método de início ('fork', 'spawn').
+        """
+        from metrics import MetricsAnalyzer
+        while True:
+            try:
+                codigo = conn.recv()
+            except EOFError:
+                break
+            conn.send(MetricsAnalyzer.analyze(codigo).as_row())
+
+    @staticmethod
+    def __check_pid():
+        # o processo auxiliar e os códigos ignorados pertencem ao processo atual, cada 'worker' da extração tem os seus
+        if MetricsBudget.__pid != os.getpid():
+            MetricsBudget.__pid = os.getpid()
+            MetricsBudget.__process = None
+            MetricsBudget.__conn = None
+            MetricsBudget.__ignorados = {}
+            MetricsBudget.__stats = Counter()
+
+    @staticmethod
+    def __start_process():
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=MetricsBudget.serve, args=(child_conn,), daemon=True)
+        process.start()
+        child_conn.close()
+        MetricsBudget.__process = process
+        MetricsBudget.__conn = conn
+
+    @staticmethod
+    def __stop_process():
+        """Encerra o processo auxiliar, que é recriado na próxima análise."""
+        process, conn = MetricsBudget.__process, MetricsBudget.__conn
+        MetricsBudget.__process = None
+        MetricsBudget.__conn = None
+        if process is not None:
+            conn.close()
+            process.kill()
+            process.join()
+
+    @staticmethod
+    def __ignore(chave: str, motivo: str):
+        MetricsBudget.__ignorados[chave] = motivo
+        MetricsBudget.__stats[motivo] += 1
+        return Metricas(), motivo
+
+    @staticmethod
+    def analyze(codigo: str, chave: str):
+        """
+        Calcula as métricas de um código, respeitando os limites de tempo e tamanho.
+
+        :param codigo: Código-fonte Python.
+        :type codigo: str
+        :param chave: Chave do código (ver :meth:`MetricsCache.key`), usada para não analisar novamente um código
+                      já ignorado.
+        :type chave: str
+        :return: Tupla (métricas, motivo), com o motivo ('tamanho', 'tempo' ou 'falha') e métricas vazias quando o
+                 código foi ignorado, ou 'None' quando as métricas foram calculadas.
+        """
+        MetricsBudget.__check_pid()
+        motivo = MetricsBudget.__ignorados.get(chave)
+        if motivo:
+            return Metricas(), motivo
+        if MetricsBudget.__max_size and len(codigo) > MetricsBudget.__max_size:
+            return MetricsBudget.__ignore(chave, 'tamanho')
+        if not MetricsBudget.__timeout:
+            # o 'radon' só é importado quando algum código é analisado (ver '--level')
+            from metrics import MetricsAnalyzer
+            return MetricsAnalyzer.analyze(codigo), None
+
+        if MetricsBudget.__process is None:
+            MetricsBudget.__start_process()
+        conn = MetricsBudget.__conn
+        try:
+            conn.send(codigo)
+            if not conn.poll(MetricsBudget.__timeout):
+                MetricsBudget.__stop_process()
+                return MetricsBudget.__ignore(chave, 'tempo')
+            valores = conn.recv()
+        except (EOFError, OSError):
+            # o processo auxiliar terminou durante a análise (ex: falta de memória)
+            MetricsBudget.__stop_process()
+            return MetricsBudget.__ignore(chave, 'falha')
+        metricas = Metricas()
+        for nome, valor in zip(Metricas.__slots__, valores):
+            setattr(metricas, nome, valor)
+        return metricas, None
+
+    @staticmethod
+    def close():
+        """Encerra o processo auxiliar do processo atual."""
+        if MetricsBudget.__pid == os.getpid():
+            MetricsBudget.__stop_process()
+
+    @staticmethod
+    def pop_stats() -> dict:
+        """
+        Retorna e zera as quantidades de códigos ignorados (por motivo) no processo atual.
+
+        :return: Dicionário (motivo -> quantidade).
+        """
+        if MetricsBudget.__pid != os.getpid():
+            return {}
+        stats = dict(MetricsBudget.__stats)
+        MetricsBudget.__stats = Counter()
+        return stats
+
+    @staticmethod
+    def merge_stats(stats: dict):
+        """Acumula no processo atual as quantidades retornadas por :meth:`pop_stats` em outro processo."""
+        MetricsBudget.__merged_stats.update(stats)
+
+    @staticmethod
+    def stats() -> dict:
+        """Retorna as quantidades de códigos ignorados, por motivo."""
+        stats = MetricsBudget.__merged_stats.copy()
+        if MetricsBudget.__pid == os.getpid():
+            stats.update(MetricsBudget.__stats)
+        return dict(stats)
@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from model import Metricas
+from util import Logger
+
+
+class MetricsCache:
+    """
+    Cache persistente (SQLite) das :class:`Metricas` de código, endereçado pelo conteúdo do código.
+
+    Cada código é identificado pelo 'hash' do seu conteúdo normalizado (quebras de linha '\\r\\n' e '\\r' convertidas
+    para '\\n', o que não altera nenhuma métrica), de modo que códigos idênticos, entregues por Estudantes diferentes
+    ou em execuções diferentes do extrator, são analisados uma única vez.
+
+    Exemplo de uso:
+        MetricsCache.configure()
+
+        chave = MetricsCache.key(codigo)
+        metricas = MetricsCache.get(chave)
+        if metricas is None:
+            metricas = MetricsAnalyzer.analyze(codigo)
+            MetricsCache.put(chave, metricas)
+        ...
+        MetricsCache.close()
+
+    Cada processo abre sua própria conexão com o banco, as novas métricas são mantidas em memória e gravadas em lote
+    a cada chamada de :meth:`flush`. Ao final da extração (:meth:`close`) as entradas menos usadas recentemente são
+    removidas até que o cache volte ao tamanho máximo configurado.
+    """
+
+    # caminho do banco de dados do cache, ao lado da pasta de saída 'csv'
+    __path = os.getcwd() + '/cache/metricas.db'
+    # quantidade máxima de códigos mantidos no cache
+    __max_entries = 1000000
+    __enabled = False
+    __conn = None
+    __pid = None
+    # métricas calculadas e chaves consultadas desde o último 'flush'
+    __pending = {}
+    __used = set()
+    # contadores do processo atual e contadores recebidos dos demais processos (ver 'merge_stats')
+    __hits = 0
+    __misses = 0
+    __merged_hits = 0
+    __merged_misses = 0
+
+    @staticmethod
+    def configure(path: str = None, max_entries: int = None):
+        """
+        Habilita o cache de métricas.
+
+        :param path: Caminho do arquivo SQLite do cache (padrão: 'cache/metricas.db').
+        :type path: str
+        :param max_entries: Quantidade máxima de códigos mantidos no cache.
+        :type max_entries: int
+        """
+        if path:
+            MetricsCache.__path = path
+        if max_entries:
+            MetricsCache.__max_entries = max_entries
+        os.makedirs(os.path.dirname(MetricsCache.__path), exist_ok=True)
+        MetricsCache.__enabled = True
+
+    @staticmethod
+    def __connection() -> sqlite3.Connection:
+        # conexões SQLite não podem ser compartilhadas entre processos, cada 'worker' abre a sua
+        if MetricsCache.__pid != os.getpid():
+            MetricsCache.__pid = os.getpid()
+            MetricsCache.__pending = {}
+            MetricsCache.__used = set()
+            MetricsCache.__hits = 0
+            MetricsCache.__misses = 0
+            # o 'radon' só é importado quando as métricas são usadas (ver '--level')
+            import radon
+            conn = sqlite3.connect(MetricsCache.__path, timeout=60)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute('CREATE TABLE IF NOT EXISTS info (nome TEXT PRIMARY KEY, valor TEXT)')
+                conn.execute('CREATE TABLE IF NOT EXISTS metricas (chave TEXT PRIMARY KEY, uso REAL, valores TEXT)')
+                conn.execute('CREATE INDEX IF NOT EXISTS metricas_uso ON metricas (uso)')
+                # as métricas são invalidadas quando a versão do 'radon' muda
+                row = conn.execute("SELECT valor FROM info WHERE nome = 'versao'").fetchone()
+                if not row or row[0] != radon.__version__:
+                    conn.execute('DELETE FROM metricas')
+                    conn.execute("INSERT OR REPLACE INTO info VALUES ('versao', ?)", (radon.__version__,))
+            MetricsCache.__conn = conn
+        return MetricsCache.__conn
+
+    @staticmethod
+    def key(codigo: str) -> str:
+        """
+        Retorna a chave do cache para um código: o 'hash' do código com as quebras de linha normalizadas.
+
+        :param codigo: Código-fonte Python.
+        :type codigo: str
+        """
+        codigo = codigo.replace('\r\n', '\n').replace('\r', '\n')
+        return hashlib.blake2b(codigo.encode('utf-8', 'surrogatepass'), digest_size=20).hexdigest()
+
+    @staticmethod
+    def get(chave: str):
+        """
+        Recupera as :class:`Metricas` de um código a partir do cache.
+
+        :param chave: Chave do código (ver :meth:`key`).
+        :type chave: str
+        :return: As métricas do código ou 'None', caso o código não esteja no cache (ou o cache esteja desabilitado).
+        """
+        if not MetricsCache.__enabled:
+            return None
+        conn = MetricsCache.__connection()
+        metricas = MetricsCache.__pending.get(chave)
+        if metricas is None:
+            row = conn.execute('SELECT valores FROM metricas WHERE chave = ?', (chave,)).fetchone()
+            if row:
+                metricas = Metricas()
+                for nome, valor in zip(MetricsCache.__fields(), json.loads(row[0])):
+                    setattr(metricas, nome, valor)
+                MetricsCache.__used.add(chave)
+        if metricas is None:
+            MetricsCache.__misses += 1
+        else:
+            MetricsCache.__hits += 1
+        return metricas
+
+    @staticmethod
+    def put(chave: str, metricas: Metricas):
+        """
+        Adiciona as :class:`Metricas` de um código ao cache, elas são gravadas no banco no próximo :meth:`flush`.
+
+        :param chave: Chave do código (ver :meth:`key`).
+        :type chave: str
+        :param metricas: Métricas calculadas para o código.
+        :type metricas: Metricas
+        """
+        if MetricsCache.__enabled:
+            MetricsCache.__connection()
+            MetricsCache.__pending[chave] = metricas
+
+    @staticmethod
+    def flush():
+        """Grava no banco, numa única transação, as métricas calculadas e o último uso das chaves consultadas."""
+        if not MetricsCache.__enabled or MetricsCache.__pid != os.getpid():
+            return
+        if not MetricsCache.__pending and not MetricsCache.__used:
+            return
+        agora = time.time()
+        campos = MetricsCache.__fields()
+        with MetricsCache.__conn as conn:
+            conn.executemany('INSERT OR REPLACE INTO metricas VALUES (?, ?, ?)',
+                             [(chave, agora, json.dumps([getattr(metricas, nome) for nome in campos]))
+                              for chave, metricas in MetricsCache.__pending.items()])
+            conn.executemany('UPDATE metricas SET uso = ? WHERE chave = ?',
+                             [(agora, chave) for chave in MetricsCache.__used])
+        MetricsCache.__pending = {}
+        MetricsCache.__used = set()
+
+    @staticmethod
+    def close():
+        """Grava as métricas pendentes, remove as entradas excedentes (menos usadas) e fecha o banco do cache."""
+        if not MetricsCache.__enabled:
+            return
+        MetricsCache.flush()
+        with MetricsCache.__connection() as conn:
+            total = conn.execute('SELECT COUNT(*) FROM metricas').fetchone()[0]
+            excesso = total - MetricsCache.__max_entries
+            if excesso > 0:
+                Logger.info('Removendo %s entradas do cache de métricas', excesso)
+                conn.execute('DELETE FROM metricas WHERE chave IN '
+                             '(SELECT chave FROM metricas ORDER BY uso LIMIT ?)', (excesso,))
+        MetricsCache.__conn.close()
+        MetricsCache.__conn = None
+        MetricsCache.__pid = None
+
+    @staticmethod
+    def pop_stats():
+        """
+        Retorna e zera os contadores de acertos (hits) e falhas (misses) do cache no processo atual.
+
+        :return: Tupla (acertos, falhas).
+        """
+        if MetricsCache.__pid != os.getpid():
+            return 0, 0
+        stats = (MetricsCache.__hits, MetricsCache.__misses)
+        MetricsCache.__hits = 0
+        MetricsCache.__misses = 0
+        return stats
+
+    @staticmethod
+    def merge_stats(stats):
+        """
+        Acumula no processo atual os contadores retornados por :meth:`pop_stats` em outro processo.
+
+        :param stats: Tupla (acertos, falhas).
+        """
+        MetricsCache.__merged_hits += stats[0]
+        MetricsCache.__merged_misses += stats[1]
+
+    @staticmethod
+    def stats():
+        """
+        Retorna os contadores de acertos (hits) e falhas (misses) do cache.
+
+        :return: Tupla (acertos, falhas).
+        """
+        return MetricsCache.__hits + MetricsCache.__merged_hits, MetricsCache.__misses + MetricsCache.__merged_misses
+
+    @staticmethod
+    def __fields():
+        return list(Metricas.__slots__)
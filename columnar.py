@@ -0,0 +1,402 @@
+import json
+import os
+import shutil
+from datetime import datetime, timedelta
+
+from model import *
+from profiler import Profiler
+from util import Logger
+
+# o 'pyarrow' só é importado quando a saída colunar é usada (ver 'ColumnarParser.create_output_dir')
+pyarrow = None
+
+
+class ParquetTableWriter:
+    """Grava uma tabela num arquivo Parquet (requer 'pyarrow'), um grupo de linhas (row group) por lote."""
+
+    # tipos 'pyarrow' equivalentes aos tipos das colunas (ver ColumnarParser)
+    __arrow_types = {
+        'str': lambda: pyarrow.string(),
+        'int': lambda: pyarrow.int64(),
+        'float': lambda: pyarrow.float64(),
+        'bool': lambda: pyarrow.bool_(),
+        'duration': lambda: pyarrow.duration('us'),
+        'timestamp': lambda: pyarrow.timestamp('s'),
+        'list': lambda: pyarrow.list_(pyarrow.list_(pyarrow.int64())),
+    }
+
+    def __init__(self, path: str, columns: List[tuple]):
+        """
+        Método Construtor.
+
+        :param path: Caminho absoluto do arquivo '.parquet'.
+        :param columns: Lista de colunas (nome, tipo) da tabela.
+        """
+        self.path = path
+        self.columns = columns
+        self.schema = pyarrow.schema([(nome, ParquetTableWriter.__arrow_types[tipo]()) for nome, tipo in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema)
+
+    def write(self, rows: List[List]):
+        """Grava as linhas (valores já convertidos) como um novo grupo de linhas do arquivo."""
+        if rows:
+            arrays = [pyarrow.array([row[i] for row in rows], type=self.schema.field(i).type)
+                      for i in range(len(self.columns))]
+            self.writer.write_table(pyarrow.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+class NpyStream:
+    """
+    Arquivo '.npy' unidimensional (ou bidimensional, com uma quantidade fixa de colunas) gravado de forma incremental.
+
+    O cabeçalho é reservado com tamanho fixo na criação do arquivo e reescrito no fechamento, quando a quantidade
+    final de elementos (ou linhas) é conhecida, de modo que os dados nunca precisam ser copiados.
+    """
+
+    # tamanho fixo do cabeçalho (magic + versão + tamanho + dicionário), múltiplo de 64 como exige o formato
+    __header_size = 128
+
+    def __init__(self, path: str, dtype: str, columns: int = None):
+        """
+        Método Construtor.
+
+        :param path: Caminho absoluto do arquivo '.npy'.
+        :param dtype: Tipo NumPy ('descr') dos elementos do arquivo, ex: '<i8'.
+        :param columns: Quantidade de colunas de um arquivo bidimensional (matriz), 'None' para um vetor.
+        """
+        import numpy
+        self.numpy = numpy
+        self.path = path
+        self.dtype = numpy.dtype(dtype)
+        self.columns = columns
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.__header())
+
+    def __header(self) -> bytes:
+        descr = self.numpy.lib.format.dtype_to_descr(self.dtype)
+        shape = (self.count,) if self.columns is None else (self.count, self.columns)
+        header = "{'descr': %r, 'fortran_order': False, 'shape': %r, }" % (descr, shape)
+        header = header.ljust(NpyStream.__header_size - 10 - 1) + '\n'
+        return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+    def append(self, values):
+        """Acrescenta os valores (ou linhas, numa matriz) ao final do arquivo."""
+        array = self.numpy.asarray(values, dtype=self.dtype)
+        if self.columns is not None:
+            array = array.reshape(-1, self.columns)
+        array.tofile(self.file)
+        self.count += len(array)
+
+    def close(self):
+        self.file.seek(0)
+        self.file.write(self.__header())
+        self.file.close()
+
+
+class NpyTableWriter:
+    """
+    Grava uma tabela como um diretório de arquivos '.npy' (um ou mais por coluna), que podem ser carregados com
+    'numpy.load(..., mmap_mode='r')' sem nenhuma conversão.
+
+    Layout das colunas, conforme o tipo:
+        - int / bool: '<coluna>.npy' (int64 / bool) e '<coluna>.valid.npy' (bool, 'False' para valores nulos)
+        - float: '<coluna>.npy' (float64, 'NaN' para valores nulos)
+        - duration: '<coluna>.npy' (timedelta64[us], 'NaT' para valores nulos)
+        - timestamp: '<coluna>.npy' (datetime64[s], 'NaT' para valores nulos)
+        - str: '<coluna>.offsets.npy' (int64, n + 1 posições), '<coluna>.data.npy' (bytes UTF-8) e '<coluna>.valid.npy'
+        - list: '<coluna>.offsets.npy' (linhas -> blocos), '<coluna>.block_offsets.npy' (blocos -> valores) e
+          '<coluna>.values.npy' (int64)
+
+    O arquivo 'schema.json' do diretório descreve as colunas e seus tipos.
+    """
+
+    # valor que o NumPy interpreta como 'NaT' em datetime64/timedelta64
+    __nat = -(1 << 63)
+
+    def __init__(self, path: str, columns: List[tuple]):
+        """
+        Método Construtor.
+
+        :param path: Caminho absoluto do diretório da tabela.
+        :param columns: Lista de colunas (nome, tipo) da tabela.
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.columns = columns
+        self.streams = []
+        for nome, tipo in columns:
+            streams = {}
+            if tipo in ('int', 'bool'):
+                streams['values'] = NpyStream(f'{path}/{nome}.npy', '<i8' if tipo == 'int' else '|b1')
+                streams['valid'] = NpyStream(f'{path}/{nome}.valid.npy', '|b1')
+            elif tipo == 'float':
+                streams['values'] = NpyStream(f'{path}/{nome}.npy', '<f8')
+            elif tipo == 'duration':
+                streams['values'] = NpyStream(f'{path}/{nome}.npy', '<m8[us]')
+            elif tipo == 'timestamp':
+                streams['values'] = NpyStream(f'{path}/{nome}.npy', '<M8[s]')
+            elif tipo == 'str':
+                streams['offsets'] = NpyStream(f'{path}/{nome}.offsets.npy', '<i8')
+                streams['data'] = NpyStream(f'{path}/{nome}.data.npy', '|u1')
+                streams['valid'] = NpyStream(f'{path}/{nome}.valid.npy', '|b1')
+                streams['offsets'].append([0])
+            elif tipo == 'list':
+                streams['offsets'] = NpyStream(f'{path}/{nome}.offsets.npy', '<i8')
+                streams['block_offsets'] = NpyStream(f'{path}/{nome}.block_offsets.npy', '<i8')
+                streams['values'] = NpyStream(f'{path}/{nome}.values.npy', '<i8')
+                streams['offsets'].append([0])
+                streams['block_offsets'].append([0])
+            self.streams.append(streams)
+        with open(f'{path}/schema.json', 'w') as f:
+            json.dump([{'name': nome, 'type': tipo} for nome, tipo in columns], f, indent=2)
+
+    def write(self, rows: List[List]):
+        """Acrescenta as linhas (valores já convertidos) aos arquivos das colunas."""
+        if not rows:
+            return
+        for i, (nome, tipo) in enumerate(self.columns):
+            values = [row[i] for row in rows]
+            streams = self.streams[i]
+            if tipo in ('int', 'bool'):
+                streams['values'].append([v if v is not None else 0 for v in values])
+                streams['valid'].append([v is not None for v in values])
+            elif tipo == 'float':
+                streams['values'].append([v if v is not None else float('nan') for v in values])
+            elif tipo == 'duration':
+                streams['values'].append([v // timedelta(microseconds=1) if v is not None else NpyTableWriter.__nat
+                                          for v in values])
+            elif tipo == 'timestamp':
+                streams['values'].append([(v - datetime(1970, 1, 1)) // timedelta(seconds=1) if v is not None
+                                          else NpyTableWriter.__nat for v in values])
+            elif tipo == 'str':
+                encoded = [v.encode('utf-8') if v is not None else b'' for v in values]
+                end = streams['data'].count
+                offsets = []
+                for data in encoded:
+                    end += len(data)
+                    offsets.append(end)
+                streams['offsets'].append(offsets)
+                streams['data'].append(bytearray(b''.join(encoded)))
+                streams['valid'].append([v is not None for v in values])
+            elif tipo == 'list':
+                blocks = streams['block_offsets'].count - 1
+                end = streams['values'].count
+                offsets, block_offsets, flat = [], [], []
+                for blocos in values:
+                    for bloco in blocos or []:
+                        flat.extend(bloco)
+                        end += len(bloco)
+                        block_offsets.append(end)
+                    blocks += len(blocos or [])
+                    offsets.append(blocks)
+                streams['offsets'].append(offsets)
+                streams['block_offsets'].append(block_offsets)
+                streams['values'].append(flat)
+
+    def close(self):
+        for streams in self.streams:
+            for stream in streams.values():
+                stream.close()
+
+
+class ColumnarParser:
+    """
+    Backend de saída que grava as tabelas das entidades num formato colunar binário e tipado, alternativo (ou
+    complementar) aos arquivos '.csv' do :class:`CSVParser`.
+
+    Cada tabela (periodos, turmas, atividades, estudantes, execucoes, solucoes, erros e exercicios) é gravada em
+    Parquet quando o módulo 'pyarrow' está disponível ('columnar/<tabela>.parquet'), ou como arquivos '.npy' por coluna
+    caso contrário ('columnar/<tabela>/', ver :class:`NpyTableWriter`). Os tempos são gravados como durações, as datas
+    das Atividades como timestamps, os blocos de exercícios como listas de inteiros e os inteiros e booleanos aceitam
+    valores nulos, de modo que as tabelas podem ser carregadas (ou mapeadas em memória) sem nenhuma interpretação de
+    texto.
+    """
+
+    # diretório dos arquivos de saída colunares
+    __output_dir = os.getcwd() + '/columnar'
+    # quantidade de linhas mantidas em memória, por tabela, antes de serem gravadas em disco
+    __batch_size = 65536
+    # tipo de cada coluna, pelo nome da coluna no cabeçalho das entidades (get_csv_header)
+    __column_types = {
+        'descricao': 'str', 'periodo': 'str', 'turma': 'int', 'codigo': 'int', 'estudante': 'int',
+        'atividade': 'int', 'exercicio': 'int',
+        # Atividade
+        'titulo': 'str', 'data_inicio': 'timestamp', 'data_termino': 'timestamp', 'linguagem': 'str', 'tipo': 'str',
+        'peso': 'float', 'n_blocos': 'int', 'blocos': 'list',
+        # Estudante
+        'curso_id': 'int', 'curso_nome': 'str', 'instituicao_id': 'int', 'instituicao_nome': 'str',
+        'escola_nome': 'str', 'escola_tipo': 'str', 'escola_turno': 'str', 'escola_ano_grad': 'int', 'sexo': 'str',
+        'ano_nascimento': 'int', 'estado_civil': 'str', 'tem_filhos': 'bool',
+        # Execucao
+        't_implementacao': 'duration', 't_interacao': 'duration', 'n_submissoes': 'int', 'n_testes': 'int',
+        'n_erros': 'int', 't_execucao': 'float', 'nota_final': 'float', 'acertou': 'bool',
+        # Metricas
+        'complexity': 'int', 'n_classes': 'int', 'n_functions': 'int', 'loc': 'int', 'lloc': 'int', 'sloc': 'int',
+        'single_comments': 'int', 'comments': 'int', 'multilines': 'int', 'blank_lines': 'int', 'h1': 'int',
+        'h2': 'int', 'N1': 'int', 'N2': 'int', 'h': 'int', 'N': 'int', 'calculated_N': 'float', 'volume': 'float',
+        'difficulty': 'float', 'effort': 'float', 'bugs': 'float', 'time': 'float',
+        # Erro
+        'ocorrencias': 'int',
+        # Tentativa
+        'indice': 'int', 'data': 'timestamp', 'nota': 'float', 'erro': 'str',
+        # Exercicio (as demais colunas são estatísticas, ver ExerciseStats)
+        'n_execucoes': 'int', 'taxa_acerto': 'float',
+    }
+    __column_types.update({coluna: 'float' for coluna in Exercicio.get_csv_header()[3:]})
+    # tabelas abertas (nome -> [writer, tipos das colunas, linhas pendentes])
+    __tables = {}
+    # indica se as tabelas são gravadas em formato Parquet ('pyarrow' disponível)
+    __parquet = False
+
+    @staticmethod
+    def __import_pyarrow() -> bool:
+        """Importa o módulo 'pyarrow', somente quando a saída colunar é usada."""
+        global pyarrow
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            return False
+        return True
+
+    @staticmethod
+    def create_output_dir(incremental: bool = False) -> bool:
+        """
+        Cria (ou recria) o diretório dos arquivos de saída colunares.
+
+        :param incremental: Ignorado, a saída colunar é sempre gravada por completo.
+        :return: 'False', as saídas anteriores nunca são mantidas.
+        """
+        ColumnarParser.close()
+        ColumnarParser.__parquet = ColumnarParser.__import_pyarrow()
+        try:
+            if os.path.exists(ColumnarParser.__output_dir):
+                shutil.rmtree(ColumnarParser.__output_dir)
+            os.mkdir(ColumnarParser.__output_dir)
+            Logger.info('Saída colunar em formato %s: %s', 'Parquet' if ColumnarParser.__parquet else 'NumPy (.npy)',
+                        ColumnarParser.__output_dir)
+        except OSError:
+            Logger.error('Erro ao criar diretório de saída colunar!')
+        return False
+
+    @staticmethod
+    @Profiler.timed('columnar.close')
+    def close():
+        """Grava as linhas pendentes e fecha todas as tabelas."""
+        tables = ColumnarParser.__tables
+        ColumnarParser.__tables = {}
+        for nome, (writer, _, rows) in tables.items():
+            try:
+                writer.write(rows)
+            finally:
+                writer.close()
+
+    @staticmethod
+    def column_type(coluna: str) -> str:
+        """
+        Retorna o tipo de uma coluna das tabelas das entidades ('str', 'int', 'float', 'bool', 'duration', 'timestamp'
+        ou 'list'), também usado pelos demais backends tipados (ver :class:`SQLiteParser`).
+
+        :param coluna: Nome da coluna no cabeçalho das entidades (get_csv_header).
+        :type coluna: str
+        """
+        return ColumnarParser.__column_types[coluna]
+
+    @staticmethod
+    def __convert(tipo: str, valor):
+        """Converte um valor de :meth:`CSVEntity.as_row` para o tipo da coluna."""
+        if valor is None:
+            return None
+        if tipo == 'int':
+            return int(valor)
+        if tipo == 'float':
+            return float(valor)
+        if tipo == 'bool':
+            return bool(valor)
+        if tipo == 'str':
+            return str(valor)
+        if tipo == 'timestamp':
+            # datas das Atividades (ex: '2017-03-13 16:00') e das Tentativas (ex: '2017-03-20 22:00:30.085775')
+            for formato in ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S.%f'):
+                try:
+                    return datetime.strptime(valor, formato)
+                except ValueError:
+                    pass
+            return None
+        if tipo == 'list':
+            return [bloco if isinstance(bloco, list) else [bloco] for bloco in valor]
+        return valor
+
+    @staticmethod
+    def __write(nome: str, header: List[str], entidades: List[CSVEntity]):
+        table = ColumnarParser.__tables.get(nome)
+        if table is None:
+            columns = [(coluna, ColumnarParser.__column_types[coluna]) for coluna in header]
+            if ColumnarParser.__parquet:
+                writer = ParquetTableWriter(f'{ColumnarParser.__output_dir}/{nome}.parquet', columns)
+            else:
+                writer = NpyTableWriter(f'{ColumnarParser.__output_dir}/{nome}', columns)
+            table = ColumnarParser.__tables[nome] = [writer, [tipo for _, tipo in columns], []]
+        writer, tipos, rows = table
+        for entidade in entidades:
+            rows.append([ColumnarParser.__convert(tipo, valor) for tipo, valor in zip(tipos, entidade.as_row())])
+        if len(rows) >= ColumnarParser.__batch_size:
+            writer.write(rows)
+            table[2] = []
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_periodos', list_arg=0)
+    def salvar_periodos(periodos: List[Periodo]):
+        """Salva uma lista de :class:`Periodo` na tabela 'periodos'."""
+        ColumnarParser.__write('periodos', Periodo.get_csv_header(), periodos)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_turmas', list_arg=0)
+    def salvar_turmas(turmas: List[Turma]):
+        """Salva uma lista de :class:`Turma` na tabela 'turmas'."""
+        ColumnarParser.__write('turmas', Turma.get_csv_header(), turmas)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_atividades', list_arg=0)
+    def salvar_atividades(atividades: List[Atividade]):
+        """Salva uma lista de :class:`Atividade` na tabela 'atividades'."""
+        ColumnarParser.__write('atividades', Atividade.get_csv_header(), atividades)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_estudantes', list_arg=0)
+    def salvar_estudantes(estudantes: List[Estudante]):
+        """Salva uma lista de :class:`Estudante` na tabela 'estudantes'."""
+        ColumnarParser.__write('estudantes', Estudante.get_csv_header(), estudantes)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_execucoes', list_arg=0)
+    def salvar_execucoes(execucoes: List[Execucao]):
+        """Salva uma lista de :class:`Execucao` na tabela 'execucoes'."""
+        ColumnarParser.__write('execucoes', Execucao.get_csv_header(), execucoes)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_solucoes', list_arg=0)
+    def salvar_solucoes(solucoes: List[Solucao]):
+        """Salva uma lista de :class:`Solucao` na tabela 'solucoes'."""
+        ColumnarParser.__write('solucoes', Solucao.get_csv_header(), solucoes)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_erros', list_arg=0)
+    def salvar_erros(erros: List[Erro]):
+        """Salva uma lista de :class:`Erro` na tabela 'erros'."""
+        ColumnarParser.__write('erros', Erro.get_csv_header(), erros)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_tentativas', list_arg=0)
+    def salvar_tentativas(tentativas: List[Tentativa]):
+        """Salva uma lista de :class:`Tentativa` na tabela 'tentativas'."""
+        ColumnarParser.__write('tentativas', Tentativa.get_csv_header(), tentativas)
+
+    @staticmethod
+    @Profiler.timed('columnar.salvar_exercicios', list_arg=0)
+    def salvar_exercicios(exercicios: List[Exercicio]):
+        """Salva uma lista de :class:`Exercicio` na tabela 'exercicios'."""
+        ColumnarParser.__write('exercicios', Exercicio.get_csv_header(), exercicios)
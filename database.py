@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+
+from columnar import ColumnarParser
+from model import *
+from profiler import Profiler
+from util import Logger
+
+
+class SQLiteParser:
+    """
+    Backend de saída que grava as tabelas das entidades num único banco SQLite ('sqlite/codebench.db'), alternativo (ou
+    complementar) aos arquivos '.csv' do :class:`CSVParser`.
+
+    Cada tabela (periodos, turmas, atividades, estudantes, execucoes, solucoes, erros, tentativas e exercicios) tem as
+    mesmas colunas do arquivo '.csv' correspondente. As linhas são inseridas em lotes ('executemany'), um lote por
+    transação, e os índices das colunas usadas nas consultas (exercício, estudante, atividade e período/turma) são
+    criados somente ao final da extração, depois de todas as linhas inseridas, o que é mais rápido que mantê-los
+    atualizados a cada inserção.
+
+    Exemplo de consulta:
+        SELECT * FROM execucoes WHERE exercicio = 1000
+    """
+
+    # diretório e caminho do banco de dados de saída
+    __output_dir = os.getcwd() + '/sqlite'
+    __path = f'{__output_dir}/codebench.db'
+    # quantidade de linhas mantidas em memória, por tabela, antes de serem inseridas no banco
+    __batch_size = 65536
+    # tabelas e entidades cujas colunas elas armazenam
+    __entities = {
+        'periodos': Periodo,
+        'turmas': Turma,
+        'atividades': Atividade,
+        'estudantes': Estudante,
+        'execucoes': Execucao,
+        'solucoes': Solucao,
+        'erros': Erro,
+        'tentativas': Tentativa,
+        'exercicios': Exercicio,
+    }
+    # índices criados ao final da extração, em todas as tabelas que possuem as colunas
+    __indexes = [('exercicio',), ('estudante',), ('atividade',), ('periodo', 'turma')]
+    # tipos SQLite equivalentes aos tipos das colunas (ver ColumnarParser.column_type)
+    __sql_types = {'str': 'TEXT', 'int': 'INTEGER', 'float': 'REAL', 'bool': 'INTEGER', 'duration': 'REAL',
+                   'timestamp': 'TEXT', 'list': 'TEXT'}
+    __conn = None
+    # tabelas abertas (nome -> [comando 'INSERT', tipos das colunas, linhas pendentes])
+    __tables = {}
+
+    @staticmethod
+    def create_output_dir(incremental: bool = False) -> bool:
+        """
+        Cria (ou recria) o banco de dados de saída, com as tabelas de todas as entidades.
+
+        :param incremental: Ignorado, o banco de dados é sempre gravado por completo.
+        :return: 'False', as saídas anteriores nunca são mantidas.
+        """
+        SQLiteParser.close()
+        try:
+            os.makedirs(SQLiteParser.__output_dir, exist_ok=True)
+            if os.path.exists(SQLiteParser.__path):
+                os.remove(SQLiteParser.__path)
+            conn = sqlite3.connect(SQLiteParser.__path)
+            # o banco é recriado a cada extração, uma extração interrompida não precisa ser recuperada
+            conn.execute('PRAGMA journal_mode=OFF')
+            conn.execute('PRAGMA synchronous=OFF')
+            with conn:
+                for nome, entidade in SQLiteParser.__entities.items():
+                    header = entidade.get_csv_header()
+                    tipos = [ColumnarParser.column_type(coluna) for coluna in header]
+                    colunas = ', '.join(f'{coluna} {SQLiteParser.__sql_types[tipo]}'
+                                        for coluna, tipo in zip(header, tipos))
+                    conn.execute(f'CREATE TABLE {nome} ({colunas})')
+                    insert = f"INSERT INTO {nome} VALUES ({', '.join('?' * len(header))})"
+                    SQLiteParser.__tables[nome] = [insert, tipos, []]
+            SQLiteParser.__conn = conn
+            Logger.info('Saída SQLite: %s', SQLiteParser.__path)
+        except (OSError, sqlite3.Error):
+            Logger.error('Erro ao criar o banco de dados de saída!')
+        return False
+
+    @staticmethod
+    @Profiler.timed('sqlite.close')
+    def close():
+        """Insere as linhas pendentes, cria os índices e fecha o banco de dados."""
+        conn = SQLiteParser.__conn
+        if conn is None:
+            return
+        SQLiteParser.__conn = None
+        try:
+            for nome in SQLiteParser.__tables:
+                SQLiteParser.__flush(conn, nome)
+            Logger.info('Criando os índices do banco de dados de saída: %s', SQLiteParser.__path)
+            with conn:
+                for nome, entidade in SQLiteParser.__entities.items():
+                    header = entidade.get_csv_header()
+                    for colunas in SQLiteParser.__indexes:
+                        if all(coluna in header for coluna in colunas):
+                            conn.execute(f"CREATE INDEX {nome}_{'_'.join(colunas)} ON {nome} ({', '.join(colunas)})")
+            conn.execute('ANALYZE')
+        finally:
+            SQLiteParser.__tables = {}
+            conn.close()
+
+    @staticmethod
+    def __flush(conn: sqlite3.Connection, nome: str):
+        """Insere as linhas pendentes de uma tabela numa única transação."""
+        table = SQLiteParser.__tables[nome]
+        if table[2]:
+            with conn:
+                conn.executemany(table[0], table[2])
+            table[2] = []
+
+    @staticmethod
+    def __convert(tipo: str, valor):
+        """Converte um valor de :meth:`CSVEntity.as_row` para o tipo SQLite da coluna."""
+        if valor is None:
+            return None
+        if tipo == 'int' or tipo == 'bool':
+            return int(valor)
+        if tipo == 'float':
+            return float(valor)
+        if tipo == 'duration':
+            # as durações são gravadas em segundos
+            return valor.total_seconds()
+        if tipo == 'list':
+            return json.dumps(valor)
+        return str(valor)
+
+    @staticmethod
+    def __write(nome: str, entidades: List[CSVEntity]):
+        if SQLiteParser.__conn is None:
+            return
+        table = SQLiteParser.__tables[nome]
+        tipos, rows = table[1], table[2]
+        convert = SQLiteParser.__convert
+        for entidade in entidades:
+            rows.append([convert(tipo, valor) for tipo, valor in zip(tipos, entidade.as_row())])
+        if len(rows) >= SQLiteParser.__batch_size:
+            SQLiteParser.__flush(SQLiteParser.__conn, nome)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_periodos', list_arg=0)
+    def salvar_periodos(periodos: List[Periodo]):
+        """Salva uma lista de :class:`Periodo` na tabela 'periodos'."""
+        SQLiteParser.__write('periodos', periodos)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_turmas', list_arg=0)
+    def salvar_turmas(turmas: List[Turma]):
+        """Salva uma lista de :class:`Turma` na tabela 'turmas'."""
+        SQLiteParser.__write('turmas', turmas)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_atividades', list_arg=0)
+    def salvar_atividades(atividades: List[Atividade]):
+        """Salva uma lista de :class:`Atividade` na tabela 'atividades'."""
+        SQLiteParser.__write('atividades', atividades)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_estudantes', list_arg=0)
+    def salvar_estudantes(estudantes: List[Estudante]):
+        """Salva uma lista de :class:`Estudante` na tabela 'estudantes'."""
+        SQLiteParser.__write('estudantes', estudantes)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_execucoes', list_arg=0)
+    def salvar_execucoes(execucoes: List[Execucao]):
+        """Salva uma lista de :class:`Execucao` na tabela 'execucoes'."""
+        SQLiteParser.__write('execucoes', execucoes)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_solucoes', list_arg=0)
+    def salvar_solucoes(solucoes: List[Solucao]):
+        """Salva uma lista de :class:`Solucao` na tabela 'solucoes'."""
+        SQLiteParser.__write('solucoes', solucoes)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_erros', list_arg=0)
+    def salvar_erros(erros: List[Erro]):
+        """Salva uma lista de :class:`Erro` na tabela 'erros'."""
+        SQLiteParser.__write('erros', erros)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_tentativas', list_arg=0)
+    def salvar_tentativas(tentativas: List[Tentativa]):
+        """Salva uma lista de :class:`Tentativa` na tabela 'tentativas'."""
+        SQLiteParser.__write('tentativas', tentativas)
+
+    @staticmethod
+    @Profiler.timed('sqlite.salvar_exercicios', list_arg=0)
+    def salvar_exercicios(exercicios: List[Exercicio]):
+        """Salva uma lista de :class:`Exercicio` na tabela 'exercicios'."""
+        SQLiteParser.__write('exercicios', exercicios)
@@ -2,12 +2,13 @@ import re
 
 from util import Util
 from datetime import datetime, timedelta
+from typing import Iterator, Tuple
 
-from radon.visitors import ComplexityVisitor
-from radon.raw import analyze
-from radon.metrics import h_visit
-
+from budget import MetricsBudget
+from cache import MetricsCache
+from profiler import Profiler
 from parser import *
+from source import DatasetSource
 from model import *
 
 
@@ -24,12 +25,39 @@ class CodebenchExtractor:
     __codemirror_file_extension = '.log'
     # extensão do arquivo de código-fonte das soluções dos 'Estudantes'
     __exercices_file_extension = '.py'
-    # extensão do arquivo de código-fonte das soluções dos 'Professores
-    __solution_extension = '.code'
+    # marcador que inicia cada solução dos 'Professores' no arquivo 'solucoes.csv'
+    __solution_marker = ' == SOLUCAO DO PROFESSOR ==>'
     # tempo de inatividade
     __inactivity_threshold = timedelta(minutes=5)
+    # data e hora dos eventos do CodeMirror, sem zeros à esquerda (ex: '2017-3-13 17:27:27.798')
+    __event_datetime_pattern = re.compile(r'(\d{4}-\d{1,2}-\d{1,2}) (\d{1,2}):(\d{1,2}):(\d{1,2})\.(\d{1,6})')
+    # instante inicial (em microssegundos desde 1970-01-01) de cada dia já convertido
+    __event_days = {}
+    __epoch = datetime(1970, 1, 1)
+    # nome do erro, no início de uma das linhas da mensagem de erro de uma execução
+    __error_name_pattern = re.compile(r'^([\w_\.]+Error)', re.MULTILINE)
+    # registra as Tentativas (submissões e testes) de cada Execução (ver '--tentativas')
+    __tentativas = False
+    # calcula as métricas dos códigos (ver '--level'), caso contrário as métricas são sempre vazias
+    __metricas = True
 
     @staticmethod
+    def configure(tentativas: bool = False, metricas: bool = True):
+        """
+        Configura a extração das Execuções.
+
+        :param tentativas: Indica se as Tentativas (submissões e testes) de cada Execução devem ser registradas, com
+                           as métricas de cada código submetido (ver :class:`Tentativa`).
+        :type tentativas: bool
+        :param metricas: Indica se as métricas dos códigos devem ser calculadas. Sem as métricas, os arquivos de
+                         código-fonte dos Estudantes não são lidos e as colunas de métricas ficam vazias.
+        :type metricas: bool
+        """
+        CodebenchExtractor.__tentativas = tentativas
+        CodebenchExtractor.__metricas = metricas
+
+    @staticmethod
+    @Profiler.timed('extract_periodos')
     def extract_periodos(path: str) -> List[Periodo]:
         """
         Retorna uma lista de todos os :class:`Periodo` letivos encontrados no dataset Codebench.
@@ -48,16 +76,15 @@ class CodebenchExtractor:
         """
         periodos = []
         # recupera todas as 'entradas' (arquivos ou pastas) no caminho informado (path).
-        with os.scandir(path) as entries:
-            for entry in entries:
-                with os.scandir(entry.path) as folders:
-                    for folder in folders:
-                        Logger.info(f'Extraindo informações de Perído: {folder.name}')
-                        p = Periodo(folder.name, folder.path)
-                        periodos.append(p)
+        for entry in DatasetSource.scandir(path):
+            for folder in DatasetSource.scandir(entry.path):
+                Logger.info('Extraindo informações de Perído: %s', folder.name)
+                p = Periodo(folder.name, folder.path)
+                periodos.append(p)
         return periodos
 
     @staticmethod
+    @Profiler.timed('extract_turma_descricao')
     def __extract_turma_descricao_from_file(path: str, turma: Turma):
         """
         Recupera a descrição da :class:`Turma`, a partir de um dos arquivo de :class:`Atividade` (assessments).
@@ -71,20 +98,19 @@ class CodebenchExtractor:
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas no diretório informado (diretório de atividades da turma)
-        with os.scandir(path) as entries:
-            for entry in entries:
-                # se a 'entrada' for um arquivo de extensão '.data' então corresponde atividade
-                if entry.is_file() and entry.path.endswith(CodebenchExtractor.__atividade_file_extension):
-                    with open(entry.path, 'r') as f:
-                        Logger.info(f'Extraindo descrição da Turma no arquivo: {entry.path}')
+        for entry in DatasetSource.scandir(path):
+            # se a 'entrada' for um arquivo de extensão '.data' então corresponde atividade
+            if entry.is_file() and entry.path.endswith(CodebenchExtractor.__atividade_file_extension):
+                with DatasetSource.open(entry.path, 'r') as f:
+                    Logger.info('Extraindo descrição da Turma no arquivo: %s', entry.path)
+                    line = f.readline()
+                    while line:
+                        # ---- class name: Introdução à Programação de Computadores
+                        if line.startswith('---- class name:'):
+                            turma.descricao = line.strip()[17:]
+                            break
                         line = f.readline()
-                        while line:
-                            # ---- class name: Introdução à Programação de Computadores
-                            if line.startswith('---- class name:'):
-                                turma.descricao = line.strip()[17:]
-                                break
-                            line = f.readline()
-                    break
+                break
 
     @staticmethod
     def extract_turmas(periodo: Periodo):
@@ -104,21 +130,34 @@ class CodebenchExtractor:
                 print(turma)
             ...
 
+        :param periodo: O Período letivo do qual devem ser recuperadas as Turmas.
+        :type periodo: Periodo
+        """
+        periodo.turmas.extend(CodebenchExtractor.iter_turmas(periodo))
+
+    @staticmethod
+    def iter_turmas(periodo: Periodo) -> Iterator[Turma]:
+        """
+        Gera, uma a uma, as :class:`Turma` de um :class:`Periodo` letivo, sem armazená-las no período.
+
+        Versão em fluxo (streaming) de :meth:`extract_turmas`: cada Turma pode ser salva e descartada antes que a
+        próxima seja extraída.
+
         :param periodo: O Período letivo do qual devem ser recuperadas as Turmas.
         :type periodo: Periodo
         """
         # coleta todas os arquivos/pastas dentro do diretório do período.
-        with os.scandir(periodo.path) as folders:
-            for folder in folders:
-                # se a 'entrada' for uma diretório (pasta) então corresponde a uma 'turma'
-                if folder.is_dir():
-                    Logger.info(f'Extraindo informações de Turma: {folder.name} {periodo.descricao}')
-                    code = int(folder.name)
-                    turma = Turma(periodo, code, folder.path)
-                    CodebenchExtractor.__extract_turma_descricao_from_file(f'{folder.path}/assessments', turma)
-                    periodo.turmas.append(turma)
+        for folder in DatasetSource.scandir(periodo.path):
+            # se a 'entrada' for uma diretório (pasta) então corresponde a uma 'turma'
+            if folder.is_dir():
+                Logger.info('Extraindo informações de Turma: %s %s', folder.name, periodo.descricao)
+                code = int(folder.name)
+                turma = Turma(periodo, code, folder.path)
+                CodebenchExtractor.__extract_turma_descricao_from_file(f'{folder.path}/assessments', turma)
+                yield turma
 
     @staticmethod
+    @Profiler.timed('extract_atividade_info', path_arg=0)
     def __extract_atividade_info_from_file(path: str, atividade: Atividade):
         """
         Recupera as informações da :class:`Atividade` de um arquivo ('.data').
@@ -130,8 +169,8 @@ class CodebenchExtractor:
         :param atividade: Objeto que irá armazenar as informações retiradas do arquivo.
         :type atividade: Atividade
         """
-        with open(path, 'r') as f:
-            Logger.info(f'Extraindo informações da Atividade no arquivo: {path}')
+        with DatasetSource.open(path, 'r') as f:
+            Logger.info('Extraindo informações da Atividade no arquivo: %s', path)
             for line in f.readlines():
                 if line.startswith('---- as'):
                     atividade.titulo = line[23:].strip()
@@ -184,17 +223,17 @@ class CodebenchExtractor:
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas dentro do diretório de atividades da turma
-        with os.scandir(f'{turma.path}/assessments') as arquivos:
-            for arquivo in arquivos:
-                # se a 'entrada' for um arquivo de extensão '.data', então corresponde a uma atividade.
-                if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__atividade_file_extension):
-                    Logger.info(f'Extraindo informações de Atividade: {arquivo.name}')
-                    code = int(arquivo.path.split('/')[-1].replace(CodebenchExtractor.__atividade_file_extension, ''))
-                    atividade = Atividade(turma, code, arquivo.path)
-                    CodebenchExtractor.__extract_atividade_info_from_file(arquivo.path, atividade)
-                    turma.atividades.append(atividade)
+        for arquivo in DatasetSource.scandir(f'{turma.path}/assessments'):
+            # se a 'entrada' for um arquivo de extensão '.data', então corresponde a uma atividade.
+            if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__atividade_file_extension):
+                Logger.info('Extraindo informações de Atividade: %s', arquivo.name)
+                code = int(arquivo.path.split('/')[-1].replace(CodebenchExtractor.__atividade_file_extension, ''))
+                atividade = Atividade(turma, code, arquivo.path)
+                CodebenchExtractor.__extract_atividade_info_from_file(arquivo.path, atividade)
+                turma.atividades.append(atividade)
 
     @staticmethod
+    @Profiler.timed('extract_estudante_info', path_arg=0)
     def __extract_estudante_info_from_file(path: str, estudante: Estudante):
         """
         Extrai as informações referentes ao :class:`Estudante` do arquivo 'user.data'.
@@ -206,8 +245,8 @@ class CodebenchExtractor:
         :param estudante: Objeto que irá armazenar as informações retiradas do arquivo.
         :type estudante: Estudante
         """
-        with open(path, 'r') as f:
-            Logger.info(f'Extraindo informações do Estudante no arquivo: {path}')
+        with DatasetSource.open(path, 'r') as f:
+            Logger.info('Extraindo informações do Estudante no arquivo: %s', path)
             for index, line in enumerate(f.readlines(), start=0):
                 line = line.strip()
                 if line.startswith('---- cou') and index == 1:
@@ -271,22 +310,40 @@ class CodebenchExtractor:
                 print(estudante)
             ...
 
+        :param turma: A Turma (disciplina) na qual os Estudantes estão matriculados.
+        :type turma: Turma
+        """
+        turma.estudantes.extend(CodebenchExtractor.iter_estudantes(turma))
+
+    @staticmethod
+    def iter_estudantes(turma: Turma) -> Iterator[Estudante]:
+        """
+        Gera, um a um, os :class:`Estudante` de uma :class:`Turma`, sem armazená-los na turma.
+
+        Versão em fluxo (streaming) de :meth:`extract_estudantes`.
+
         :param turma: A Turma (disciplina) na qual os Estudantes estão matriculados.
         :type turma: Turma
         """
         # coleta todas os arquivos/pastas no diretório de 'estudantes' informado
-        with os.scandir(f'{turma.path}/users') as folders:
-            for folder in folders:
-                # se a 'entrada' for um diretório, então corresponde a pasta de um 'estudante'.
-                if folder.is_dir():
-                    Logger.info(f'Extraindo informações do Estudante: {folder.name}')
-                    estudante = Estudante(turma.periodo, turma, int(folder.name), folder.path)
-                    CodebenchExtractor.__extract_estudante_info_from_file(
-                        f'{folder.path}/{CodebenchExtractor.__estudante_file_name}', estudante)
-                    turma.estudantes.append(estudante)
+        for folder in DatasetSource.scandir(f'{turma.path}/users'):
+            # se a 'entrada' for um diretório, então corresponde a pasta de um 'estudante'.
+            if folder.is_dir():
+                Logger.info('Extraindo informações do Estudante: %s', folder.name)
+                estudante = Estudante(turma.periodo, turma, int(folder.name), folder.path)
+                CodebenchExtractor.__extract_estudante_info_from_file(
+                    f'{folder.path}/{CodebenchExtractor.__estudante_file_name}', estudante)
+                yield estudante
+
+    @staticmethod
+    @Profiler.timed('read_code', path_arg=0)
+    def __read_code(path: str) -> str:
+        with DatasetSource.open(path, 'r') as f:
+            return ''.join(f.readlines())
 
     @staticmethod
-    def __get_code_metrics(codigo: str):
+    @Profiler.timed('get_code_metrics', text_arg=0)
+    def __get_code_metrics(codigo: str, origem: str = None):
         """
         Recupera as métricas de um código Python.
 
@@ -316,51 +373,31 @@ class CodebenchExtractor:
             - time: Tempo (T = E / 18 segundos)
             - bugs: Bugs (B = V / 3000), estivativa de erros na implementação
 
-        :param path: Caminho absoluto para o arquivo de código fonte (.py).
-        :type path: str
+        O código é analisado uma única vez para todos os grupos de métricas (ver :class:`MetricsAnalyzer`), e somente
+        se suas métricas ainda não estiverem no cache (ver :class:`MetricsCache`). A análise respeita os limites de
+        tempo e tamanho de cada código (ver :class:`MetricsBudget`): os códigos que os excedem resultam em métricas
+        vazias, não são gravados no cache e são registrados no log com o motivo.
+
+        :param codigo: Código-fonte Python.
+        :type codigo: str
+        :param origem: Caminho do arquivo de onde o código foi lido, registrado caso o código seja ignorado.
+        :type origem: str
         :return: As métricas que puderam ser extraídas do código.
         """
-        metricas = Metricas()
-        try:
-            v = ComplexityVisitor.from_code(codigo)
-            metricas.complexity = v.complexity
-            metricas.n_functions = len(v.functions)
-            metricas.n_classes = len(v.functions)
-        except Exception as e:
-            pass
-
-        try:
-            a = analyze(codigo)
-            metricas.loc = a.loc
-            metricas.lloc = a.lloc
-            metricas.sloc = a.sloc
-            metricas.blank_lines = a.blank
-            metricas.multilines = a.multi
-            metricas.comments = a.comments
-            metricas.single_comments = a.single_comments
-        except Exception as e:
-            pass
-
-        try:
-            h = h_visit(codigo)
-            metricas.h1 = h.total.h1
-            metricas.h2 = h.total.h2
-            metricas.N1 = h.total.N1
-            metricas.N2 = h.total.N2
-            metricas.h = h.total.vocabulary
-            metricas.N = h.total.length
-            metricas.calculated_N = h.total.calculated_length
-            metricas.volume = h.total.volume
-            metricas.difficulty = h.total.difficulty
-            metricas.effort = h.total.effort
-            metricas.bugs = h.total.bugs
-            metricas.time = h.total.time
-        except Exception as e:
-            pass
-
+        if not CodebenchExtractor.__metricas:
+            return Metricas()
+        chave = MetricsCache.key(codigo)
+        metricas = MetricsCache.get(chave)
+        if metricas is None:
+            metricas, motivo = MetricsBudget.analyze(codigo, chave)
+            if motivo:
+                Logger.warn('Métricas do código ignoradas (%s, %s caracteres): %s', motivo, len(codigo), origem)
+            else:
+                MetricsCache.put(chave, metricas)
         return metricas
 
     @staticmethod
+    @Profiler.timed('extract_solution_interval', path_arg=0)
     def __extract_solution_interval(path: str, execucao: Execucao):
         """
         Calcula os tempos de implementação e interação utilizando como limites os intervalos definidos na Atividade.
@@ -374,75 +411,114 @@ class CodebenchExtractor:
         :param execucao: Objeto que irá armazenar as informações obtidas do arquivo de 'log' do CodeMirror.
         :type execucao: Execucao
         """
-        with open(path, 'r') as f:
-            Logger.info(f'Calculando tempos des implementação e interação: {path}')
+        with DatasetSource.open(path, 'r') as f:
+            Logger.info('Calculando tempos des implementação e interação: %s', path)
             # datas de inicio e termino da atividade, servem como limites para o calculo do tempo e solução
-            at_dti = datetime.strptime(execucao.atividade.data_inicio, '%Y-%m-%d %H:%M')
-            at_dtf = datetime.strptime(execucao.atividade.data_termino, '%Y-%m-%d %H:%M')
+            at_dti = CodebenchExtractor.__to_micros(datetime.strptime(execucao.atividade.data_inicio, '%Y-%m-%d %H:%M'))
+            at_dtf = CodebenchExtractor.__to_micros(datetime.strptime(execucao.atividade.data_termino, '%Y-%m-%d %H:%M'))
+            threshold = CodebenchExtractor.__inactivity_threshold // timedelta(microseconds=1)
+
+            t_implementacao = 0
+            t_interacao = 0
 
-            execucao.t_implementacao = timedelta(0)
-            execucao.t_interacao = timedelta(0)
+            # as datas de todos os eventos do log são convertidas de uma só vez (em microssegundos), os eventos
+            # cuja linha não pôde ser interpretada possuem data 'None' e são ignorados
+            datetimes, event_names, event_msgs = CodebenchExtractor.__get_events_info(f.readlines())
 
             # percorremos o arquivo de log até os eventos terem um datetime maior que o do inicio da atividade
-            lines = f.readlines()
             i = 0
-            size = len(lines)
+            size = len(datetimes)
             while i < size:
-                try:
-                    start_datetime, _, _ = CodebenchExtractor.__get_event_info(lines[i])
-                    if start_datetime >= at_dti:
-                        break
-                except Exception:
-                    pass
+                if datetimes[i] is not None and datetimes[i] >= at_dti:
+                    start_datetime = datetimes[i]
+                    break
                 i += 1
 
+            event_msg = None
             while i < size:
                 end_datetime = None
 
                 # buscamos então o evento de focus
                 while i < size:
                     i += 1
-                    try:
-                        start_datetime, event_name, _ = CodebenchExtractor.__get_event_info(lines[i])
+                    if i < size and datetimes[i] is not None:
+                        start_datetime, event_name = datetimes[i], event_names[i]
                         if event_name == 'focus':
                             break
                         # se o evento for uma 'sumissão' correta ou o datetime do evento for maior que o datetime de termino da atividade
                         # finalizamos o calculo do tempo de solução
-                        if event_name == 'submit' and event_msg.startswith('Congr'):
+                        # (a mensagem considerada é a do último evento lido na busca pelo 'blur')
+                        if event_name == 'submit' and event_msg is not None and event_msg.startswith('Congr'):
                             start_datetime = None
                             i = size
-                    except Exception:
-                        pass
 
                 # efetuamos o somatório dos intervalos enquanto o editor do CodeMirror possuir foco
                 while i < size:
                     i += 1
-                    try:
+                    if i < size and datetimes[i] is not None:
                         # se temos o datetime de um evento anterior, podemos calcular o intervalo de tempo entre os eventos
-                        end_datetime, event_name, event_msg = CodebenchExtractor.__get_event_info(lines[i])
+                        end_datetime, event_name, event_msg = datetimes[i], event_names[i], event_msgs[i]
                         if event_name == 'blur':
                             break
-                    except Exception:
-                        pass
 
-                if not end_datetime:
+                if end_datetime is None:
                     break
                 if end_datetime > at_dtf:
                     break
 
                 if start_datetime <= end_datetime:
-                    interval = (end_datetime - start_datetime)
-                    if interval < CodebenchExtractor.__inactivity_threshold:
-                        execucao.t_implementacao += interval
-                    execucao.t_interacao += interval
+                    interval = end_datetime - start_datetime
+                    if interval < threshold:
+                        t_implementacao += interval
+                    t_interacao += interval
+
+            execucao.t_implementacao = timedelta(microseconds=t_implementacao)
+            execucao.t_interacao = timedelta(microseconds=t_interacao)
 
     @staticmethod
-    def __get_event_info(linha):
-        date, _, linha = linha.partition('#')
-        name, _, msg = linha.partition('#')
-        # data e hora do evento desconsiderando os milisegundos
-        date = datetime.strptime(date, '%Y-%m-%d %H:%M:%S.%f')
-        return date, name, msg
+    def __to_micros(date: datetime) -> int:
+        return (date - CodebenchExtractor.__epoch) // timedelta(microseconds=1)
+
+    @staticmethod
+    def __get_events_info(linhas: List[str]):
+        """
+        Separa a data e hora, o nome e a mensagem dos eventos de um log do CodeMirror ('data#evento#mensagem').
+
+        As datas são convertidas para microssegundos desde 1970-01-01: o dia é convertido uma única vez (e mantido em
+        cache) e a hora é somada a partir dos campos do texto, evitando o 'datetime.strptime' a cada linha. Datas fora
+        do formato usual são convertidas pelo 'strptime', e as que não puderem ser convertidas resultam em 'None'.
+
+        :param linhas: Linhas do arquivo de log do CodeMirror.
+        :return: Tupla com as listas (datas, nomes, mensagens) dos eventos, na ordem das linhas.
+        """
+        match = CodebenchExtractor.__event_datetime_pattern.fullmatch
+        days = CodebenchExtractor.__event_days
+        datetimes, names, msgs = [], [], []
+        for linha in linhas:
+            date, _, linha = linha.partition('#')
+            name, _, msg = linha.partition('#')
+            micros = None
+            m = match(date)
+            if m:
+                day, hour, minute, second, fraction = m.groups()
+                day_micros = days.get(day)
+                if day_micros is None:
+                    try:
+                        day_micros = days[day] = CodebenchExtractor.__to_micros(datetime.strptime(day, '%Y-%m-%d'))
+                    except ValueError:
+                        pass
+                hour, minute, second = int(hour), int(minute), int(second)
+                if day_micros is not None and hour < 24 and minute < 60 and second < 60:
+                    micros = day_micros + ((hour * 60 + minute) * 60 + second) * 1000000 + int(fraction.ljust(6, '0'))
+            if micros is None:
+                try:
+                    micros = CodebenchExtractor.__to_micros(datetime.strptime(date, '%Y-%m-%d %H:%M:%S.%f'))
+                except ValueError:
+                    pass
+            datetimes.append(micros)
+            names.append(name)
+            msgs.append(msg)
+        return datetimes, names, msgs
 
     @staticmethod
     def __get_float_value(line):
@@ -454,89 +530,196 @@ class CodebenchExtractor:
         return value
 
     @staticmethod
-    def __extract_code(lines, i):
-        codigo = []
-        while not lines[i].startswith('-- '):
-            codigo.append(lines[i])
-            i += 1
-        return codigo
+    def __find_line(buffer, prefix: bytes, pos: int) -> int:
+        """
+        Retorna a posição da primeira linha, a partir da linha iniciada em 'pos', que começa com 'prefix'.
+
+        :return: A posição do início da linha ou o tamanho do 'buffer', caso nenhuma linha comece com 'prefix'.
+        """
+        if buffer[pos:pos + len(prefix)] == prefix:
+            return pos
+        pos = buffer.find(b'\n' + prefix, pos)
+        return pos + 1 if pos >= 0 else len(buffer)
 
     @staticmethod
-    def __get_error_name(lines, i):
-        while not lines[i].startswith('*-*'):
-            m = re.match(r"^([\w_\.]+Error)", lines[i])
-            if m:
-                return m.group(0)
-            i += 1
-        return None
+    def __next_line(buffer, pos: int, count: int = 1) -> int:
+        """Retorna a posição do início da linha 'count' linhas após a linha que contém a posição 'pos'."""
+        for _ in range(count):
+            pos = buffer.find(b'\n', pos)
+            if pos < 0:
+                return len(buffer)
+            pos += 1
+        return pos
+
+    @staticmethod
+    def __get_line(buffer, pos: int) -> str:
+        return buffer[pos:CodebenchExtractor.__next_line(buffer, pos)].decode('utf-8', 'replace')
+
+    @staticmethod
+    def __get_error_name(buffer, pos: int):
+        # o nome do erro é procurado somente nas linhas da mensagem, até o separador '*-*' da execução
+        end = CodebenchExtractor.__find_line(buffer, b'*-*', pos)
+        m = CodebenchExtractor.__error_name_pattern.search(buffer[pos:end].decode('utf-8', 'replace'))
+        return m.group(0) if m else None
 
     @staticmethod
+    @Profiler.timed('extract_executions_count', path_arg=0)
     def __extract_executions_count(path: str, execucao: Execucao):
         """
         Recupera as informações de submissões, testes e erros do arquivo de 'log' das tentativas de solução de um exercício.
 
         As informações sobre submissões, testes e erros são salvos no objeto 'execucao'.
 
+        O arquivo é mapeado em memória e percorrido como bytes, localizando diretamente as linhas que iniciam os
+        marcadores de interesse ('== S', '== T', '-- CODE', '-- EXEC', '-- GRAD', '-- ERROR' e '*-*'); somente o código
+        da submissão correta e as mensagens de erro são decodificados. Com as Tentativas habilitadas (ver
+        :meth:`configure`), cada submissão e teste também é registrado como uma :class:`Tentativa`, na mesma leitura.
+
         :param path: Caminho absoluto do arquivo de 'log' com as informações das execuções feitas pelo estudante.
         :type path: str
         :param execucao: Objeto que irá armazenar as informações obtidas do arquivo de 'log' do Codebench.
         :type execucao: model.Execucao
         """
         error_names = []
-        with open(path, 'r') as f:
-            execucao.n_submissoes = 0
-            execucao.n_testes = 0
-            execucao.n_erros = 0
-            execucao.nota_final = 0.0
+        tentativas = [] if CodebenchExtractor.__tentativas else None
+        execucao.n_submissoes = 0
+        execucao.n_testes = 0
+        execucao.n_erros = 0
+        execucao.nota_final = 0.0
+
+        # o arquivo é mapeado em memória (ou lido diretamente do dataset compactado)
+        with DatasetSource.buffer(path) as buffer:
+            # arquivos vazios não possuem execuções
+            if len(buffer):
+                # as quebras de linha '\r\n' e '\r' são convertidas para '\n', como na leitura em modo texto
+                if buffer.find(b'\r') >= 0:
+                    buffer = buffer[:].replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+                CodebenchExtractor.__scan_executions(buffer, execucao, error_names, tentativas, path)
+
+        # os Erros são mantidos na Execução e salvos junto com ela, permitindo a extração em outro processo
+        execucao.erros = Util.count_errors(error_names, execucao)
+        if tentativas:
+            execucao.tentativas = tentativas
 
-            i = 0
-            lines = f.readlines()
-            size = len(lines)
+    @staticmethod
+    def __code_metrics(code: bytes, metricas: dict, origem: str):
+        """Recupera as métricas de um bloco de código, calculadas uma única vez para cada código distinto do 'log'."""
+        resultado = metricas.get(code)
+        if resultado is None:
+            resultado = metricas[code] = CodebenchExtractor.__get_code_metrics(code.decode('utf-8', 'replace'),
+                                                                                       origem)
+        return resultado
 
-            while i < size:
-                if lines[i].startswith('== S'):
-                    code = None
-                    execucao.t_execucao = None
-                    execucao.acertou = False
-                    execucao.n_submissoes += 1
-                    i += 1
-                    while not lines[i].startswith('*-*'):
-                        if lines[i].startswith('-- CODE'):
-                            code = CodebenchExtractor.__extract_code(lines, i + 1)
-                            i += len(code) + 1
-                        elif lines[i].startswith('-- EXEC'):
-                            execucao.t_execucao = CodebenchExtractor.__get_float_value(lines[i + 1].strip())
-                            i += 2
-                        elif lines[i].startswith('-- GRAD'):
-                            execucao.nota_final = CodebenchExtractor.__get_float_value(lines[i + 1].strip()[:-1])
-                            i += 2
-                        elif lines[i].startswith('-- ERROR'):
-                            i += 3
-                            execucao.n_erros += 1
-                            error_names.append(CodebenchExtractor.__get_error_name(lines, i))
-                        else:
-                            i += 1
-                    if execucao.nota_final > 99.99:
-                        execucao.acertou = True
-                        execucao.metricas = CodebenchExtractor.__get_code_metrics(''.join(code))
-                        i = size
-                elif lines[i].startswith('== T'):
-                    execucao.n_testes += 1
-                    while not lines[i].startswith('*-*'):
-                        if lines[i].startswith('-- ERROR'):
-                            i += 3
-                            execucao.n_erros += 1
-                            error_names.append(CodebenchExtractor.__get_error_name(lines, i))
-                        else:
-                            i += 1
-                i += 1
+    @staticmethod
+    def __new_tentativa(buffer, pos: int, execucao: Execucao, tentativas: List[Tentativa], tipo: str) -> Tentativa:
+        """Registra a Tentativa iniciada na linha 'pos' ('== SUBMITION (data)' ou '== TEST (data)')."""
+        line = CodebenchExtractor.__get_line(buffer, pos)
+        data = line[line.find('(') + 1:line.rfind(')')] if '(' in line else None
+        tentativa = Tentativa(execucao, len(tentativas) + 1, tipo, data)
+        tentativas.append(tentativa)
+        return tentativa
 
-        erros_count = Util.count_errors(error_names, execucao)
-        if len(erros_count):
-            CSVParser.salvar_erros(erros_count)
+    @staticmethod
+    def __scan_executions(buffer, execucao: Execucao, error_names: List[str], tentativas: List[Tentativa] = None,
+                          origem: str = None):
+        """
+        Percorre as submissões ('== S') e testes ('== T') do 'log' de execuções, contabilizando-os na 'execucao'.
+
+        Cada execução termina numa linha iniciada por '*-*'. As posições das linhas são obtidas com 'bytes.find', sem
+        dividir o arquivo em linhas: as linhas de código e saída que não contêm marcadores nunca são percorridas.
+
+        :param buffer: Conteúdo (bytes ou 'mmap') do arquivo de 'log' das execuções.
+        :param execucao: Objeto que irá armazenar as informações obtidas do arquivo de 'log' do Codebench.
+        :param error_names: Lista onde são adicionados os Tipos de Erros encontrados.
+        :param tentativas: Lista onde são adicionadas as Tentativas, ou 'None' para não registrá-las.
+        :param origem: Caminho do arquivo de 'log', registrado caso as métricas de um código sejam ignoradas.
+        """
+        find_line = CodebenchExtractor.__find_line
+        next_line = CodebenchExtractor.__next_line
+        # métricas de cada bloco de código distinto, compartilhadas pelas Tentativas com o mesmo código
+        metricas = {}
+        tentativa = None
+        size = len(buffer)
+        pos = 0
+        while pos < size:
+            pos = find_line(buffer, b'== ', pos)
+            if pos >= size:
+                break
+            kind = buffer[pos + 3:pos + 4]
+            if kind == b'S':
+                code = None
+                execucao.t_execucao = None
+                execucao.acertou = False
+                execucao.n_submissoes += 1
+                if tentativas is not None:
+                    tentativa = CodebenchExtractor.__new_tentativa(buffer, pos, execucao, tentativas, 'submissao')
+                pos = next_line(buffer, pos)
+                end = find_line(buffer, b'*-*', pos)
+                while True:
+                    # o separador é procurado novamente somente quando uma linha pulada era o próprio separador
+                    if end < pos:
+                        end = find_line(buffer, b'*-*', pos)
+                    marker = find_line(buffer, b'-- ', pos)
+                    if end <= marker:
+                        pos = end
+                        break
+                    if buffer[marker:marker + 7] == b'-- CODE':
+                        code_start = next_line(buffer, marker)
+                        pos = find_line(buffer, b'-- ', code_start)
+                        code = buffer[code_start:pos]
+                    elif buffer[marker:marker + 7] == b'-- EXEC':
+                        line = CodebenchExtractor.__get_line(buffer, next_line(buffer, marker))
+                        execucao.t_execucao = CodebenchExtractor.__get_float_value(line.strip())
+                        pos = next_line(buffer, marker, 2)
+                    elif buffer[marker:marker + 7] == b'-- GRAD':
+                        line = CodebenchExtractor.__get_line(buffer, next_line(buffer, marker))
+                        execucao.nota_final = CodebenchExtractor.__get_float_value(line.strip()[:-1])
+                        if tentativa:
+                            tentativa.nota = execucao.nota_final
+                        pos = next_line(buffer, marker, 2)
+                    elif buffer[marker:marker + 8] == b'-- ERROR':
+                        pos = next_line(buffer, marker, 3)
+                        execucao.n_erros += 1
+                        error_names.append(CodebenchExtractor.__get_error_name(buffer, pos))
+                        if tentativa and tentativa.erro is None:
+                            tentativa.erro = error_names[-1]
+                    else:
+                        pos = next_line(buffer, marker)
+                if tentativa and code is not None:
+                    tentativa.metricas = CodebenchExtractor.__code_metrics(code, metricas, origem)
+                if execucao.nota_final > 99.99:
+                    execucao.acertou = True
+                    if code is not None:
+                        execucao.metricas = CodebenchExtractor.__code_metrics(code, metricas, origem)
+                    break
+            elif kind == b'T':
+                execucao.n_testes += 1
+                end = find_line(buffer, b'*-*', pos)
+                if tentativas is not None:
+                    tentativa = CodebenchExtractor.__new_tentativa(buffer, pos, execucao, tentativas, 'teste')
+                    # o código do teste é o bloco '-- CODE' que precede a saída ('-- OUTPUT') ou os erros
+                    marker = find_line(buffer, b'-- CODE', pos)
+                    if marker < end:
+                        code_start = next_line(buffer, marker)
+                        pos = min(find_line(buffer, b'-- ', code_start), end)
+                        tentativa.metricas = CodebenchExtractor.__code_metrics(buffer[code_start:pos], metricas,
+                                                                               origem)
+                while True:
+                    if end < pos:
+                        end = find_line(buffer, b'*-*', pos)
+                    marker = find_line(buffer, b'-- ERROR', pos)
+                    if end <= marker:
+                        pos = end
+                        break
+                    pos = next_line(buffer, marker, 3)
+                    execucao.n_erros += 1
+                    error_names.append(CodebenchExtractor.__get_error_name(buffer, pos))
+                    if tentativa and tentativa.erro is None:
+                        tentativa.erro = error_names[-1]
+            pos = next_line(buffer, pos)
 
     @staticmethod
-    def extract_execucoes(estudante: Estudante):
+    def extract_execucoes(estudante: Estudante) -> List[Execucao]:
         """
         Recupera todas as :class:`Execucoes` feitas por um :class:`Estudante` tentando solucionar um Exercício de uma :class:`Atividade`.
 
@@ -546,7 +729,8 @@ class CodebenchExtractor:
 
         As execuções de uma determinada questão corresponde a um arquivo de extensão '.log', e cujo nome é formado pela composição do código da atividade e do código da questão, separados por um 'underscore'.
 
-        As execuções encontradas são salvas no objeto estudante (estudante.execucoes).
+        As execuções encontradas são salvas no objeto estudante (estudante.execucoes) e também retornadas, o que
+        permite executar a extração num processo separado (ver '--workers').
 
         Exemplo de uso:
             CodebenchExtractor.extract_execucoes(estudante)
@@ -555,74 +739,109 @@ class CodebenchExtractor:
                 print(execucao)
             ...
 
+        :param estudante: O estudante cujas execuções devem ser recuperadas.
+        :type estudante: Estudante
+        :return: Lista com as Execuções do Estudante.
+        """
+        estudante.execucoes.extend(CodebenchExtractor.iter_execucoes(estudante))
+        return estudante.execucoes
+
+    @staticmethod
+    def iter_execucoes(estudante: Estudante) -> Iterator[Execucao]:
+        """
+        Gera, uma a uma, as :class:`Execucao` de um :class:`Estudante`, sem armazená-las no estudante.
+
+        Versão em fluxo (streaming) de :meth:`extract_execucoes`, que também evita a referência circular entre o
+        Estudante e suas Execuções.
+
         :param estudante: O estudante cujas execuções devem ser recuperadas.
         :type estudante: Estudante
         """
         # transforma a lista de atividades da turma num dicionário, utilizando o código da turma como 'chave' (key)
         # isto facilita a obtenção do intervalo da atividade no cálculo dos tempos de implementação e interação
         atividades = {a.codigo: a for a in estudante.turma.atividades}
+        # os arquivos do CodeMirror e de código-fonte existentes são listados uma única vez, sem verificar cada arquivo
+        codemirror_files = DatasetSource.names(f'{estudante.path}/codemirror')
+        code_files = DatasetSource.names(f'{estudante.path}/codes')
         # coleta todas os arquivos/pastas dentro do diretório de execuções do aluno
-        with os.scandir(f'{estudante.path}/executions') as arquivos:
-            for arquivo in arquivos:
-                # se a 'entrada' for um arquivo de extensão '.log', então corresponde as execuções de uma questão.
-                if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__codemirror_file_extension):
-                    Logger.info(f'Extraindo informações de Execução: {arquivo.name}')
-                    # divide o nome do arquivo obtendo os códigos da atividade e exercício.
-                    atividade_code, exercicio_code, *_ = arquivo.name.replace(
-                        CodebenchExtractor.__codemirror_file_extension, '').split('_')
-                    atividade = atividades.get(int(atividade_code), None)
-                    execucao = Execucao(estudante.periodo, estudante.turma, estudante, atividade, int(exercicio_code))
-
-                    CodebenchExtractor.__extract_executions_count(arquivo.path, execucao)
-
-                    codemirror_file = f'{estudante.path}/codemirror/{arquivo.name}'
-                    if os.path.exists(codemirror_file):
-                        CodebenchExtractor.__extract_solution_interval(codemirror_file, execucao)
+        for arquivo in DatasetSource.scandir(f'{estudante.path}/executions'):
+            # se a 'entrada' for um arquivo de extensão '.log', então corresponde as execuções de uma questão.
+            if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__codemirror_file_extension):
+                Logger.info('Extraindo informações de Execução: %s', arquivo.name)
+                # divide o nome do arquivo obtendo os códigos da atividade e exercício.
+                atividade_code, exercicio_code, *_ = arquivo.name.replace(
+                    CodebenchExtractor.__codemirror_file_extension, '').split('_')
+                atividade = atividades.get(int(atividade_code), None)
+                execucao = Execucao(estudante.periodo, estudante.turma, estudante, atividade, int(exercicio_code))
+
+                CodebenchExtractor.__extract_executions_count(arquivo.path, execucao)
+
+                codemirror_file = f'{estudante.path}/codemirror/{arquivo.name}'
+                if arquivo.name in codemirror_files:
+                    CodebenchExtractor.__extract_solution_interval(codemirror_file, execucao)
+                else:
+                    Logger.warn('Arquivo de execução não encontrado: %s', codemirror_file)
+
+                if not execucao.metricas and not CodebenchExtractor.__metricas:
+                    execucao.metricas = Metricas()
+                elif not execucao.metricas:
+                    code_name = arquivo.name.replace(CodebenchExtractor.__codemirror_file_extension,
+                                                     CodebenchExtractor.__exercices_file_extension)
+                    code_file = f'{estudante.path}/codes/{code_name}'
+                    if code_name in code_files:
+                        codigo = CodebenchExtractor.__read_code(code_file)
+                        execucao.metricas = CodebenchExtractor.__get_code_metrics(codigo, code_file)
                     else:
-                        Logger.warn(f'Arquivo de execução não encontrado: {codemirror_file}')
-
-                    if not execucao.metricas:
-                        code_file = arquivo.name.replace(CodebenchExtractor.__codemirror_file_extension,
-                                                         CodebenchExtractor.__exercices_file_extension)
-                        code_file = f'{estudante.path}/codes/{code_file}'
-                        if os.path.exists(code_file):
-                            with open(code_file) as f:
-                                codigo = ''.join(f.readlines())
-                                execucao.metricas = CodebenchExtractor.__get_code_metrics(codigo)
-                        else:
-                            Logger.warn(f'Arquivo de código fonte não encontrado: {code_file}')
+                        Logger.warn('Arquivo de código fonte não encontrado: %s', code_file)
 
-                    estudante.execucoes.append(execucao)
+                yield execucao
 
     @staticmethod
-    def extract_solucoes(path: str):
+    @Profiler.timed('read_solucoes', path_arg=0)
+    def read_solucoes(path: str) -> List[Tuple[int, str]]:
         """
-        Extrai as métricas das soluções dos exercícios propostas pelos Professores.
+        Lê os códigos das soluções dos exercícios propostas pelos Professores.
 
-        As soluções estão salvas com a extensão '.code'.
+        Todas as soluções estão num único arquivo, cada uma iniciada por uma linha com o código do exercício e o
+        marcador 'SOLUCAO DO PROFESSOR' (ex: '1234 == SOLUCAO DO PROFESSOR ==>'). O arquivo é lido uma única vez e
+        dividido em memória; quando um exercício aparece mais de uma vez, prevalece a sua última solução.
 
         Exemplo de uso:
-            solucoes = CodebenchExtractor.extract_solucoes([solutions_path])
-
-            for solucao in solucoes:
-                print(solucao)
+            for codigo, texto in CodebenchExtractor.read_solucoes(f'{solutions_path}/solucoes.csv'):
+                solucao = CodebenchExtractor.extract_solucao(codigo, texto)
             ...
 
-        :param path: Caminho absoluto para a pasta onde se encontram as soluções.
+        :param path: Caminho absoluto do arquivo 'solucoes.csv'.
         :type path: str
-        :return: Lista de Soluções e suas métricas
+        :return: Lista de pares (código do exercício, código-fonte da solução), na ordem do arquivo.
         """
-        solucoes = []
-        # coleta todas os arquivos/pastas dentro do diretório de execuções do aluno
-        with os.scandir(path) as arquivos:
-            for arquivo in arquivos:
-                # se a 'entrada' for um arquivo de extensão '.code', então corresponde as execuções de uma questão.
-                if arquivo.is_file() and arquivo.path.endswith(CodebenchExtractor.__solution_extension):
-                    Logger.info(f'Extraindo métricas da Solução: {arquivo.path}')
-                    solucao = Solucao(int(arquivo.name.replace(CodebenchExtractor.__solution_extension, '')))
-                    with open(arquivo.path, 'r') as f:
-                        codigo = ''.join(f.readlines())
-                        solucao.metricas = CodebenchExtractor.__get_code_metrics(codigo)
-                    solucoes.append(solucao)
-
-        return solucoes
+        if not os.path.exists(path):
+            Logger.warn('Arquivo de soluções não encontrado: %s', path)
+            return []
+        solucoes = {}
+        linhas = None
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip().endswith(CodebenchExtractor.__solution_marker):
+                    linhas = solucoes[int(line.split(' == ')[0])] = []
+                elif linhas is not None:
+                    linhas.append(line)
+        return [(codigo, ''.join(linhas)) for codigo, linhas in solucoes.items()]
+
+    @staticmethod
+    def extract_solucao(codigo: int, texto: str, origem: str = None) -> Solucao:
+        """
+        Extrai as métricas da solução de um exercício proposta pelo Professor.
+
+        :param codigo: Código do exercício.
+        :type codigo: int
+        :param texto: Código-fonte da solução (ver :meth:`read_solucoes`).
+        :type texto: str
+        :param origem: Caminho do arquivo de onde a solução foi lida, registrado caso suas métricas sejam ignoradas.
+        :type origem: str
+        :return: A Solução e suas métricas.
+        """
+        Logger.info('Extraindo métricas da Solução: %s', codigo)
+        solucao = Solucao(codigo)
+        solucao.metricas = CodebenchExtractor.__get_code_metrics(texto, origem)
+        return solucao
@@ -0,0 +1,208 @@
+import json
+import os
+import shutil
+from datetime import timedelta
+
+from columnar import ColumnarParser, NpyStream
+from model import *
+from profiler import Profiler
+from util import Logger
+
+# o 'numpy' só é importado quando a matriz de atributos é gravada (ver 'FeatureMatrixParser.create_output_dir')
+numpy = None
+
+
+class FeatureMatrixParser:
+    """
+    Backend de saída que grava a matriz de atributos (features) usada no treinamento dos modelos: uma linha por
+    :class:`Execucao`, com as métricas da :class:`Solucao` do professor para o mesmo Exercício, em 'float32'.
+
+    Arquivos gravados na pasta 'features':
+        - 'X.npy': matriz (execuções x atributos), carregável com 'numpy.load(..., mmap_mode='r')'.
+        - 'y_<rótulo>.npy': um vetor por rótulo ('acertou' e 'nota_final'), com uma posição por execução.
+        - 'schema.json': nomes das colunas de 'X' e dos rótulos.
+
+    As colunas de 'X' seguem a ordem de :meth:`Execucao.get_csv_header` (somente as colunas numéricas, sem os rótulos),
+    seguidas das colunas de :meth:`Solucao.get_csv_header` com o prefixo 'solucao_'. Os tempos são convertidos para
+    segundos, os booleanos para 0/1 e os valores nulos para 'NaN'.
+
+    As linhas das Execuções são gravadas à medida que são extraídas. Como as Soluções são extraídas depois de todas as
+    Execuções, suas colunas são preenchidas no fechamento, com o arquivo 'X.npy' mapeado em memória e percorrido em
+    blocos, sem nunca carregar a matriz inteira.
+    """
+
+    # diretório dos arquivos de saída
+    __output_dir = os.getcwd() + '/features'
+    # quantidade de linhas mantidas em memória antes de serem gravadas em disco
+    __batch_size = 65536
+    # colunas das Execuções gravadas como rótulos, e não como atributos
+    __labels = ['acertou', 'nota_final']
+    # colunas (posição em 'as_row') das Execuções e das Soluções que formam a matriz
+    __execucao_columns = []
+    __solucao_columns = []
+    __streams = None
+    __rows = []
+    # métricas de cada Solução (código do Exercício -> valores), preenchidas no fechamento
+    __solucoes = {}
+
+    @staticmethod
+    def __numeric(coluna: str) -> bool:
+        return ColumnarParser.column_type(coluna) in ('int', 'float', 'bool', 'duration')
+
+    @staticmethod
+    def create_output_dir(incremental: bool = False) -> bool:
+        """
+        Cria (ou recria) o diretório da matriz de atributos.
+
+        :param incremental: Ignorado, a matriz é sempre gravada por completo.
+        :return: 'False', as saídas anteriores nunca são mantidas.
+        """
+        FeatureMatrixParser.close()
+        global numpy
+        try:
+            import numpy
+        except ImportError:
+            Logger.error('A matriz de atributos requer o módulo numpy')
+            return False
+        try:
+            if os.path.exists(FeatureMatrixParser.__output_dir):
+                shutil.rmtree(FeatureMatrixParser.__output_dir)
+            os.mkdir(FeatureMatrixParser.__output_dir)
+        except OSError:
+            Logger.error('Erro ao criar diretório da matriz de atributos!')
+            return False
+
+        header = Execucao.get_csv_header()
+        FeatureMatrixParser.__execucao_columns = [
+            i for i, coluna in enumerate(header)
+            if FeatureMatrixParser.__numeric(coluna) and coluna not in FeatureMatrixParser.__labels]
+        # o código da Solução é o próprio código do Exercício, já presente entre as colunas das Execuções
+        solucao_header = Solucao.get_csv_header()
+        FeatureMatrixParser.__solucao_columns = [
+            i for i, coluna in enumerate(solucao_header)
+            if coluna != 'codigo' and FeatureMatrixParser.__numeric(coluna)]
+        colunas = ([header[i] for i in FeatureMatrixParser.__execucao_columns]
+                   + [f'solucao_{solucao_header[i]}' for i in FeatureMatrixParser.__solucao_columns])
+
+        path = FeatureMatrixParser.__output_dir
+        FeatureMatrixParser.__streams = {'X': NpyStream(f'{path}/X.npy', '<f4', len(colunas))}
+        for label in FeatureMatrixParser.__labels:
+            FeatureMatrixParser.__streams[label] = NpyStream(f'{path}/y_{label}.npy', '<f4')
+        FeatureMatrixParser.__rows = []
+        FeatureMatrixParser.__solucoes = {}
+        with open(f'{path}/schema.json', 'w') as f:
+            json.dump({'features': colunas, 'labels': FeatureMatrixParser.__labels}, f, indent=2)
+        Logger.info('Matriz de atributos: %s/X.npy (%s colunas)', path, len(colunas))
+        return False
+
+    @staticmethod
+    def __float(valor):
+        if valor is None:
+            return float('nan')
+        if isinstance(valor, timedelta):
+            return valor.total_seconds()
+        return float(valor)
+
+    @staticmethod
+    def __flush():
+        rows = FeatureMatrixParser.__rows
+        if not rows:
+            return
+        FeatureMatrixParser.__rows = []
+        array = numpy.array(rows, dtype='<f4')
+        n_features = FeatureMatrixParser.__streams['X'].columns
+        # as colunas das Soluções são reservadas com 'NaN' e preenchidas no fechamento
+        matrix = numpy.full((len(rows), n_features), numpy.nan, dtype='<f4')
+        n_execucao = len(FeatureMatrixParser.__execucao_columns)
+        matrix[:, :n_execucao] = array[:, :n_execucao]
+        FeatureMatrixParser.__streams['X'].append(matrix)
+        for i, label in enumerate(FeatureMatrixParser.__labels):
+            FeatureMatrixParser.__streams[label].append(array[:, n_execucao + i])
+
+    @staticmethod
+    @Profiler.timed('features.close')
+    def close():
+        """Grava as linhas pendentes, preenche as colunas das Soluções e fecha os arquivos da matriz."""
+        streams = FeatureMatrixParser.__streams
+        if streams is None:
+            return
+        try:
+            FeatureMatrixParser.__flush()
+        finally:
+            FeatureMatrixParser.__streams = None
+            for stream in streams.values():
+                stream.close()
+        if streams['X'].count and FeatureMatrixParser.__solucoes:
+            FeatureMatrixParser.__join_solucoes(streams['X'].path)
+
+    @staticmethod
+    def __join_solucoes(path: str):
+        """Preenche as colunas das Soluções em 'X.npy', pelo código do Exercício de cada linha."""
+        solucoes = sorted(FeatureMatrixParser.__solucoes.items())
+        codigos = numpy.array([codigo for codigo, _ in solucoes], dtype='<f8')
+        valores = numpy.array([metricas for _, metricas in solucoes], dtype='<f4')
+        exercicio = Execucao.get_csv_header().index('exercicio')
+        coluna_exercicio = FeatureMatrixParser.__execucao_columns.index(exercicio)
+        inicio = len(FeatureMatrixParser.__execucao_columns)
+        matrix = numpy.lib.format.open_memmap(path, mode='r+')
+        for i in range(0, len(matrix), FeatureMatrixParser.__batch_size):
+            bloco = matrix[i:i + FeatureMatrixParser.__batch_size]
+            exercicios = bloco[:, coluna_exercicio].astype('<f8')
+            posicoes = numpy.searchsorted(codigos, exercicios).clip(max=len(codigos) - 1)
+            encontrados = codigos[posicoes] == exercicios
+            bloco[encontrados, inicio:] = valores[posicoes[encontrados]]
+        matrix.flush()
+        del matrix
+
+    @staticmethod
+    @Profiler.timed('features.salvar_execucoes', list_arg=0)
+    def salvar_execucoes(execucoes: List[Execucao]):
+        """Acrescenta uma linha à matriz de atributos (e aos rótulos) para cada :class:`Execucao`."""
+        if FeatureMatrixParser.__streams is None:
+            return
+        to_float = FeatureMatrixParser.__float
+        colunas = FeatureMatrixParser.__execucao_columns
+        header = Execucao.get_csv_header()
+        labels = [header.index(label) for label in FeatureMatrixParser.__labels]
+        for execucao in execucoes:
+            row = execucao.as_row()
+            FeatureMatrixParser.__rows.append([to_float(row[i]) for i in colunas] + [to_float(row[i]) for i in labels])
+        if len(FeatureMatrixParser.__rows) >= FeatureMatrixParser.__batch_size:
+            FeatureMatrixParser.__flush()
+
+    @staticmethod
+    def salvar_solucoes(solucoes: List[Solucao]):
+        """Mantém as métricas das Soluções, unidas às linhas das Execuções no fechamento."""
+        to_float = FeatureMatrixParser.__float
+        for solucao in solucoes:
+            row = solucao.as_row()
+            FeatureMatrixParser.__solucoes[solucao.codigo] = [to_float(row[i])
+                                                              for i in FeatureMatrixParser.__solucao_columns]
+
+    @staticmethod
+    def salvar_periodos(periodos: List[Periodo]):
+        pass
+
+    @staticmethod
+    def salvar_turmas(turmas: List[Turma]):
+        pass
+
+    @staticmethod
+    def salvar_atividades(atividades: List[Atividade]):
+        pass
+
+    @staticmethod
+    def salvar_estudantes(estudantes: List[Estudante]):
+        pass
+
+    @staticmethod
+    def salvar_erros(erros: List[Erro]):
+        pass
+
+    @staticmethod
+    def salvar_tentativas(tentativas: List[Tentativa]):
+        pass
+
+    @staticmethod
+    def salvar_exercicios(exercicios: List[Exercicio]):
+        pass
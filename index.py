@@ -0,0 +1,317 @@
+import os
+import sqlite3
+import stat
+from typing import List
+
+from util import Logger
+
+
+class IndexEntry:
+    """
+    Entrada (arquivo ou pasta) do :class:`DatasetIndex`, ou de um dataset compactado (ver :class:`DatasetSource`).
+
+    Possui a mesma interface usada pela extração das entradas retornadas por 'os.scandir' ('name', 'path', 'is_file',
+    'is_dir' e 'stat'), de modo que ambas podem ser usadas indistintamente.
+    """
+
+    __slots__ = ('name', 'path', 'diretorio', 'st_size', 'st_mtime_ns')
+
+    def __init__(self, name: str, path: str, diretorio: bool, st_size: int, st_mtime_ns: int):
+        self.name = name
+        self.path = path
+        self.diretorio = diretorio
+        self.st_size = st_size
+        self.st_mtime_ns = st_mtime_ns
+
+    def is_dir(self) -> bool:
+        return self.diretorio
+
+    def is_file(self) -> bool:
+        return not self.diretorio
+
+    def stat(self):
+        # o tamanho e a data de modificação são os registrados no índice
+        return self
+
+
+class DatasetIndex:
+    """
+    Índice persistente (SQLite) dos arquivos e pastas do dataset Codebench.
+
+    A extração percorre o dataset com 'os.scandir' em todos os níveis e verifica, para cada arquivo de execuções, se
+    existem os arquivos correspondentes do CodeMirror e do código-fonte, o que resulta em milhões de chamadas ao sistema
+    de arquivos. O índice registra numa única passagem cada entrada do dataset com seu tipo, os códigos do Período,
+    Turma, Estudante, Atividade e Exercício a que pertence, tamanho e data de modificação; a extração (inclusive nos
+    processos do pool) consulta então o índice em vez do sistema de arquivos.
+
+    O índice é reaproveitado entre extrações: as pastas cuja data de modificação mudou (arquivos criados, removidos ou
+    renomeados) são indexadas novamente. Um arquivo alterado sem que sua pasta mude só é detectado na reindexação
+    completa (ver :meth:`configure`).
+
+    Exemplo de uso:
+        DatasetIndex.configure('cb_dataset_v1.11/')
+
+        for entry in DatasetIndex.scandir(f'{turma.path}/assessments'):
+            ...
+        if 'user.data' in DatasetIndex.names(estudante.path):
+            ...
+
+    Enquanto o índice não é configurado, ou para caminhos fora do dataset, as consultas são feitas diretamente no
+    sistema de arquivos.
+    """
+
+    # caminho do banco de dados do índice, ao lado do cache de métricas
+    __path = os.getcwd() + '/cache/dataset.db'
+    # caminho absoluto do diretório do dataset indexado
+    __root = None
+    __conn = None
+    __pid = None
+    # pastas dos Estudantes e o tipo dos arquivos de cada uma
+    __estudante_folders = {'executions': 'execucoes', 'codemirror': 'codemirror', 'codes': 'codigo'}
+
+    @staticmethod
+    def configure(root: str, path: str = None, rebuild: bool = False):
+        """
+        Habilita o índice do dataset, criando-o ou atualizando as pastas modificadas desde a extração anterior.
+
+        :param root: Caminho do diretório do dataset Codebench.
+        :type root: str
+        :param path: Caminho do arquivo SQLite do índice (padrão: 'cache/dataset.db').
+        :type path: str
+        :param rebuild: Indica se todo o dataset deve ser indexado novamente, detectando também os arquivos alterados.
+        :type rebuild: bool
+        """
+        if path:
+            DatasetIndex.__path = path
+        os.makedirs(os.path.dirname(DatasetIndex.__path), exist_ok=True)
+        DatasetIndex.__root = None
+        root = os.path.abspath(root)
+        conn = DatasetIndex.__connection()
+        with conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS info (nome TEXT PRIMARY KEY, valor TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS pastas (caminho TEXT PRIMARY KEY, mtime INTEGER)')
+            conn.execute('CREATE TABLE IF NOT EXISTS arquivos (pasta TEXT, nome TEXT, tipo TEXT, diretorio INTEGER, '
+                         'periodo TEXT, turma INTEGER, estudante INTEGER, atividade INTEGER, exercicio INTEGER, '
+                         'tamanho INTEGER, mtime INTEGER, PRIMARY KEY (pasta, nome))')
+            row = conn.execute("SELECT valor FROM info WHERE nome = 'root'").fetchone()
+            if rebuild or not row or row[0] != root:
+                Logger.info('Indexando o dataset: %s', root)
+                conn.execute('DELETE FROM pastas')
+                conn.execute('DELETE FROM arquivos')
+                conn.execute("INSERT OR REPLACE INTO info VALUES ('root', ?)", (root,))
+                DatasetIndex.__scan(conn, root, '')
+            else:
+                DatasetIndex.__update(conn, root)
+            total = conn.execute('SELECT COUNT(*) FROM arquivos').fetchone()[0]
+        Logger.info('Índice do dataset: %s entradas', total)
+        DatasetIndex.__root = root
+
+    @staticmethod
+    def attach(root: str, path: str = None):
+        """
+        Habilita o índice do dataset já criado (ou atualizado) por :meth:`configure` em outro processo, sem indexar
+        novamente o dataset.
+
+        :param root: Caminho do diretório do dataset Codebench.
+        :type root: str
+        :param path: Caminho do arquivo SQLite do índice (padrão: 'cache/dataset.db').
+        :type path: str
+        """
+        if path:
+            DatasetIndex.__path = path
+        DatasetIndex.__root = os.path.abspath(root)
+
+    @staticmethod
+    def __connection() -> sqlite3.Connection:
+        # conexões SQLite não podem ser compartilhadas entre processos, cada 'worker' abre a sua
+        if DatasetIndex.__pid != os.getpid():
+            DatasetIndex.__pid = os.getpid()
+            DatasetIndex.__conn = sqlite3.connect(DatasetIndex.__path, timeout=60)
+            DatasetIndex.__conn.execute('PRAGMA journal_mode=WAL')
+            DatasetIndex.__conn.execute('PRAGMA synchronous=NORMAL')
+        return DatasetIndex.__conn
+
+    @staticmethod
+    def __scan(conn: sqlite3.Connection, root: str, caminho: str):
+        """
+        Indexa uma pasta do dataset e todas as suas subpastas.
+
+        :param conn: Conexão com o banco do índice.
+        :param root: Caminho absoluto do diretório do dataset.
+        :param caminho: Caminho da pasta, relativo ao diretório do dataset ('' para o próprio diretório).
+        """
+        pendentes = [caminho]
+        while pendentes:
+            caminho = pendentes.pop()
+            full_path = f'{root}/{caminho}' if caminho else root
+            # a data de modificação é obtida antes da listagem, uma alteração durante a listagem é detectada depois
+            mtime = os.stat(full_path).st_mtime_ns
+            rows = []
+            with os.scandir(full_path) as entries:
+                for entry in entries:
+                    diretorio = entry.is_dir()
+                    st = entry.stat()
+                    relativo = f'{caminho}/{entry.name}' if caminho else entry.name
+                    rows.append((caminho, entry.name, diretorio, st.st_size, st.st_mtime_ns,
+                                 *DatasetIndex.__classify(relativo, diretorio)))
+                    if diretorio:
+                        pendentes.append(relativo)
+            conn.execute('INSERT OR REPLACE INTO pastas VALUES (?, ?)', (caminho, mtime))
+            conn.executemany('INSERT INTO arquivos (pasta, nome, diretorio, tamanho, mtime, tipo, periodo, turma, '
+                             'estudante, atividade, exercicio) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    @staticmethod
+    def __update(conn: sqlite3.Connection, root: str):
+        """
+        Indexa novamente as pastas criadas, removidas ou modificadas desde a indexação anterior.
+
+        Uma pasta modificada é removida do índice e indexada novamente, com todas as suas subpastas.
+
+        :param conn: Conexão com o banco do índice.
+        :param root: Caminho absoluto do diretório do dataset.
+        """
+        atualizadas = set()
+        for caminho, mtime in conn.execute('SELECT caminho, mtime FROM pastas ORDER BY caminho').fetchall():
+            # as subpastas de uma pasta indexada novamente já estão atualizadas
+            pai = caminho
+            while pai and pai not in atualizadas:
+                pai = pai.rpartition('/')[0]
+            if pai in atualizadas:
+                continue
+            try:
+                atual = os.stat(f'{root}/{caminho}' if caminho else root).st_mtime_ns
+            except OSError:
+                atual = None
+            if atual == mtime:
+                continue
+            Logger.info('Indexando novamente a pasta do dataset: %s', caminho or root)
+            atualizadas.add(caminho)
+            if caminho:
+                # '0' é o caractere seguinte a '/', o intervalo contém exatamente as subpastas da pasta
+                intervalo = (caminho, f'{caminho}/', f'{caminho}0')
+                conn.execute('DELETE FROM pastas WHERE caminho = ? OR (caminho >= ? AND caminho < ?)', intervalo)
+                conn.execute('DELETE FROM arquivos WHERE pasta = ? OR (pasta >= ? AND pasta < ?)', intervalo)
+            else:
+                conn.execute('DELETE FROM pastas')
+                conn.execute('DELETE FROM arquivos')
+            if atual is not None:
+                DatasetIndex.__scan(conn, root, caminho)
+
+    @staticmethod
+    def __classify(caminho: str, diretorio: bool) -> tuple:
+        """
+        Classifica uma entrada do dataset a partir do seu caminho relativo, no formato:
+            <dataset>/<periodo>/<turma>/assessments/<atividade>.data
+            <dataset>/<periodo>/<turma>/users/<estudante>/user.data
+            <dataset>/<periodo>/<turma>/users/<estudante>/{executions,codemirror,codes}/<atividade>_<exercicio>.*
+
+        :return: Tupla (tipo, periodo, turma, estudante, atividade, exercicio), códigos ausentes são 'None'.
+        """
+        partes = caminho.split('/')
+        tipo = 'pasta' if diretorio else 'arquivo'
+        periodo = partes[1] if len(partes) > 1 else None
+        turma = DatasetIndex.__int(partes[2]) if len(partes) > 2 else None
+        estudante = atividade = exercicio = None
+        if len(partes) == 2 and diretorio:
+            tipo = 'periodo'
+        elif len(partes) == 3 and diretorio:
+            tipo = 'turma'
+        elif len(partes) == 5 and partes[3] == 'assessments' and not diretorio and partes[4].endswith('.data'):
+            tipo = 'atividade'
+            atividade = DatasetIndex.__int(partes[4][:-5])
+        elif len(partes) >= 5 and partes[3] == 'users':
+            estudante = DatasetIndex.__int(partes[4])
+            if len(partes) == 5 and diretorio:
+                tipo = 'estudante'
+            elif len(partes) == 6 and partes[5] == 'user.data':
+                tipo = 'usuario'
+            elif len(partes) == 7 and partes[5] in DatasetIndex.__estudante_folders and not diretorio:
+                tipo = DatasetIndex.__estudante_folders[partes[5]]
+                codigos = partes[6].rpartition('.')[0].split('_')
+                atividade = DatasetIndex.__int(codigos[0])
+                exercicio = DatasetIndex.__int(codigos[1]) if len(codigos) > 1 else None
+        return tipo, periodo, turma, estudante, atividade, exercicio
+
+    @staticmethod
+    def __int(texto: str):
+        try:
+            return int(texto)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def __relative(path: str):
+        """Retorna o caminho relativo ao diretório do dataset, ou 'None' se o índice não puder responder por ele."""
+        root = DatasetIndex.__root
+        if root is None:
+            return None
+        path = os.path.normpath(path)
+        if path == root:
+            return ''
+        if path.startswith(root) and path[len(root)] == '/':
+            return path[len(root) + 1:]
+        return None
+
+    @staticmethod
+    def scandir(path: str) -> List:
+        """
+        Lista as entradas (arquivos e pastas) de uma pasta, na mesma ordem em que foram listadas por 'os.scandir'.
+
+        :param path: Caminho da pasta.
+        :type path: str
+        :return: Lista de :class:`IndexEntry` (ou de 'os.DirEntry', para caminhos fora do índice).
+        :raises FileNotFoundError: Caso a pasta não exista.
+        """
+        caminho = DatasetIndex.__relative(path)
+        if caminho is None:
+            with os.scandir(path) as entries:
+                return list(entries)
+        conn = DatasetIndex.__connection()
+        rows = conn.execute('SELECT nome, diretorio, tamanho, mtime FROM arquivos WHERE pasta = ? ORDER BY rowid',
+                            (caminho,)).fetchall()
+        if not rows and not conn.execute('SELECT 1 FROM pastas WHERE caminho = ?', (caminho,)).fetchone():
+            raise FileNotFoundError(f'Pasta não encontrada no índice do dataset: {path}')
+        path = f'{DatasetIndex.__root}/{caminho}' if caminho else DatasetIndex.__root
+        return [IndexEntry(nome, f'{path}/{nome}', bool(diretorio), tamanho, mtime)
+                for nome, diretorio, tamanho, mtime in rows]
+
+    @staticmethod
+    def names(path: str) -> set:
+        """
+        Retorna os nomes das entradas de uma pasta, substituindo as verificações 'os.path.exists' de cada arquivo.
+
+        :param path: Caminho da pasta.
+        :type path: str
+        :return: Conjunto com os nomes das entradas da pasta, vazio caso a pasta não exista.
+        """
+        caminho = DatasetIndex.__relative(path)
+        if caminho is None:
+            try:
+                return set(os.listdir(path))
+            except OSError:
+                return set()
+        rows = DatasetIndex.__connection().execute('SELECT nome FROM arquivos WHERE pasta = ?', (caminho,))
+        return {nome for nome, in rows}
+
+    @staticmethod
+    def stat(path: str):
+        """
+        Retorna a entrada de um arquivo ou pasta.
+
+        :param path: Caminho do arquivo ou pasta.
+        :type path: str
+        :return: :class:`IndexEntry` ou 'None', caso o arquivo (ou pasta) não exista.
+        """
+        caminho = DatasetIndex.__relative(path)
+        if not caminho:
+            try:
+                st = os.stat(path)
+            except OSError:
+                return None
+            return IndexEntry(os.path.basename(path), path, stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns)
+        pasta, _, nome = caminho.rpartition('/')
+        row = DatasetIndex.__connection().execute(
+            'SELECT diretorio, tamanho, mtime FROM arquivos WHERE pasta = ? AND nome = ?', (pasta, nome)).fetchone()
+        if row is None:
+            return None
+        return IndexEntry(nome, f'{DatasetIndex.__root}/{caminho}', bool(row[0]), row[1], row[2])
@@ -0,0 +1,168 @@
+import json
+import os
+
+from model import *
+from parser import CSVParser
+from util import Logger
+
+
+class Journal:
+    """
+    Diário (journal) da extração, que permite retomar uma extração interrompida (ver '--resume') sem recomeçá-la.
+
+    A cada 'interval' Estudantes concluídos (com suas Execuções e Erros salvos), as linhas pendentes dos arquivos
+    '.csv' são gravadas e um ponto de controle (checkpoint) é acrescentado ao arquivo '.journal': a quantidade de
+    Períodos, Turmas e Estudantes já salvos e o tamanho (em bytes) de cada arquivo '.csv' naquele momento.
+
+    Ao retomar a extração, cada arquivo '.csv' é truncado no tamanho registrado no último ponto de controle, descartando
+    as linhas gravadas parcialmente, e os Períodos, Turmas e Estudantes já salvos são percorridos sem serem salvos
+    novamente. Um ponto de controle gravado parcialmente (a última linha do diário) é ignorado.
+
+    Exemplo de uso:
+        Journal.configure(output_dir, interval=100)
+        if not Journal.resume():
+            Journal.start()
+
+        for estudante in estudantes:
+            if Journal.skip(estudante):
+                continue
+            ...
+            Journal.done(estudante)
+        Journal.finish()
+    """
+
+    __path = None
+    __file = None
+    # quantidade de Estudantes concluídos entre dois pontos de controle
+    __interval = 100
+    # quantidade de unidades (por tipo) percorridas, salvas e salvas até o ponto de controle retomado
+    __visited = {}
+    __saved = {}
+    __resumed = {}
+    # indica que o ponto de controle retomado é o da extração concluída
+    __finished = False
+
+    @staticmethod
+    def configure(output_dir: str, interval: int = 100):
+        """
+        Habilita o diário da extração.
+
+        :param output_dir: Diretório dos arquivos '.csv', onde o diário é gravado.
+        :type output_dir: str
+        :param interval: Quantidade de Estudantes concluídos entre dois pontos de controle.
+        :type interval: int
+        """
+        Journal.__path = f'{output_dir}/.journal'
+        Journal.__interval = max(1, interval)
+        Journal.__visited = {}
+        Journal.__saved = {}
+        Journal.__resumed = {}
+        Journal.__finished = False
+
+    @staticmethod
+    def start():
+        """Inicia um novo diário, ao início de uma extração completa."""
+        if Journal.__path is None:
+            return
+        Journal.__file = open(Journal.__path, 'w')
+
+    @staticmethod
+    def resume() -> bool:
+        """
+        Retoma a extração a partir do último ponto de controle do diário, truncando os arquivos '.csv'.
+
+        :return: 'True' se a extração foi retomada, ou 'False' se ela deve ser recomeçada (não há diário ou ponto de
+                 controle válido).
+        """
+        if Journal.__path is None or not os.path.exists(Journal.__path):
+            Logger.warn('Não há extração a ser retomada, o dataset será extraído por completo')
+            return False
+        checkpoint, tamanho = None, 0
+        with open(Journal.__path, 'rb') as f:
+            for line in f:
+                try:
+                    checkpoint = json.loads(line)
+                except ValueError:
+                    # ponto de controle gravado parcialmente
+                    break
+                tamanho += len(line)
+        if checkpoint is None:
+            Logger.warn('Diário sem pontos de controle, o dataset será extraído por completo: %s', Journal.__path)
+            return False
+
+        output_dir = os.path.dirname(Journal.__path)
+        offsets = checkpoint['offsets']
+        for nome, offset in offsets.items():
+            path = f'{output_dir}/{nome}'
+            if not os.path.exists(path) or os.path.getsize(path) < offset:
+                Logger.warn('Arquivo menor que o registrado no diário, o dataset será extraído por completo: %s', path)
+                return False
+        for nome, offset in offsets.items():
+            Logger.info('Retomando a extração, truncando o arquivo em %s bytes: %s', offset, nome)
+            os.truncate(f'{output_dir}/{nome}', offset)
+        os.truncate(Journal.__path, tamanho)
+
+        Journal.__resumed = dict(checkpoint['unidades'])
+        Journal.__saved = dict(checkpoint['unidades'])
+        Journal.__finished = checkpoint['concluida']
+        Journal.__file = open(Journal.__path, 'a')
+        Logger.info('Extração retomada: %s', ', '.join(f'{n} {tipo}' for tipo, n in Journal.__resumed.items()))
+        return True
+
+    @staticmethod
+    def is_finished() -> bool:
+        """Verifica se a extração retomada já havia sido concluída."""
+        return Journal.__finished
+
+    @staticmethod
+    def skip(unidade) -> bool:
+        """
+        Verifica se um Período, Turma ou Estudante já foi salvo antes do ponto de controle retomado.
+
+        Deve ser chamado uma única vez para cada unidade, na ordem em que são extraídas.
+
+        :param unidade: O Período, Turma ou Estudante.
+        :return: 'True' se a unidade não deve ser salva novamente.
+        """
+        if Journal.__file is None:
+            return False
+        tipo = type(unidade).__name__
+        posicao = Journal.__visited.get(tipo, 0)
+        Journal.__visited[tipo] = posicao + 1
+        return posicao < Journal.__resumed.get(tipo, 0)
+
+    @staticmethod
+    def done(unidade):
+        """
+        Registra um Período, Turma ou Estudante salvo, gravando um ponto de controle a cada 'interval' Estudantes.
+
+        :param unidade: O Período, Turma ou Estudante, cujas linhas já foram salvas.
+        """
+        if Journal.__file is None:
+            return
+        tipo = type(unidade).__name__
+        Journal.__saved[tipo] = Journal.__saved.get(tipo, 0) + 1
+        if isinstance(unidade, Estudante) and Journal.__saved[tipo] % Journal.__interval == 0:
+            Journal.__checkpoint(False)
+
+    @staticmethod
+    def __checkpoint(concluida: bool):
+        # as linhas pendentes são gravadas, de modo que os tamanhos dos arquivos correspondam às unidades salvas
+        CSVParser.flush()
+        output_dir = os.path.dirname(Journal.__path)
+        offsets = {nome: os.path.getsize(f'{output_dir}/{nome}')
+                   for nome in sorted(os.listdir(output_dir)) if nome.endswith('.csv')}
+        Journal.__file.write(json.dumps({'unidades': Journal.__saved, 'offsets': offsets, 'concluida': concluida},
+                                        separators=(',', ':')) + '\n')
+        Journal.__file.flush()
+
+    @staticmethod
+    def finish():
+        """Grava o ponto de controle da extração concluída e fecha o diário."""
+        if Journal.__file is None:
+            return
+        try:
+            Journal.__checkpoint(True)
+        finally:
+            Journal.__file.close()
+            Journal.__file = None
@@ -0,0 +1,107 @@
+import json
+import os
+
+from model import *
+from source import DatasetSource
+from util import Logger
+
+
+class Manifest:
+    """
+    Manifesto dos arquivos de entrada consumidos por cada :class:`Turma` e :class:`Estudante`, usado na extração
+    incremental.
+
+    Para cada Turma são registrados os arquivos de Atividades ('assessments/*.data') e para cada Estudante os arquivos
+    'user.data', 'executions/*.log', 'codemirror/*.log' e 'codes/*.py', com seus tamanhos e datas de modificação.
+    Um Estudante só precisa ter suas Execuções extraídas novamente se algum desses arquivos (ou da sua Turma, cujas
+    Atividades definem os intervalos de tempo das Execuções) tiver sido criado, removido ou alterado.
+
+    Exemplo de uso:
+        Manifest.load()
+
+        for estudante in turma.estudantes:
+            if Manifest.is_unchanged(estudante):
+                ...
+        Manifest.save()
+    """
+
+    # o manifesto é salvo junto com os arquivos de saída '.csv' que ele descreve
+    __path = os.getcwd() + '/csv/.manifest.json'
+    # arquivos consumidos por cada unidade (Turma/Estudante) na extração anterior e na extração atual
+    __entries = {}
+    __updated = {}
+
+    @staticmethod
+    def set_output_dir(path: str):
+        """Altera o diretório dos arquivos '.csv' descritos pelo manifesto (ex: o diretório de uma partição)."""
+        Manifest.__path = f'{path}/.manifest.json'
+
+    @staticmethod
+    def load():
+        """
+        Carrega o manifesto da extração anterior.
+
+        O arquivo é removido logo após a leitura, pois deixa de descrever as saídas assim que elas começam a ser
+        regravadas. Caso a extração seja interrompida, a próxima extração incremental reprocessa todo o dataset.
+        """
+        Manifest.__entries = {}
+        if os.path.exists(Manifest.__path):
+            try:
+                with open(Manifest.__path, 'r') as f:
+                    Manifest.__entries = json.load(f)
+            except (OSError, ValueError):
+                Logger.warn('Manifesto inválido, o dataset será extraído por completo: %s', Manifest.__path)
+            os.remove(Manifest.__path)
+
+    @staticmethod
+    def save():
+        """Salva o manifesto da extração atual."""
+        with open(Manifest.__path, 'w') as f:
+            json.dump(Manifest.__updated, f, separators=(',', ':'))
+
+    @staticmethod
+    def __list_inputs(path: str, folders) -> List:
+        """
+        Lista o caminho relativo, tamanho e data de modificação (ns) dos arquivos nas pastas informadas.
+
+        :param path: Caminho absoluto do diretório da unidade (Turma ou Estudante).
+        :param folders: Subpastas (ou arquivos) do diretório consumidos pela extração.
+        :return: Lista [caminho, tamanho, data de modificação] ordenada pelo caminho.
+        """
+        inputs = []
+        for folder in folders:
+            full_path = f'{path}/{folder}'
+            # os tamanhos e datas de modificação são os registrados no índice do dataset (ver 'DatasetSource')
+            st = DatasetSource.stat(full_path)
+            if st is None:
+                continue
+            if st.is_dir():
+                for entry in DatasetSource.scandir(full_path):
+                    if entry.is_file():
+                        st = entry.stat()
+                        inputs.append([f'{folder}/{entry.name}', st.st_size, st.st_mtime_ns])
+            else:
+                inputs.append([folder, st.st_size, st.st_mtime_ns])
+        inputs.sort()
+        return inputs
+
+    @staticmethod
+    def is_unchanged(estudante: Estudante) -> bool:
+        """
+        Registra os arquivos consumidos pelo Estudante (e por sua Turma) e verifica se eles permanecem iguais aos da
+        extração anterior.
+
+        :param estudante: O Estudante a ser verificado.
+        :type estudante: Estudante
+        :return: 'True' se as Execuções do Estudante podem ser reaproveitadas da extração anterior.
+        """
+        turma_key = f'{estudante.periodo.descricao}/{estudante.turma.codigo}'
+        if turma_key not in Manifest.__updated:
+            Manifest.__updated[turma_key] = Manifest.__list_inputs(estudante.turma.path, ['assessments'])
+        estudante_key = f'{turma_key}/{estudante.codigo}'
+        Manifest.__updated[estudante_key] = Manifest.__list_inputs(
+            estudante.path, ['user.data', 'executions', 'codemirror', 'codes'])
+
+        return (turma_key in Manifest.__entries and estudante_key in Manifest.__entries
+                and Manifest.__entries[turma_key] == Manifest.__updated[turma_key]
+                and Manifest.__entries[estudante_key] == Manifest.__updated[estudante_key])
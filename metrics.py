@@ -0,0 +1,178 @@
+import ast
+import io
+import tokenize
+
+from radon.visitors import ComplexityVisitor
+from radon.raw import Module, analyze
+from radon.metrics import h_visit_ast
+
+from model import Metricas
+from profiler import Profiler
+
+
+class MetricsAnalyzer:
+    """
+    Calcula as :class:`Metricas` de um código Python analisando o código-fonte uma única vez.
+
+    O 'radon' faz uma análise completa do código para cada grupo de métricas: 'ComplexityVisitor.from_code' e 'h_visit'
+    compilam a mesma AST e 'analyze' tokeniza separadamente cada linha do código. Aqui a AST é compilada uma única vez e
+    compartilhada pelos visitantes de McCabe e Halstead, e as métricas brutas são obtidas de uma única tokenização do
+    código, reproduzindo as mesmas regras de contagem do 'radon.raw.analyze'.
+    """
+
+    # tokens que não possuem equivalente na tokenização linha a linha do 'radon' (as linhas são analisadas sem indentação)
+    __ignored_tokens = (tokenize.INDENT, tokenize.DEDENT, tokenize.ENDMARKER)
+    # tokens que compõem linhas sem código (linhas em branco e comentários)
+    __blank_tokens = (tokenize.COMMENT, tokenize.NL)
+    # tokens de fim de linha que são desconsiderados na identificação de comentários e docstrings
+    __end_tokens = (tokenize.ENDMARKER, tokenize.NL, tokenize.NEWLINE)
+    # tokens desconsiderados na contagem das linhas lógicas
+    __logical_ignored_tokens = (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE)
+
+    @staticmethod
+    @Profiler.timed('metrics.analyze', text_arg=0)
+    def analyze(codigo: str) -> Metricas:
+        """
+        Recupera as métricas de McCabe, Brutas e de Halstead de um código Python.
+
+        Os valores são idênticos aos obtidos com as funções do 'radon'. As métricas que não puderem ser extraídas do
+        código (ex: código com erros de sintaxe) permanecem com o valor 'None'.
+
+        :param codigo: Código-fonte Python.
+        :type codigo: str
+        :return: As métricas que puderam ser extraídas do código.
+        """
+        metricas = Metricas()
+        try:
+            tree = ast.parse(codigo)
+        except Exception:
+            tree = None
+
+        if tree:
+            try:
+                v = ComplexityVisitor.from_ast(tree)
+                metricas.complexity = v.complexity
+                metricas.n_functions = len(v.functions)
+                metricas.n_classes = len(v.functions)
+            except Exception:
+                pass
+
+        try:
+            # a tokenização única só é usada em códigos válidos, os demais são analisados linha a linha pelo 'radon'
+            a = MetricsAnalyzer.__analyze_raw(codigo) if tree else analyze(codigo)
+            metricas.loc = a.loc
+            metricas.lloc = a.lloc
+            metricas.sloc = a.sloc
+            metricas.blank_lines = a.blank
+            metricas.multilines = a.multi
+            metricas.comments = a.comments
+            metricas.single_comments = a.single_comments
+        except Exception:
+            pass
+
+        if tree:
+            try:
+                h = h_visit_ast(tree)
+                metricas.h1 = h.total.h1
+                metricas.h2 = h.total.h2
+                metricas.N1 = h.total.N1
+                metricas.N2 = h.total.N2
+                metricas.h = h.total.vocabulary
+                metricas.N = h.total.length
+                metricas.calculated_N = h.total.calculated_length
+                metricas.volume = h.total.volume
+                metricas.difficulty = h.total.difficulty
+                metricas.effort = h.total.effort
+                metricas.bugs = h.total.bugs
+                metricas.time = h.total.time
+            except Exception:
+                pass
+
+        return metricas
+
+    @staticmethod
+    def __analyze_raw(codigo: str):
+        """
+        Calcula as métricas brutas (loc, lloc, sloc, comments, multi, blank, single_comments) a partir de uma única
+        tokenização do código.
+
+        O 'radon.raw.analyze' agrupa as linhas do código até que formem uma linha lógica completa; os mesmos grupos são
+        delimitados aqui pelos tokens NEWLINE (e NL, para linhas em branco ou somente com comentários).
+
+        :param codigo: Código-fonte Python sintaticamente válido.
+        :type codigo: str
+        :return: Um 'radon.raw.Module' com as métricas brutas.
+        """
+        lines = [line.strip() for line in codigo.splitlines()]
+        # separadores de linha incomuns ('\f', '\r', ...) são tratados de forma diferente pelo 'splitlines' e
+        # pelo tokenizador, nestes casos a análise é feita pelo próprio 'radon'
+        if len(lines) != len(io.StringIO(codigo).readlines()):
+            return analyze(codigo)
+
+        lloc = comments = single_comments = multi = blank = sloc = 0
+        group = []
+        for token in tokenize.generate_tokens(io.StringIO(codigo).readline):
+            if token.type in MetricsAnalyzer.__ignored_tokens:
+                continue
+            # trechos que o tokenizador não reconhece (ex: identificadores unicode) alteram o agrupamento das linhas
+            if token.type == tokenize.ERRORTOKEN:
+                return analyze(codigo)
+            group.append(token)
+            if token.type == tokenize.NEWLINE or (
+                    token.type == tokenize.NL and all(t.type in MetricsAnalyzer.__blank_tokens for t in group)):
+                parsed_lines = lines[group[0].start[0] - 1:token.start[0]]
+                # o 'radon' tokeniza cada grupo isoladamente, o que sempre produz um ENDMARKER ao final
+                group.append(tokenize.TokenInfo(tokenize.ENDMARKER, '', token.end, token.end, ''))
+
+                comments += sum(1 for t in group if t.type == tokenize.COMMENT)
+                if MetricsAnalyzer.__is_single_token(tokenize.COMMENT, group):
+                    single_comments += 1
+                elif MetricsAnalyzer.__is_single_token(tokenize.STRING, group):
+                    if group[0].start[0] == group[0].end[0]:
+                        single_comments += 1
+                    else:
+                        multi += sum(1 for line in parsed_lines if line)
+                        blank += sum(1 for line in parsed_lines if not line)
+                else:
+                    for line in parsed_lines:
+                        if line:
+                            sloc += 1
+                        else:
+                            blank += 1
+
+                lloc += MetricsAnalyzer.__logical(group)
+                group = []
+
+        loc = sloc + blank + multi + single_comments
+        return Module(loc, lloc, sloc, comments, multi, blank, single_comments)
+
+    @staticmethod
+    def __logical(tokens) -> int:
+        """
+        Conta as linhas lógicas de um grupo de tokens, com as mesmas regras do 'radon.raw' (que não as expõe
+        publicamente): cada trecho separado por ';' é uma linha lógica, ou duas quando possui código após o último ':'
+        (ex: 'if cond: return 0'), e trechos somente com comentários e quebras de linha não são contados.
+
+        :param tokens: Tokens do grupo, terminados por um ENDMARKER.
+        :return: Quantidade de linhas lógicas.
+        """
+        total = 0
+        trechos = [[]]
+        for token in tokens:
+            if token.type == tokenize.OP and token.string == ';':
+                trechos.append([])
+            else:
+                trechos[-1].append(token)
+        for trecho in trechos:
+            trecho = [t for t in trecho if t.type not in MetricsAnalyzer.__logical_ignored_tokens]
+            colons = [i for i, t in enumerate(trecho) if t.type == tokenize.OP and t.string == ':']
+            if colons:
+                # o último token é sempre o ENDMARKER, um ':' no fim do trecho corresponde a uma única linha lógica
+                total += 1 if colons[-1] == len(trecho) - 2 else 2
+            elif any(t.type not in MetricsAnalyzer.__end_tokens for t in trecho):
+                total += 1
+        return total
+
+    @staticmethod
+    def __is_single_token(token_type, tokens):
+        return tokens[0].type == token_type and all(t.type in MetricsAnalyzer.__end_tokens for t in tokens[1:])
@@ -4,6 +4,9 @@ from typing import List
 class CSVEntity:
     """Interface que especifica os métodos de uma Entidade que possa ser salva num arquivo '.csv' (dataset)."""
 
+    # permite que as Entidades declarem seus atributos em '__slots__'
+    __slots__ = ()
+
     def as_row(self) -> List:
         """Retorna valores dos atributos da Entidade numa lista (row), para então serem salvos no dataset."""
         pass
@@ -28,6 +31,12 @@ class Periodo(CSVEntity):
         self.path = path
         self.turmas = []
 
+    def __getstate__(self):
+        # as Turmas não são serializadas (pickle), assim enviar um Estudante para outro processo não copia todo o Período
+        state = self.__dict__.copy()
+        state['turmas'] = []
+        return state
+
     def as_row(self) -> List:
         return [self.descricao]
 
@@ -54,6 +63,12 @@ class Turma(CSVEntity):
         self.atividades = []
         self.estudantes = []
 
+    def __getstate__(self):
+        # os Estudantes não são serializados (pickle), somente as Atividades, necessárias para extrair as Execuções
+        state = self.__dict__.copy()
+        state['estudantes'] = []
+        return state
+
     def as_row(self) -> List:
         return [
             self.periodo.descricao,
@@ -177,8 +192,14 @@ class Execucao(CSVEntity):
         - Métricas de Complexidade de Código (McCabe).
         - Métricas de Software (Halstead).
         - Métricas Brutas de Código.
+
+    Como são criadas milhões de Execuções, os atributos são declarados em '__slots__' (sem um '__dict__' por instância).
     """
 
+    __slots__ = ('periodo', 'turma', 'estudante', 'atividade', 'exercicio', 't_implementacao', 't_interacao',
+                 'n_submissoes', 'n_testes', 'n_erros', 't_execucao', 'nota_final', 'acertou', 'metricas', 'erros',
+                 'tentativas')
+
     def __init__(self, periodo: Periodo, turma: Turma, estudante: Estudante, atividade: Atividade, exercicio_codigo: int):
         """
         Método Construtor.
@@ -203,6 +224,10 @@ class Execucao(CSVEntity):
         self.nota_final = None
         self.acertou = None
         self.metricas = None
+        # os Erros são atribuídos na extração (ver 'Util.count_errors'), uma tupla vazia não aloca uma nova lista
+        self.erros = ()
+        # as Tentativas só são registradas quando habilitadas (ver '--tentativas')
+        self.tentativas = ()
 
     def as_row(self) -> List:
         return [
@@ -218,34 +243,12 @@ class Execucao(CSVEntity):
             self.n_erros,
             self.t_execucao,
             self.nota_final,
-            self.acertou,
-            self.metricas.complexity,
-            self.metricas.n_classes,
-            self.metricas.n_functions,
-            self.metricas.loc,
-            self.metricas.lloc,
-            self.metricas.sloc,
-            self.metricas.single_comments,
-            self.metricas.comments,
-            self.metricas.multilines,
-            self.metricas.blank_lines,
-            self.metricas.h1,
-            self.metricas.h2,
-            self.metricas.N1,
-            self.metricas.N2,
-            self.metricas.h,
-            self.metricas.N,
-            self.metricas.calculated_N,
-            self.metricas.volume,
-            self.metricas.difficulty,
-            self.metricas.effort,
-            self.metricas.bugs,
-            self.metricas.time
-        ]
+            self.acertou
+        ] + self.metricas.as_row()
 
     @staticmethod
     def get_csv_header() -> List[str]:
-        return list(Execucao(None, None, None, None, 0).__dict__)[:-1]+list(Metricas().__dict__)
+        return list(Execucao.__slots__)[:-3] + list(Metricas.__slots__)
 
 
 class Solucao(CSVEntity):
@@ -269,39 +272,69 @@ class Solucao(CSVEntity):
 
     @staticmethod
     def get_csv_header() -> List[str]:
-        return list(Solucao(0).__dict__)[:-1]+list(Metricas().__dict__)
+        return list(Solucao(0).__dict__)[:-1] + list(Metricas.__slots__)
+
+    def as_row(self) -> List:
+        return [self.codigo] + self.metricas.as_row()
+
+
+class Tentativa(CSVEntity):
+    """
+    Entidade que representa uma Tentativa (submissão '== S' ou teste '== T') registrada no 'log' de Execuções de um
+    Exercício, com a nota, o primeiro Tipo de Erro acusado e as métricas do código submetido.
+
+    As Tentativas de uma :class:`Execucao` formam a série temporal da evolução do código do :class:`Estudante` até a
+    submissão correta.
+    """
+
+    __slots__ = ('periodo', 'turma', 'estudante', 'atividade', 'exercicio', 'indice', 'tipo', 'data', 'nota', 'erro',
+                 'metricas')
+
+    def __init__(self, execucao: Execucao, indice: int, tipo: str, data: str):
+        """
+        Método Construtor.
+
+        :param execucao: A Execução (Estudante e Exercício) à qual a Tentativa pertence.
+        :param indice: Posição da Tentativa no 'log' de Execuções, a partir de 1.
+        :param tipo: Tipo da Tentativa, 'submissao' ou 'teste'.
+        :param data: Data e hora da Tentativa, como registrada no 'log' (ex: '2017-03-20 22:00:30.085775').
+        """
+        self.periodo = execucao.periodo
+        self.turma = execucao.turma
+        self.estudante = execucao.estudante
+        self.atividade = execucao.atividade
+        self.exercicio = execucao.exercicio
+        self.indice = indice
+        self.tipo = tipo
+        self.data = data
+        self.nota = None
+        self.erro = None
+        self.metricas = None
 
     def as_row(self) -> List:
         return [
-            self.codigo,
-            self.metricas.complexity,
-            self.metricas.n_classes,
-            self.metricas.n_functions,
-            self.metricas.loc,
-            self.metricas.lloc,
-            self.metricas.sloc,
-            self.metricas.single_comments,
-            self.metricas.comments,
-            self.metricas.multilines,
-            self.metricas.blank_lines,
-            self.metricas.h1,
-            self.metricas.h2,
-            self.metricas.N1,
-            self.metricas.N2,
-            self.metricas.h,
-            self.metricas.N,
-            self.metricas.calculated_N,
-            self.metricas.volume,
-            self.metricas.difficulty,
-            self.metricas.effort,
-            self.metricas.bugs,
-            self.metricas.time
-        ]
+            self.periodo.descricao,
+            self.turma.codigo,
+            self.estudante.codigo,
+            self.atividade.codigo,
+            self.exercicio,
+            self.indice,
+            self.tipo,
+            self.data,
+            self.nota,
+            self.erro
+        ] + (self.metricas or Metricas()).as_row()
+
+    @staticmethod
+    def get_csv_header() -> List[str]:
+        return list(Tentativa.__slots__)[:-1] + list(Metricas.__slots__)
 
 
 class Erro(CSVEntity):
     """Entidade que representa a contagem de Erros de um mesmo Tipo, acusados pelo Interpretador Python, enquanto um :class:`Estudante` tentava resolver um Exercício."""
 
+    __slots__ = ('periodo', 'turma', 'atividade', 'estudante', 'exercicio', 'tipo', 'ocorrencias')
+
     def __init__(self, tipo: str, count: int):
         """
         Método Construtor
@@ -330,32 +363,57 @@ class Erro(CSVEntity):
 
     @staticmethod
     def get_csv_header() -> List[str]:
-        return list(Erro('', 0).__dict__)
+        return list(Erro.__slots__)
+
+
+class Exercicio(CSVEntity):
+    """
+    Entidade que representa as estatísticas de dificuldade de um Exercício, agregadas a partir das :class:`Execucao` de
+    todos os Estudantes que tentaram resolvê-lo (ver :class:`ExerciseStats`).
+
+    Contém, além da quantidade de Execuções e da taxa de acerto, a média, variância, mediana e percentil 90 de:
+        - Quantidade de Submissões.
+        - Quantidade de Erros.
+        - Tempo de Implementação (s).
+        - Tempo de Interação (s).
+    """
+
+    __slots__ = ('codigo', 'n_execucoes', 'taxa_acerto',
+                 'n_submissoes_media', 'n_submissoes_variancia', 'n_submissoes_mediana', 'n_submissoes_p90',
+                 'n_erros_media', 'n_erros_variancia', 'n_erros_mediana', 'n_erros_p90',
+                 't_implementacao_media', 't_implementacao_variancia', 't_implementacao_mediana', 't_implementacao_p90',
+                 't_interacao_media', 't_interacao_variancia', 't_interacao_mediana', 't_interacao_p90')
+
+    def __init__(self, codigo: int):
+        """
+        Método Construtor
+
+        :param codigo: Código numérico único do Exercício.
+        """
+        for nome in Exercicio.__slots__:
+            setattr(self, nome, None)
+        self.codigo = codigo
+
+    def as_row(self) -> List:
+        return [getattr(self, nome) for nome in Exercicio.__slots__]
+
+    @staticmethod
+    def get_csv_header() -> List[str]:
+        return list(Exercicio.__slots__)
 
 
 class Metricas:
     """Classe que representa as métricas de código extraídas usando o módulo 'radon'"""
 
+    # os nomes dos atributos, na ordem das colunas dos arquivos '.csv'
+    __slots__ = ('complexity', 'n_classes', 'n_functions', 'loc', 'lloc', 'sloc', 'single_comments', 'comments',
+                 'multilines', 'blank_lines', 'h1', 'h2', 'N1', 'N2', 'h', 'N', 'calculated_N', 'volume', 'difficulty',
+                 'effort', 'bugs', 'time')
+
     def __init__(self):
-        self.complexity = None
-        self.n_classes = None
-        self.n_functions = None
-        self.loc = None
-        self.lloc = None
-        self.sloc = None
-        self.single_comments = None
-        self.comments = None
-        self.multilines = None
-        self.blank_lines = None
-        self.h1 = None
-        self.h2 = None
-        self.N1 = None
-        self.N2 = None
-        self.h = None
-        self.N = None
-        self.calculated_N = None
-        self.volume = None
-        self.difficulty = None
-        self.effort = None
-        self.bugs = None
-        self.time = None
+        for nome in Metricas.__slots__:
+            setattr(self, nome, None)
+
+    def as_row(self) -> List:
+        """Retorna os valores das métricas numa lista, na ordem de '__slots__'."""
+        return [getattr(self, nome) for nome in Metricas.__slots__]
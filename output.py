@@ -0,0 +1,109 @@
+from columnar import ColumnarParser
+from database import SQLiteParser
+from features import FeatureMatrixParser
+from parser import CSVParser
+from model import *
+
+
+class Output:
+    """
+    Encaminha as entidades extraídas para os backends de saída selecionados.
+
+    Os backends disponíveis são 'csv' (:class:`CSVParser`, padrão), 'columnar' (:class:`ColumnarParser`), 'sqlite'
+    (:class:`SQLiteParser`) e 'features' (:class:`FeatureMatrixParser`), e todos oferecem a mesma interface
+    (create_output_dir, salvar_* e close).
+
+    Exemplo de uso:
+        Output.configure(['csv', 'columnar'])
+        Output.create_output_dir()
+
+        Output.salvar_periodos(periodos)
+        ...
+        Output.close()
+    """
+
+    __available = {
+        'csv': CSVParser,
+        'columnar': ColumnarParser,
+        'sqlite': SQLiteParser,
+        'features': FeatureMatrixParser,
+    }
+    # backends selecionados, na ordem em que foram informados
+    __backends = [CSVParser]
+
+    @staticmethod
+    def backends() -> List[str]:
+        """Retorna os nomes dos backends de saída disponíveis."""
+        return list(Output.__available)
+
+    @staticmethod
+    def configure(backends: List[str]):
+        """
+        Seleciona os backends de saída.
+
+        :param backends: Nomes dos backends (ver :meth:`backends`).
+        :type backends: List[str]
+        """
+        Output.__backends = [Output.__available[nome] for nome in dict.fromkeys(backends)]
+
+    @staticmethod
+    def create_output_dir(incremental: bool = False) -> bool:
+        """
+        Cria (ou recria) os diretórios de saída de todos os backends.
+
+        :param incremental: Indica se as saídas anteriores devem ser mantidas para a extração incremental.
+        :return: 'True' se as saídas da extração anterior foram mantidas por todos os backends.
+        """
+        mantidas = [backend.create_output_dir(incremental) for backend in Output.__backends]
+        return all(mantidas)
+
+    @staticmethod
+    def close():
+        """Grava as linhas pendentes e fecha as saídas de todos os backends."""
+        for backend in Output.__backends:
+            backend.close()
+
+    @staticmethod
+    def salvar_periodos(periodos: List[Periodo]):
+        for backend in Output.__backends:
+            backend.salvar_periodos(periodos)
+
+    @staticmethod
+    def salvar_turmas(turmas: List[Turma]):
+        for backend in Output.__backends:
+            backend.salvar_turmas(turmas)
+
+    @staticmethod
+    def salvar_atividades(atividades: List[Atividade]):
+        for backend in Output.__backends:
+            backend.salvar_atividades(atividades)
+
+    @staticmethod
+    def salvar_estudantes(estudantes: List[Estudante]):
+        for backend in Output.__backends:
+            backend.salvar_estudantes(estudantes)
+
+    @staticmethod
+    def salvar_execucoes(execucoes: List[Execucao]):
+        for backend in Output.__backends:
+            backend.salvar_execucoes(execucoes)
+
+    @staticmethod
+    def salvar_solucoes(solucoes: List[Solucao]):
+        for backend in Output.__backends:
+            backend.salvar_solucoes(solucoes)
+
+    @staticmethod
+    def salvar_erros(erros: List[Erro]):
+        for backend in Output.__backends:
+            backend.salvar_erros(erros)
+
+    @staticmethod
+    def salvar_tentativas(tentativas: List[Tentativa]):
+        for backend in Output.__backends:
+            backend.salvar_tentativas(tentativas)
+
+    @staticmethod
+    def salvar_exercicios(exercicios: List[Exercicio]):
+        for backend in Output.__backends:
+            backend.salvar_exercicios(exercicios)
@@ -3,9 +3,60 @@ import os
 import shutil
 
 from model import *
+from profiler import Profiler
 from util import Logger
 
 
+class CSVSink:
+    """
+    Arquivo de saída '.csv' mantido aberto durante toda a extração.
+
+    As linhas são acumuladas em memória e gravadas em lote, sempre que a quantidade de linhas pendentes atinge o
+    tamanho do lote ('batch_size'), evitando abrir e fechar o arquivo a cada entidade salva.
+    """
+
+    # tamanho do buffer de escrita do arquivo (bytes)
+    __buffering = 1 << 20
+
+    def __init__(self, path: str, batch_size: int):
+        """
+        Método Construtor.
+
+        :param path: Caminho absoluto do arquivo '.csv', aberto no modo 'append'.
+        :param batch_size: Quantidade de linhas mantidas em memória antes de serem gravadas no arquivo.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.rows = []
+        self.file = open(path, 'a', buffering=CSVSink.__buffering)
+        self.writer = csv.writer(self.file)
+
+    def write(self, rows: List[List]):
+        """Acumula as linhas, gravando o lote no arquivo quando ele atinge o tamanho máximo."""
+        self.rows.extend(rows)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def write_raw(self, data: bytes):
+        """Grava bytes já formatados (linhas '.csv' copiadas de outro arquivo) após as linhas pendentes."""
+        self.flush()
+        self.file.flush()
+        self.file.buffer.write(data)
+
+    def flush(self):
+        """Grava as linhas pendentes no arquivo."""
+        if self.rows:
+            self.writer.writerows(self.rows)
+            self.rows = []
+
+    def close(self):
+        """Grava as linhas pendentes e fecha o arquivo."""
+        try:
+            self.flush()
+        finally:
+            self.file.close()
+
+
 class CSVParser:
     """Class Responsável por manipular os arquivos de saída '.csv'"""
 
@@ -18,6 +69,17 @@ class CSVParser:
     __execucoes_csv = f'{__output_dir}/execucoes.csv'
     __solucoes_csv = f'{__output_dir}/solucoes.csv'
     __erros_csv = f'{__output_dir}/erros.csv'
+    __tentativas_csv = f'{__output_dir}/tentativas.csv'
+    __exercicios_csv = f'{__output_dir}/exercicios.csv'
+    # extensão das cópias dos arquivos da extração anterior, mantidas durante a extração incremental
+    __old_extension = '.old'
+    # posições (início, fim) das linhas de cada Estudante nos arquivos da extração anterior
+    __execucoes_index = {}
+    __erros_index = {}
+    # quantidade de linhas mantidas em memória, por arquivo, antes de serem gravadas em disco
+    __batch_size = 1000
+    # arquivos de saída abertos (caminho -> CSVSink)
+    __sinks = {}
 
     @staticmethod
     def __create_csv_file(filename: str, header: List[str]):
@@ -26,14 +88,36 @@ class CSVParser:
             f.write(header)
 
     @staticmethod
-    def create_output_dir():
-        """Cria a pasta e os arquivos de saídas '.csv' (datasets)."""
+    def create_output_dir(incremental: bool = False) -> bool:
+        """
+        Cria a pasta e os arquivos de saídas '.csv' (datasets).
+
+        Na extração incremental o diretório de saída não é apagado: os arquivos de Execuções e Erros da extração
+        anterior são mantidos como cópias ('.old'), das quais são reaproveitadas as linhas dos Estudantes cujos
+        arquivos não foram alterados (ver :meth:`reutilizar_execucoes`).
+
+        :param incremental: Indica se as saídas da extração anterior devem ser mantidas para reaproveitamento.
+        :type incremental: bool
+        :return: 'True' se as saídas da extração anterior foram mantidas.
+        """
+        CSVParser.close()
+        mantidas = False
         try:
-            # se o diretório de saída existir, apaga seu conteúdo
-            if os.path.exists(CSVParser.__output_dir):
+            if incremental and os.path.exists(CSVParser.__execucoes_csv) and os.path.exists(CSVParser.__erros_csv):
+                for path in (CSVParser.__execucoes_csv, CSVParser.__erros_csv):
+                    os.replace(path, path + CSVParser.__old_extension)
+                # execucoes: periodo, turma, estudante, ...
+                CSVParser.__execucoes_index = CSVParser.build_index(
+                    CSVParser.__execucoes_csv + CSVParser.__old_extension, (0, 1, 2))
+                # erros: periodo, turma, atividade, estudante, ...
+                CSVParser.__erros_index = CSVParser.build_index(
+                    CSVParser.__erros_csv + CSVParser.__old_extension, (0, 1, 3))
+                mantidas = True
+            elif os.path.exists(CSVParser.__output_dir):
+                # se o diretório de saída existir, apaga seu conteúdo
                 shutil.rmtree(CSVParser.__output_dir)
             # cria o diretório de saída
-            os.mkdir(CSVParser.__output_dir)
+            os.makedirs(CSVParser.__output_dir, exist_ok=True)
             # cria todos os arquivos de saída '.csv' (datasets)
             CSVParser.__create_csv_file(CSVParser.__periodos_csv, Periodo.get_csv_header())
             CSVParser.__create_csv_file(CSVParser.__turmas_csv, Turma.get_csv_header())
@@ -42,90 +126,247 @@ class CSVParser:
             CSVParser.__create_csv_file(CSVParser.__execucoes_csv, Execucao.get_csv_header())
             CSVParser.__create_csv_file(CSVParser.__solucoes_csv, Solucao.get_csv_header())
             CSVParser.__create_csv_file(CSVParser.__erros_csv, Erro.get_csv_header())
+            CSVParser.__create_csv_file(CSVParser.__tentativas_csv, Tentativa.get_csv_header())
+            CSVParser.__create_csv_file(CSVParser.__exercicios_csv, Exercicio.get_csv_header())
         except OSError:
             Logger.error('Erro ao criar diretório de saída!')
+        return mantidas
+
+    @staticmethod
+    def build_index(path: str, key_columns) -> dict:
+        """
+        Indexa as posições (em bytes) das linhas de cada Estudante num arquivo '.csv' da extração anterior (ou de cada
+        Período, Turma ou Estudante num arquivo de uma partição, ver :class:`Shard`).
+
+        As linhas de um Estudante são sempre salvas em sequência, de modo que cada Estudante corresponde a um ou mais
+        intervalos contíguos do arquivo.
+
+        :param path: Caminho absoluto do arquivo '.csv'.
+        :type path: str
+        :param key_columns: Índices das colunas (ex: período, turma e estudante) que identificam o Estudante.
+        :return: Dicionário com a lista de intervalos (início, fim) de cada Estudante.
+        """
+        index = {}
+        with open(path, 'rb') as f:
+            offset = len(f.readline())
+            last_key = None
+            for line in f:
+                columns = line.rstrip(b'\r\n').split(b',')
+                key = tuple(columns[i].decode() for i in key_columns)
+                if key == last_key:
+                    start, _ = index[key][-1]
+                    index[key][-1] = (start, offset + len(line))
+                else:
+                    index.setdefault(key, []).append((offset, offset + len(line)))
+                    last_key = key
+                offset += len(line)
+        return index
+
+    @staticmethod
+    def __copy_rows(index: dict, key, path: str) -> bytes:
+        ranges = index.get(key, [])
+        copiadas = []
+        if ranges:
+            sink = CSVParser.__sink(path)
+            with open(path + CSVParser.__old_extension, 'rb') as src:
+                for start, end in ranges:
+                    src.seek(start)
+                    copiadas.append(src.read(end - start))
+                    sink.write_raw(copiadas[-1])
+        return b''.join(copiadas)
+
+    @staticmethod
+    @Profiler.timed('csv.reutilizar_execucoes')
+    def reutilizar_execucoes(estudante: Estudante) -> bytes:
+        """
+        Copia as linhas de Execuções e Erros de um :class:`Estudante` dos arquivos da extração anterior.
+
+        :param estudante: O Estudante cujas linhas devem ser copiadas.
+        :type estudante: Estudante
+        :return: As linhas de Execuções copiadas.
+        """
+        Logger.info('Reaproveitando as Execuções da extração anterior: %s', estudante.path)
+        key = (estudante.periodo.descricao, str(estudante.turma.codigo), str(estudante.codigo))
+        execucoes = CSVParser.__copy_rows(CSVParser.__execucoes_index, key, CSVParser.__execucoes_csv)
+        CSVParser.__copy_rows(CSVParser.__erros_index, key, CSVParser.__erros_csv)
+        return execucoes
+
+    @staticmethod
+    def remove_old_files():
+        """Remove as cópias dos arquivos da extração anterior, ao final da extração incremental."""
+        for path in (CSVParser.__execucoes_csv, CSVParser.__erros_csv):
+            if os.path.exists(path + CSVParser.__old_extension):
+                os.remove(path + CSVParser.__old_extension)
+        CSVParser.__execucoes_index = {}
+        CSVParser.__erros_index = {}
 
     @staticmethod
-    def __write_to_csv(entidades: List[CSVEntity], path: str, mode: str):
+    def output_dir() -> str:
+        """Retorna o diretório dos arquivos de saída '.csv'."""
+        return CSVParser.__output_dir
+
+    @staticmethod
+    def set_output_dir(path: str):
+        """
+        Altera o diretório dos arquivos de saída '.csv' (ex: o diretório de uma partição, ver :class:`Shard`).
+
+        :param path: Caminho absoluto do diretório.
+        :type path: str
+        """
+        CSVParser.__output_dir = path
+        CSVParser.__periodos_csv = f'{path}/periodos.csv'
+        CSVParser.__turmas_csv = f'{path}/turmas.csv'
+        CSVParser.__atividades_csv = f'{path}/atividades.csv'
+        CSVParser.__estudantes_csv = f'{path}/estudantes.csv'
+        CSVParser.__execucoes_csv = f'{path}/execucoes.csv'
+        CSVParser.__solucoes_csv = f'{path}/solucoes.csv'
+        CSVParser.__erros_csv = f'{path}/erros.csv'
+        CSVParser.__tentativas_csv = f'{path}/tentativas.csv'
+        CSVParser.__exercicios_csv = f'{path}/exercicios.csv'
+
+    @staticmethod
+    def configure(batch_size: int):
+        """
+        Configura a escrita dos arquivos de saída.
+
+        :param batch_size: Quantidade de linhas mantidas em memória, por arquivo, antes de serem gravadas em disco.
+        :type batch_size: int
+        """
+        CSVParser.__batch_size = max(1, batch_size)
+
+    @staticmethod
+    def __sink(path: str) -> CSVSink:
+        sink = CSVParser.__sinks.get(path)
+        if sink is None:
+            sink = CSVParser.__sinks[path] = CSVSink(path, CSVParser.__batch_size)
+        return sink
+
+    @staticmethod
+    @Profiler.timed('csv.flush')
+    def flush():
+        """Grava as linhas pendentes de todos os arquivos de saída, mantendo-os abertos (ver :class:`Journal`)."""
+        for sink in CSVParser.__sinks.values():
+            sink.flush()
+            sink.file.flush()
+
+    @staticmethod
+    @Profiler.timed('csv.close')
+    def close():
+        """
+        Grava as linhas pendentes e fecha todos os arquivos de saída.
+
+        Deve ser chamado ao final da extração, inclusive quando ela é interrompida por um erro, para que nenhuma linha
+        já extraída seja perdida.
+        """
+        sinks = CSVParser.__sinks
+        CSVParser.__sinks = {}
+        for sink in sinks.values():
+            try:
+                sink.close()
+            except OSError:
+                Logger.error('Erro ao fechar o arquivo de saída: %s', sink.path)
+
+    @staticmethod
+    def __write_to_csv(entidades: List[CSVEntity], path: str):
         """
         Salva uma lista de :class:`CsvEntity` num arquivo no formato CSV.
 
+        As linhas são gravadas em lote pelo :class:`CSVSink` do arquivo, que permanece aberto até :meth:`close`.
+
         :param entidades: Lista de Entidades a serem salvas.
         :type entidades: List[CSVEntity]
         :param path: Caminho absoluto do arquivo '.csv' onde as Entidades devam ser salvas.
         :type path: str
-        :param mode: Modo de abertura do arquivo.
-        :type mode: str
         """
-        Logger.info(f'Salvando entidades no arquivo: {path}')
-        rows = []
-        for entidade in entidades:
-            rows.append(entidade.as_row())
-
-        with open(path, mode) as file:
-            writter = csv.writer(file)
-            writter.writerows(rows)
+        Logger.info('Salvando entidades no arquivo: %s', path)
+        CSVParser.__sink(path).write([entidade.as_row() for entidade in entidades])
 
     @staticmethod
+    @Profiler.timed('csv.salvar_periodos', list_arg=0)
     def salvar_periodos(periodos: List[Periodo]):
         """
         Salva uma lista de :class:`Periodo` no arquivo '.csv' (dataset).
 
         :param periodos: Lista de Períodos a serem salvos.
         """
-        CSVParser.__write_to_csv(periodos, CSVParser.__periodos_csv, 'a')
+        CSVParser.__write_to_csv(periodos, CSVParser.__periodos_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_turmas', list_arg=0)
     def salvar_turmas(turmas: List[Turma]):
         """
         Salva uma lista de :class:`Turma` no arquivo '.csv' (dataset).
 
         :param turmas: Lista de Turmas a serem salvos.
         """
-        CSVParser.__write_to_csv(turmas, CSVParser.__turmas_csv, 'a')
+        CSVParser.__write_to_csv(turmas, CSVParser.__turmas_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_atividades', list_arg=0)
     def salvar_atividades(atividades: List[Atividade]):
         """
         Salva uma lista de :class:`Atividade` no arquivo '.csv' (dataset).
 
         :param atividades: Lista de Atividades a serem salvas.
         """
-        CSVParser.__write_to_csv(atividades, CSVParser.__atividades_csv, 'a')
+        CSVParser.__write_to_csv(atividades, CSVParser.__atividades_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_estudantes', list_arg=0)
     def salvar_estudantes(estudantes: List[Estudante]):
         """
          Salva uma lista de :class:`Estudante` no arquivo '.csv' (dataset).
 
          :param estudantes: Lista de Estudantes a serem salvos.
          """
-        CSVParser.__write_to_csv(estudantes, CSVParser.__estudantes_csv, 'a')
+        CSVParser.__write_to_csv(estudantes, CSVParser.__estudantes_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_execucoes', list_arg=0)
     def salvar_execucoes(execucoes: List[Execucao]):
         """
          Salva uma lista de :class:`Execucao` no arquivo '.csv' (dataset).
 
          :param execucoes: Lista de Execucões a serem salvas.
         """
-        CSVParser.__write_to_csv(execucoes, CSVParser.__execucoes_csv, 'a')
+        CSVParser.__write_to_csv(execucoes, CSVParser.__execucoes_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_solucoes', list_arg=0)
     def salvar_solucoes(solucoes: List[Solucao]):
         """
          Salva uma lista de :class:`Solucao` no arquivo '.csv' (dataset).
 
          :param solucoes: Lista de Solucões a serem salvas.
         """
-        CSVParser.__write_to_csv(solucoes, CSVParser.__solucoes_csv, 'a')
+        CSVParser.__write_to_csv(solucoes, CSVParser.__solucoes_csv)
 
     @staticmethod
+    @Profiler.timed('csv.salvar_erros', list_arg=0)
     def salvar_erros(erros: List[Erro]):
         """
          Salva uma lista de :class:`Erro` no arquivo '.csv' (dataset).
 
          :param erros: Lista de Erros a serem salvos.
         """
-        CSVParser.__write_to_csv(erros, CSVParser.__erros_csv, 'a')
+        CSVParser.__write_to_csv(erros, CSVParser.__erros_csv)
+
+    @staticmethod
+    @Profiler.timed('csv.salvar_tentativas', list_arg=0)
+    def salvar_tentativas(tentativas: List[Tentativa]):
+        """
+         Salva uma lista de :class:`Tentativa` no arquivo '.csv' (dataset).
+
+         :param tentativas: Lista de Tentativas a serem salvas.
+        """
+        CSVParser.__write_to_csv(tentativas, CSVParser.__tentativas_csv)
 
+    @staticmethod
+    @Profiler.timed('csv.salvar_exercicios', list_arg=0)
+    def salvar_exercicios(exercicios: List[Exercicio]):
+        """
+         Salva uma lista de :class:`Exercicio` no arquivo '.csv' (dataset).
+
+         :param exercicios: Lista de Exercícios a serem salvos.
+        """
+        CSVParser.__write_to_csv(exercicios, CSVParser.__exercicios_csv)
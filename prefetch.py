@@ -0,0 +1,145 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from model import *
+
+
+class Prefetcher:
+    """
+    Leitura antecipada (read-ahead) dos arquivos do dataset Codebench.
+
+    O dataset é formado por muitos arquivos pequenos, lidos um a um durante a extração. Em discos lentos ou remotos
+    o extrator passa a maior parte do tempo aguardando cada leitura. O Prefetcher lê, num pool de threads, os arquivos
+    dos próximos Estudantes enquanto o Estudante atual é extraído: os dados lidos são descartados, mas permanecem no
+    cache de páginas do sistema operacional, de onde a extração (em qualquer processo) os lê sem aguardar o disco.
+
+    Exemplo de uso:
+        Prefetcher.configure(depth=4)
+
+        Prefetcher.prefetch_turma(turma)
+        for estudante, reaproveitado in Prefetcher.iterate(pares):
+            ...
+        Prefetcher.close()
+    """
+
+    # pastas de cada Estudante lidas antecipadamente
+    __estudante_folders = ['executions', 'codemirror', 'codes']
+    # tamanho dos blocos lidos de cada arquivo
+    __chunk_size = 1 << 20
+    # quantidade de Estudantes lidos à frente do Estudante em extração
+    __depth = 0
+    __executor = None
+    # leituras das Turmas ainda pendentes
+    __turmas = deque()
+
+    @staticmethod
+    def configure(depth: int, threads: int = 4, codes: bool = True):
+        """
+        Habilita a leitura antecipada.
+
+        :param depth: Quantidade de Estudantes lidos à frente do Estudante em extração (0 desabilita a leitura).
+        :type depth: int
+        :param threads: Quantidade de threads que leem os arquivos.
+        :type threads: int
+        :param codes: Indica se os arquivos de código-fonte ('codes') são lidos, desnecessários sem as métricas.
+        :type codes: bool
+        """
+        Prefetcher.close()
+        Prefetcher.__depth = depth
+        Prefetcher.__turmas = deque()
+        Prefetcher.__estudante_folders = ['executions', 'codemirror'] + (['codes'] if codes else [])
+        if depth > 0:
+            Prefetcher.__executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='prefetch')
+
+    @staticmethod
+    def close():
+        """Cancela as leituras pendentes e encerra o pool de threads."""
+        if Prefetcher.__executor:
+            Prefetcher.__executor.shutdown(wait=True, cancel_futures=True)
+            Prefetcher.__executor = None
+
+    @staticmethod
+    def __read_file(path: str):
+        try:
+            with open(path, 'rb', buffering=0) as f:
+                while f.read(Prefetcher.__chunk_size):
+                    pass
+        except OSError:
+            # a leitura antecipada é apenas uma otimização, os erros são tratados pela própria extração
+            pass
+
+    @staticmethod
+    def __read_folder(path: str):
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    if entry.is_file():
+                        Prefetcher.__read_file(entry.path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def __read_turma(turma: Turma):
+        Prefetcher.__read_folder(f'{turma.path}/assessments')
+        try:
+            with os.scandir(f'{turma.path}/users') as folders:
+                for folder in folders:
+                    Prefetcher.__read_file(f'{folder.path}/user.data')
+        except OSError:
+            pass
+
+    @staticmethod
+    def __read_estudante(estudante: Estudante):
+        for folder in Prefetcher.__estudante_folders:
+            Prefetcher.__read_folder(f'{estudante.path}/{folder}')
+
+    @staticmethod
+    def prefetch_turma(turma: Turma):
+        """
+        Inicia a leitura antecipada dos arquivos de Atividades e dos arquivos 'user.data' dos Estudantes da Turma.
+
+        :param turma: A Turma cujos arquivos devem ser lidos.
+        :type turma: Turma
+        """
+        if not Prefetcher.__executor:
+            return
+        # no máximo 'depth' Turmas aguardam a leitura, as leituras mais antigas ainda não iniciadas são canceladas
+        turmas = Prefetcher.__turmas
+        while turmas and (turmas[0].done() or len(turmas) >= Prefetcher.__depth):
+            turmas.popleft().cancel()
+        turmas.append(Prefetcher.__executor.submit(Prefetcher.__read_turma, turma))
+
+    @staticmethod
+    def iterate(pares) -> Iterator:
+        """
+        Gera os pares (Estudante, reaproveitado) na mesma ordem, iniciando a leitura dos arquivos de cada Estudante
+        assim que ele é obtido, até 'depth' Estudantes à frente do Estudante que está sendo extraído.
+
+        Os arquivos dos Estudantes reaproveitados da extração anterior (ver :class:`Manifest`) não são lidos. A leitura
+        de um Estudante que ainda não foi iniciada quando ele é gerado é cancelada, pois a própria extração já lê seus
+        arquivos: no máximo 'depth' leituras ficam pendentes, e nenhum Estudante é lido depois de extraído.
+
+        :param pares: Pares (Estudante, reaproveitado) a serem extraídos.
+        """
+        if not Prefetcher.__executor:
+            yield from pares
+            return
+        pendentes = deque()
+        for estudante, reaproveitado in pares:
+            future = None
+            if not reaproveitado:
+                future = Prefetcher.__executor.submit(Prefetcher.__read_estudante, estudante)
+            pendentes.append((future, (estudante, reaproveitado)))
+            if len(pendentes) > Prefetcher.__depth:
+                yield Prefetcher.__next(pendentes)
+        while pendentes:
+            yield Prefetcher.__next(pendentes)
+
+    @staticmethod
+    def __next(pendentes: deque):
+        future, par = pendentes.popleft()
+        if future:
+            future.cancel()
+        return par
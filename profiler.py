@@ -0,0 +1,179 @@
+import functools
+import json
+import os
+import time
+
+
+class Profiler:
+    """
+    Instrumentação das etapas da extração: tempo total (wall), tempo de CPU, quantidade de chamadas, de itens (arquivos
+    ou entidades) e de bytes processados por cada etapa.
+
+    As etapas são as funções decoradas com :meth:`timed`. Os tempos são inclusivos, ou seja, o tempo de uma etapa
+    inclui o tempo das etapas chamadas por ela (ex: 'extract_executions_count' inclui parte de 'get_code_metrics'). Com
+    mais de um processo (ver '--workers'), os tempos dos processos são somados e podem exceder o tempo total da extração.
+
+    Exemplo de uso:
+        Profiler.configure()
+
+        @staticmethod
+        @Profiler.timed('extract_executions_count', path_arg=0)
+        def __extract_executions_count(path: str, execucao: Execucao):
+            ...
+
+        Profiler.print_summary()
+        Profiler.dump('profile.json')
+    """
+
+    __enabled = False
+    # estatísticas do processo atual e estatísticas recebidas dos demais processos (ver 'merge_stats')
+    # etapa -> [chamadas, itens, bytes, wall, cpu]
+    __stats = {}
+    __merged = {}
+    # processo ao qual as estatísticas locais pertencem, os processos do pool herdam (fork) as estatísticas do principal
+    __pid = None
+
+    @staticmethod
+    def configure(enabled: bool = True):
+        """
+        Habilita (ou desabilita) a instrumentação. Desabilitada, cada etapa custa somente uma verificação.
+
+        :param enabled: Indica se as etapas devem ser medidas.
+        :type enabled: bool
+        """
+        Profiler.__enabled = enabled
+
+    @staticmethod
+    def enabled() -> bool:
+        return Profiler.__enabled
+
+    @staticmethod
+    def timed(nome: str, path_arg: int = None, list_arg: int = None, text_arg: int = None):
+        """
+        Decorador que mede cada chamada da função decorada como uma etapa da extração.
+
+        Os itens e bytes de cada chamada são obtidos dos argumentos da função:
+            - path_arg: posição do argumento com o caminho do arquivo lido (1 item, o tamanho do arquivo em bytes).
+            - list_arg: posição do argumento com a lista de entidades gravadas (1 item por entidade).
+            - text_arg: posição do argumento com o texto processado (1 item, o tamanho do texto em bytes).
+
+        :param nome: Nome da etapa.
+        :type nome: str
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not Profiler.__enabled:
+                    return func(*args, **kwargs)
+                wall = time.perf_counter()
+                cpu = time.thread_time()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    wall = time.perf_counter() - wall
+                    cpu = time.thread_time() - cpu
+                    itens = n_bytes = 0
+                    if path_arg is not None:
+                        itens = 1
+                        try:
+                            n_bytes = os.path.getsize(args[path_arg])
+                        except OSError:
+                            pass
+                    elif list_arg is not None:
+                        itens = len(args[list_arg])
+                    elif text_arg is not None:
+                        itens = 1
+                        n_bytes = len(args[text_arg])
+                    Profiler.record(nome, itens, n_bytes, wall, cpu)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def record(nome: str, itens: int, n_bytes: int, wall: float, cpu: float, chamadas: int = 1):
+        """
+        Registra uma (ou mais) chamadas de uma etapa.
+
+        :param nome: Nome da etapa.
+        :param itens: Quantidade de itens (arquivos ou entidades) processados.
+        :param n_bytes: Quantidade de bytes processados.
+        :param wall: Tempo total (s).
+        :param cpu: Tempo de CPU (s) da thread que executou a etapa.
+        :param chamadas: Quantidade de chamadas.
+        """
+        if Profiler.__pid != os.getpid():
+            Profiler.__pid = os.getpid()
+            Profiler.__stats = {}
+        stats = Profiler.__stats.get(nome)
+        if stats is None:
+            stats = Profiler.__stats[nome] = [0, 0, 0, 0.0, 0.0]
+        stats[0] += chamadas
+        stats[1] += itens
+        stats[2] += n_bytes
+        stats[3] += wall
+        stats[4] += cpu
+
+    @staticmethod
+    def pop_stats() -> dict:
+        """
+        Retorna e zera as estatísticas do processo atual.
+
+        :return: Dicionário etapa -> [chamadas, itens, bytes, wall, cpu].
+        """
+        if Profiler.__pid != os.getpid():
+            return {}
+        stats = Profiler.__stats
+        Profiler.__stats = {}
+        return stats
+
+    @staticmethod
+    def merge_stats(stats: dict):
+        """
+        Acumula no processo atual as estatísticas retornadas por :meth:`pop_stats` em outro processo.
+
+        :param stats: Dicionário etapa -> [chamadas, itens, bytes, wall, cpu].
+        """
+        for nome, valores in stats.items():
+            merged = Profiler.__merged.setdefault(nome, [0, 0, 0, 0.0, 0.0])
+            for i, valor in enumerate(valores):
+                merged[i] += valor
+
+    @staticmethod
+    def stats() -> dict:
+        """
+        Retorna as estatísticas de todas as etapas (do processo atual e dos demais processos).
+
+        :return: Dicionário etapa -> {'chamadas', 'itens', 'bytes', 'wall', 'cpu'}.
+        """
+        total = {}
+        local = Profiler.__stats if Profiler.__pid == os.getpid() else {}
+        for origem in (Profiler.__merged, local):
+            for nome, valores in origem.items():
+                acumulado = total.setdefault(nome, [0, 0, 0, 0.0, 0.0])
+                for i, valor in enumerate(valores):
+                    acumulado[i] += valor
+        campos = ('chamadas', 'itens', 'bytes', 'wall', 'cpu')
+        return {nome: dict(zip(campos, valores)) for nome, valores in sorted(total.items())}
+
+    @staticmethod
+    def print_summary():
+        """Imprime uma tabela com as estatísticas de cada etapa, ordenadas pelo tempo total."""
+        stats = Profiler.stats()
+        if not stats:
+            return
+        print(f"{'Etapa':<34}{'Chamadas':>10}{'Itens':>10}{'MB':>10}{'Wall (s)':>11}{'CPU (s)':>10}"
+              f"{'Itens/s':>11}{'MB/s':>9}")
+        for nome, s in sorted(stats.items(), key=lambda item: -item[1]['wall']):
+            wall = s['wall'] or float('nan')
+            print(f"{nome:<34}{s['chamadas']:>10}{s['itens']:>10}{s['bytes'] / 1e6:>10.2f}{s['wall']:>11.3f}"
+                  f"{s['cpu']:>10.3f}{s['itens'] / wall:>11.0f}{s['bytes'] / 1e6 / wall:>9.2f}")
+
+    @staticmethod
+    def dump(path: str):
+        """
+        Grava as estatísticas de cada etapa num arquivo JSON.
+
+        :param path: Caminho do arquivo JSON.
+        :type path: str
+        """
+        with open(path, 'w') as f:
+            json.dump(Profiler.stats(), f, indent=2)
@@ -0,0 +1,179 @@
+import json
+import shutil
+import zlib
+
+from aggregates import ExerciseStats
+from model import *
+from parser import CSVParser
+from util import Logger
+
+
+class Shard:
+    """
+    Partição (shard) da extração, permitindo que várias máquinas com acesso ao mesmo dataset extraiam, cada uma, uma
+    parte dos Períodos, Turmas e Estudantes.
+
+    Cada unidade é atribuída à partição 'i' de 'n' pelo hash (CRC-32) da sua chave (ex: '2017-1/137/1371' para um
+    Estudante), de modo que a atribuição é determinística e não depende da máquina nem da ordem de extração. Cada
+    partição grava seus próprios arquivos '.csv' (ex: 'shards/0-of-4/csv') e, ao final da extração, o arquivo
+    '.shard.json' com a posição de cada uma das suas unidades na ordem de extração do dataset completo. As Soluções
+    são extraídas somente pela partição 0.
+
+    Os arquivos das partições são então unidos (ver :meth:`merge`) nos arquivos '.csv' da extração completa, com as
+    linhas na mesma ordem da extração sem partições. As estatísticas dos Exercícios, que dependem de todas as
+    Execuções, são recalculadas durante a união.
+
+    Exemplo de uso:
+        python __init__.py --shard 0/4    (em cada máquina, de 0/4 a 3/4)
+        python __init__.py --merge 4
+    """
+
+    # partição atual (índice, quantidade), sem partições por padrão
+    __index = 0
+    __count = 1
+    # posição da próxima unidade na ordem de extração, e posições das unidades da partição (chave -> posição)
+    __position = 0
+    __positions = {}
+    # arquivo, gravado junto dos arquivos '.csv' da partição, que indica que a extração da partição foi concluída
+    __file_name = '.shard.json'
+    # colunas que identificam a unidade (Período, Turma ou Estudante) de cada linha dos arquivos unidos por posição
+    __tables = {
+        'periodos': (0,),
+        'turmas': (0, 1),
+        'atividades': (0, 1),
+        'estudantes': (0, 1, 2),
+        'execucoes': (0, 1, 2),
+        'erros': (0, 1, 3),
+        'tentativas': (0, 1, 2),
+    }
+    # tamanho dos trechos copiados dos arquivos das partições
+    __chunk_size = 1 << 20
+
+    @staticmethod
+    def configure(index: int, count: int):
+        """
+        Seleciona a partição extraída.
+
+        :param index: Índice da partição, de 0 a 'count' - 1.
+        :type index: int
+        :param count: Quantidade de partições.
+        :type count: int
+        """
+        Shard.__index = index
+        Shard.__count = count
+        Shard.__position = 0
+        Shard.__positions = {}
+
+    @staticmethod
+    def enabled() -> bool:
+        return Shard.__count > 1
+
+    @staticmethod
+    def output_dir(cwd: str, index: int, count: int) -> str:
+        """Retorna o diretório dos arquivos '.csv' de uma partição."""
+        return f'{cwd}/shards/{index}-of-{count}/csv'
+
+    @staticmethod
+    def key(unidade) -> str:
+        """Retorna a chave de um :class:`Periodo`, :class:`Turma` ou :class:`Estudante`."""
+        if isinstance(unidade, Periodo):
+            return unidade.descricao
+        if isinstance(unidade, Turma):
+            return f'{unidade.periodo.descricao}/{unidade.codigo}'
+        return f'{unidade.periodo.descricao}/{unidade.turma.codigo}/{unidade.codigo}'
+
+    @staticmethod
+    def owns(unidade) -> bool:
+        """
+        Verifica se a unidade pertence à partição atual, registrando sua posição na ordem de extração.
+
+        Deve ser chamado uma única vez para cada Período, Turma e Estudante do dataset, na ordem em que são extraídos,
+        inclusive para as unidades de outras partições.
+
+        :param unidade: O Período, Turma ou Estudante.
+        :return: 'True' se a unidade deve ser extraída e salva pela partição atual.
+        """
+        if Shard.__count == 1:
+            return True
+        chave = Shard.key(unidade)
+        posicao = Shard.__position
+        Shard.__position += 1
+        if zlib.crc32(chave.encode('utf-8')) % Shard.__count != Shard.__index:
+            return False
+        Shard.__positions[chave] = posicao
+        return True
+
+    @staticmethod
+    def is_first() -> bool:
+        """Verifica se a partição atual é a primeira, responsável pelas entidades que não são particionadas."""
+        return Shard.__index == 0
+
+    @staticmethod
+    def save(output_dir: str):
+        """Grava o arquivo '.shard.json' da partição, ao final da extração."""
+        with open(f'{output_dir}/{Shard.__file_name}', 'w') as f:
+            json.dump({'index': Shard.__index, 'count': Shard.__count, 'positions': Shard.__positions}, f,
+                      separators=(',', ':'))
+
+    @staticmethod
+    def merge(cwd: str, count: int) -> bool:
+        """
+        Une os arquivos '.csv' das 'count' partições nos arquivos '.csv' da extração completa.
+
+        As linhas de cada unidade são copiadas, sem serem interpretadas, na ordem das posições registradas pelas
+        partições; as Soluções são copiadas da partição 0 e as estatísticas dos Exercícios são recalculadas a partir
+        das Execuções unidas.
+
+        :param cwd: Diretório de trabalho, que contém a pasta 'shards'.
+        :param count: Quantidade de partições.
+        :return: 'False' se alguma partição não foi concluída.
+        """
+        dirs = [Shard.output_dir(cwd, i, count) for i in range(count)]
+        positions = {}
+        for i, path in enumerate(dirs):
+            try:
+                with open(f'{path}/{Shard.__file_name}', 'r') as f:
+                    info = json.load(f)
+            except (OSError, ValueError):
+                Logger.error('Partição %s/%s não concluída: %s', i, count, path)
+                return False
+            if info['index'] != i or info['count'] != count:
+                Logger.error('Partição inválida: %s', path)
+                return False
+            positions.update(info['positions'])
+
+        CSVParser.create_output_dir()
+        ExerciseStats.reset()
+        output_dir = CSVParser.output_dir()
+        for tabela, colunas in Shard.__tables.items():
+            Logger.info('Unindo as partições do arquivo: %s.csv', tabela)
+            trechos = []
+            for i, path in enumerate(dirs):
+                index = CSVParser.build_index(f'{path}/{tabela}.csv', colunas)
+                for chave, ranges in index.items():
+                    posicao = positions['/'.join(chave)]
+                    trechos.extend((posicao, i, start, end) for start, end in ranges)
+            # a ordenação é estável, os trechos de uma mesma unidade mantêm a ordem do arquivo da partição
+            trechos.sort(key=lambda trecho: trecho[0])
+            sources = [open(f'{path}/{tabela}.csv', 'rb') for path in dirs]
+            try:
+                with open(f'{output_dir}/{tabela}.csv', 'ab') as dst:
+                    for _, i, start, end in trechos:
+                        sources[i].seek(start)
+                        data = sources[i].read(end - start)
+                        dst.write(data)
+                        if tabela == 'execucoes':
+                            ExerciseStats.add_csv(data)
+            finally:
+                for src in sources:
+                    src.close()
+
+        with open(f'{output_dir}/solucoes.csv', 'ab') as dst:
+            for path in dirs:
+                with open(f'{path}/solucoes.csv', 'rb') as src:
+                    # o cabeçalho já foi gravado na criação do arquivo
+                    src.readline()
+                    shutil.copyfileobj(src, dst, Shard.__chunk_size)
+        CSVParser.salvar_exercicios(ExerciseStats.exercicios())
+        CSVParser.close()
+        return True
@@ -0,0 +1,327 @@
+import bz2
+import gzip
+import io
+import lzma
+import mmap
+import os
+import shutil
+import tarfile
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import List
+
+from index import DatasetIndex, IndexEntry
+from util import Logger
+
+
+class DatasetSource:
+    """
+    Origem dos arquivos do dataset Codebench: uma pasta do sistema de arquivos ou um arquivo compactado ('.zip',
+    '.tar', '.tar.gz', '.tar.xz' ou '.tar.bz2') lido diretamente, sem que seus milhões de arquivos sejam extraídos.
+
+    Os arquivos de um dataset compactado são identificados por caminhos dentro do próprio arquivo compactado (ex:
+    'cb_dataset_v1.11.zip/dataset/2017-1/136/assessments/1371.data'). Os membros são indexados em memória uma única
+    vez, na configuração (pasta -> entradas, caminho -> posição do membro), e cada leitura acessa diretamente o membro,
+    sem percorrer o arquivo compactado. Uma pasta única na raiz do arquivo compactado que envolve o dataset (ex:
+    'cb_dataset_v1.11/'), qualquer que seja o seu nome, é ignorada.
+
+    Como os formatos '.tar' comprimidos não permitem o acesso direto aos membros, eles são descomprimidos uma única
+    vez num único arquivo '.tar' na pasta 'cache' (reaproveitado enquanto o arquivo compactado não muda).
+
+    Para as pastas do sistema de arquivos, as consultas são repassadas ao :class:`DatasetIndex`.
+
+    Exemplo de uso:
+        DatasetSource.configure('cb_dataset_v1.11.zip')
+
+        for entry in DatasetSource.scandir(f'{turma.path}/assessments'):
+            with DatasetSource.open(entry.path) as f:
+                ...
+        with DatasetSource.buffer(path) as buffer:
+            ...
+    """
+
+    # extensões dos arquivos compactados, e o módulo que descomprime cada formato '.tar' comprimido
+    __tar_compressions = {'.tar': None, '.tar.gz': gzip, '.tgz': gzip, '.tar.xz': lzma, '.txz': lzma,
+                          '.tar.bz2': bz2, '.tbz2': bz2}
+    # pasta onde os arquivos '.tar' comprimidos são descomprimidos
+    __cache_dir = os.getcwd() + '/cache'
+    # caminho absoluto do arquivo compactado, e do arquivo '.tar' lido ('None' para arquivos '.zip')
+    __archive = None
+    __tar = None
+    # entradas de cada pasta (caminho relativo -> entradas) e membros (caminho relativo -> (entrada, posição)), onde
+    # a posição é o nome do membro no '.zip' ou a posição dos dados do membro no '.tar'
+    __folders = {}
+    __members = {}
+    # arquivo compactado aberto pelo processo atual
+    __handle = None
+    __pid = None
+
+    @staticmethod
+    def archive_extension(path: str):
+        """Retorna a extensão do arquivo compactado ('.zip', '.tar.gz', ...), ou 'None' para uma pasta."""
+        nome = os.path.basename(os.path.normpath(path)).lower()
+        for extensao in ['.zip'] + list(DatasetSource.__tar_compressions):
+            if nome.endswith(extensao) and not os.path.isdir(path):
+                return extensao
+        return None
+
+    @staticmethod
+    def configure(path: str) -> bool:
+        """
+        Seleciona a origem dos arquivos do dataset, indexando os membros quando ela é um arquivo compactado.
+
+        :param path: Caminho da pasta do dataset Codebench ou do arquivo compactado com o dataset.
+        :type path: str
+        :return: 'True' se o dataset é lido de um arquivo compactado.
+        """
+        DatasetSource.close()
+        DatasetSource.__archive = None
+        DatasetSource.__tar = None
+        DatasetSource.__folders = {}
+        DatasetSource.__members = {}
+        extensao = DatasetSource.archive_extension(path)
+        if extensao is None:
+            return False
+
+        archive = os.path.abspath(path)
+        Logger.info('Indexando o dataset compactado: %s', archive)
+        if extensao == '.zip':
+            membros = DatasetSource.__list_zip(archive)
+        else:
+            compressao = DatasetSource.__tar_compressions[extensao]
+            DatasetSource.__tar = DatasetSource.__decompress(archive, compressao) if compressao else archive
+            membros = DatasetSource.__list_tar(DatasetSource.__tar)
+
+        DatasetSource.__archive = archive
+        membros = [(DatasetSource.__normalize(nome), *info) for nome, *info in membros]
+        # as pastas únicas na raiz (ex: 'cb_dataset_v1.11/'), qualquer que seja o nome, não fazem parte do caminho
+        # dos membros, até que as pastas das Turmas estejam no terceiro nível ('dataset/2017-1/136')
+        while not any(DatasetSource.__is_turma(nome) for nome, *_ in membros):
+            raizes = {nome.partition('/')[0] for nome, *_ in membros if nome}
+            if len(raizes) != 1:
+                raise ValueError(f'Estrutura do dataset compactado não reconhecida: {archive} (esperado '
+                                 "'<pasta>/<periodo>/<turma>/...', ex: 'dataset/2017-1/136/assessments/1371.data')")
+            raiz = raizes.pop()
+            membros = [(nome[len(raiz) + 1:], *info) for nome, *info in membros if nome != raiz]
+        DatasetSource.__folders[''] = []
+        for membro in membros:
+            DatasetSource.__add(*membro)
+        Logger.info('Índice do dataset compactado: %s entradas', len(DatasetSource.__members))
+        return True
+
+    @staticmethod
+    def __list_zip(archive: str) -> List[tuple]:
+        """Lista os membros (nome, pasta, tamanho, data de modificação, nome do membro) de um arquivo '.zip'."""
+        with zipfile.ZipFile(archive) as f:
+            return [(info.filename, info.is_dir(), info.file_size,
+                     int(time.mktime(info.date_time + (0, 0, -1))) * 10 ** 9, info.filename)
+                    for info in f.infolist()]
+
+    @staticmethod
+    def __list_tar(tar: str) -> List[tuple]:
+        """Lista os membros (nome, pasta, tamanho, data de modificação, posição dos dados) de um arquivo '.tar'."""
+        membros = []
+        with tarfile.open(tar, 'r:') as f:
+            while True:
+                info = f.next()
+                if info is None:
+                    break
+                # os cabeçalhos já lidos não são mantidos pelo 'tarfile', o índice guarda somente o necessário
+                f.members = []
+                if info.isdir() or info.isfile():
+                    membros.append((info.name, info.isdir(), info.size, int(info.mtime * 10 ** 9), info.offset_data))
+        return membros
+
+    @staticmethod
+    def __decompress(archive: str, compressao) -> str:
+        """
+        Descomprime um arquivo '.tar' comprimido num único arquivo '.tar', que permite o acesso direto aos membros.
+
+        :return: Caminho do arquivo '.tar', reaproveitado enquanto a data de modificação do arquivo comprimido não muda.
+        """
+        st = os.stat(archive)
+        tar = f'{DatasetSource.__cache_dir}/{os.path.basename(archive).rpartition(".")[0]}'
+        if not tar.endswith('.tar'):
+            tar += '.tar'
+        if os.path.exists(tar) and os.stat(tar).st_mtime_ns == st.st_mtime_ns:
+            return tar
+        Logger.info('Descomprimindo o dataset num único arquivo: %s', tar)
+        os.makedirs(DatasetSource.__cache_dir, exist_ok=True)
+        with compressao.open(archive, 'rb') as src, open(f'{tar}.tmp', 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        # a data de modificação do arquivo comprimido identifica o '.tar' descomprimido a partir dele
+        os.utime(f'{tar}.tmp', ns=(st.st_atime_ns, st.st_mtime_ns))
+        os.replace(f'{tar}.tmp', tar)
+        return tar
+
+    @staticmethod
+    def __is_turma(caminho: str) -> bool:
+        """Verifica se o caminho está dentro da pasta de uma Turma, no formato '<pasta>/<periodo>/<turma>/...'."""
+        partes = caminho.split('/')
+        return len(partes) >= 3 and partes[2].isdigit()
+
+    @staticmethod
+    def __normalize(nome: str) -> str:
+        """Remove o './' inicial e as barras das extremidades do nome de um membro."""
+        while nome.startswith('./'):
+            nome = nome[2:]
+        return nome.strip('/')
+
+    @staticmethod
+    def __add(caminho: str, diretorio: bool, tamanho: int, mtime: int, posicao):
+        # membros repetidos mantêm a primeira ocorrência
+        if not caminho or caminho in DatasetSource.__members:
+            return
+        pasta, _, nome = caminho.rpartition('/')
+        DatasetSource.__add_folder(pasta)
+        entry = IndexEntry(nome, f'{DatasetSource.__archive}/{caminho}', diretorio, tamanho, mtime)
+        DatasetSource.__members[caminho] = (entry, posicao)
+        DatasetSource.__folders[pasta].append(entry)
+        if diretorio:
+            DatasetSource.__folders.setdefault(caminho, [])
+
+    @staticmethod
+    def __add_folder(pasta: str):
+        """Registra uma pasta (e as pastas acima dela) que não possui um membro próprio no arquivo compactado."""
+        if pasta in DatasetSource.__folders:
+            return
+        DatasetSource.__add(pasta, True, 0, 0, None)
+
+    @staticmethod
+    def is_archive() -> bool:
+        """Verifica se o dataset é lido de um arquivo compactado."""
+        return DatasetSource.__archive is not None
+
+    @staticmethod
+    def __relative(path: str):
+        """Retorna o caminho relativo à raiz do arquivo compactado, ou 'None' para caminhos fora dele."""
+        archive = DatasetSource.__archive
+        if archive is None:
+            return None
+        path = os.path.abspath(path)
+        if path == archive:
+            return ''
+        if path.startswith(archive) and path[len(archive)] == '/':
+            return path[len(archive) + 1:]
+        return None
+
+    @staticmethod
+    def scandir(path: str) -> List:
+        """
+        Lista as entradas (arquivos e pastas) de uma pasta, na ordem do arquivo compactado ou do índice do dataset.
+
+        :param path: Caminho da pasta.
+        :type path: str
+        :return: Lista de :class:`IndexEntry` (ou de 'os.DirEntry', para caminhos fora do índice).
+        :raises FileNotFoundError: Caso a pasta não exista.
+        """
+        caminho = DatasetSource.__relative(path)
+        if caminho is None:
+            return DatasetIndex.scandir(path)
+        entries = DatasetSource.__folders.get(caminho)
+        if entries is None:
+            raise FileNotFoundError(f'Pasta não encontrada no dataset compactado: {path}')
+        return list(entries)
+
+    @staticmethod
+    def names(path: str) -> set:
+        """
+        Retorna os nomes das entradas de uma pasta.
+
+        :param path: Caminho da pasta.
+        :type path: str
+        :return: Conjunto com os nomes das entradas da pasta, vazio caso a pasta não exista.
+        """
+        caminho = DatasetSource.__relative(path)
+        if caminho is None:
+            return DatasetIndex.names(path)
+        return {entry.name for entry in DatasetSource.__folders.get(caminho, ())}
+
+    @staticmethod
+    def stat(path: str):
+        """
+        Retorna a entrada de um arquivo ou pasta.
+
+        :param path: Caminho do arquivo ou pasta.
+        :type path: str
+        :return: :class:`IndexEntry` ou 'None', caso o arquivo (ou pasta) não exista.
+        """
+        caminho = DatasetSource.__relative(path)
+        if caminho is None:
+            return DatasetIndex.stat(path)
+        if not caminho:
+            return IndexEntry(os.path.basename(path), path, True, 0, 0)
+        membro = DatasetSource.__members.get(caminho)
+        return membro[0] if membro else None
+
+    @staticmethod
+    def __read(path: str, caminho: str) -> bytes:
+        """Lê o conteúdo de um membro do arquivo compactado."""
+        membro = DatasetSource.__members.get(caminho)
+        if membro is None or membro[0].is_dir():
+            raise FileNotFoundError(f'Arquivo não encontrado no dataset compactado: {path}')
+        entry, posicao = membro
+        # o arquivo compactado não pode ser compartilhado entre processos, cada 'worker' abre o seu
+        if DatasetSource.__pid != os.getpid():
+            DatasetSource.__pid = os.getpid()
+            if DatasetSource.__tar:
+                DatasetSource.__handle = os.open(DatasetSource.__tar, os.O_RDONLY)
+            else:
+                DatasetSource.__handle = zipfile.ZipFile(DatasetSource.__archive)
+        if DatasetSource.__tar:
+            return os.pread(DatasetSource.__handle, entry.st_size, posicao)
+        return DatasetSource.__handle.read(posicao)
+
+    @staticmethod
+    def open(path: str, mode: str = 'r'):
+        """
+        Abre um arquivo do dataset para leitura, como o 'open' nativo.
+
+        :param path: Caminho do arquivo.
+        :type path: str
+        :param mode: Modo de leitura, 'r' (texto) ou 'rb' (binário).
+        :type mode: str
+        :raises FileNotFoundError: Caso o arquivo não exista.
+        """
+        caminho = DatasetSource.__relative(path)
+        if caminho is None:
+            return open(path, mode)
+        data = io.BytesIO(DatasetSource.__read(path, caminho))
+        # o texto é decodificado com a mesma codificação e conversão de quebras de linha do 'open' nativo
+        return data if 'b' in mode else io.TextIOWrapper(data)
+
+    @staticmethod
+    @contextmanager
+    def buffer(path: str):
+        """
+        Disponibiliza o conteúdo binário de um arquivo do dataset, mapeado em memória quando está no sistema de
+        arquivos, ou lido diretamente do arquivo compactado.
+
+        :param path: Caminho do arquivo.
+        :type path: str
+        :return: Gerenciador de contexto com o conteúdo ('mmap' ou 'bytes', vazio para arquivos vazios).
+        :raises FileNotFoundError: Caso o arquivo não exista.
+        """
+        caminho = DatasetSource.__relative(path)
+        if caminho is not None:
+            yield DatasetSource.__read(path, caminho)
+            return
+        with open(path, 'rb') as f:
+            # arquivos vazios não podem ser mapeados em memória
+            if not os.fstat(f.fileno()).st_size:
+                yield b''
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                yield buffer
+
+    @staticmethod
+    def close():
+        """Fecha o arquivo compactado aberto pelo processo atual."""
+        if DatasetSource.__pid == os.getpid() and DatasetSource.__handle is not None:
+            if DatasetSource.__tar:
+                os.close(DatasetSource.__handle)
+            else:
+                DatasetSource.__handle.close()
+        DatasetSource.__handle = None
+        DatasetSource.__pid = None
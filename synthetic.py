@@ -0,0 +1,220 @@
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+
+
+class SyntheticDataset:
+    """
+    Gerador de um dataset Codebench sintético, com a mesma estrutura de pastas e os mesmos formatos de arquivo do
+    dataset real (que não é público), usado para medir o desempenho do extrator (ver 'benchmark.py').
+
+    Estrutura gerada (os Períodos ficam numa subpasta do dataset, como espera 'CodebenchExtractor.extract_periodos'):
+        <path>/dataset/<periodo>/<turma>/assessments/<atividade>.data
+        <path>/dataset/<periodo>/<turma>/users/<estudante>/user.data
+        <path>/dataset/<periodo>/<turma>/users/<estudante>/executions/<atividade>_<exercicio>.log
+        <path>/dataset/<periodo>/<turma>/users/<estudante>/codemirror/<atividade>_<exercicio>.log
+        <path>/dataset/<periodo>/<turma>/users/<estudante>/codes/<atividade>_<exercicio>.py
+        <solutions>/solucoes.csv
+
+    O conteúdo é pseudoaleatório, mas determinado pela semente ('seed'): a mesma configuração sempre gera os mesmos
+    arquivos, o que permite comparar as saídas do extrator com saídas de referência (golden).
+
+    Exemplo de uso:
+        dataset = SyntheticDataset(periodos=2, turmas=2, estudantes=20)
+        dataset.generate('cb_dataset_v1.11', 'solutions')
+    """
+
+    # códigos das soluções dos Estudantes (e dos Professores), incluindo um código com erro de sintaxe
+    __codigos = [
+        'a = int(input())\nb = int(input())\nprint(a + b)\n',
+        '# soma dos pares\nn = int(input())\ns = 0\nfor i in range(n):\n    if i % 2 == 0:\n        s += i\n'
+        '    else:\n        s -= 1\nprint(s)\n',
+        "def f(x):\n    '''doc\n    string'''\n    return x * 2 if x > 0 else -x\n\n\nclass A:\n    def m(self):\n"
+        "        return [f(i) for i in range(3)]\n\n\nprint(A().m())\n",
+        "x = float(input())\nwhile x > 1:\n    x = x / 2  # metade\n\nprint('%.2f' % x)\n",
+        'nota = float(input())\nif nota >= 8:\n    print("A")\nelif nota >= 6:\n    print("B")\nelse:\n'
+        '    print("C")\n',
+        'v = [int(x) for x in input().split()]\nm = max(v) if v else 0\nprint(m, sum(v) / len(v) if v else 0)\n',
+        'def broken(:\n  pass\n',
+    ]
+    __erros = [
+        "NameError: name 'x' is not defined",
+        'IndentationError: unexpected indent',
+        "TypeError: unsupported operand type(s) for +: 'int' and 'str'",
+        'ZeroDivisionError: division by zero',
+        'ValueError: invalid literal for int() with base 10',
+        'SyntaxError: invalid syntax',
+    ]
+    __eventos = ['focus', 'change', 'change', 'change', 'blur', 'mousedown', 'keyHandled', 'submit']
+
+    def __init__(self, periodos: int = 2, turmas: int = 2, atividades: int = 4, exercicios: int = 4,
+                 estudantes: int = 20, execucoes: int = 6, eventos: int = 60, seed: int = 1):
+        """
+        Método Construtor.
+
+        :param periodos: Quantidade de Períodos letivos.
+        :param turmas: Quantidade de Turmas em cada Período.
+        :param atividades: Quantidade de Atividades de cada Turma.
+        :param exercicios: Quantidade de Exercícios de cada Atividade.
+        :param estudantes: Quantidade de Estudantes de cada Turma.
+        :param execucoes: Quantidade máxima de submissões/testes de cada Estudante em cada Exercício.
+        :param eventos: Quantidade máxima de eventos do CodeMirror de cada Estudante em cada Exercício.
+        :param seed: Semente do gerador pseudoaleatório.
+        """
+        self.periodos = periodos
+        self.turmas = turmas
+        self.atividades = atividades
+        self.exercicios = exercicios
+        self.estudantes = estudantes
+        self.execucoes = execucoes
+        self.eventos = eventos
+        self.seed = seed
+
+    def descricao(self) -> str:
+        """Retorna a descrição da configuração do dataset, que identifica os arquivos gerados."""
+        return ','.join(f'{nome}={valor}' for nome, valor in vars(self).items())
+
+    def generate(self, path: str, solutions_path: str):
+        """
+        Gera o dataset sintético.
+
+        :param path: Diretório (inexistente ou vazio) onde o dataset é gerado.
+        :type path: str
+        :param solutions_path: Diretório onde é gerado o arquivo 'solucoes.csv' com as soluções dos Professores.
+        :type solutions_path: str
+        """
+        rnd = random.Random(self.seed)
+        for p in range(self.periodos):
+            periodo = f'{2017 + p // 2}-{p % 2 + 1}'
+            inicio = datetime(2017 + p // 2, 3 if p % 2 == 0 else 8, 13, 16, 0)
+            for t in range(self.turmas):
+                turma = 100 + p * self.turmas + t
+                turma_path = f'{path}/dataset/{periodo}/{turma}'
+                atividades = self.__generate_atividades(rnd, turma_path, turma, inicio)
+                for e in range(self.estudantes):
+                    self.__generate_estudante(rnd, f'{turma_path}/users/{turma * 1000 + e}', atividades)
+
+        os.makedirs(solutions_path, exist_ok=True)
+        with open(f'{solutions_path}/solucoes.csv', 'w') as f:
+            for exercicio in range(1000, 1000 + self.atividades * self.exercicios):
+                f.write(f'{exercicio} == SOLUCAO DO PROFESSOR ==>\n{rnd.choice(SyntheticDataset.__codigos[:-1])}')
+
+    def __generate_atividades(self, rnd: random.Random, turma_path: str, turma: int, inicio: datetime) -> dict:
+        os.makedirs(f'{turma_path}/assessments')
+        atividades = {}
+        for a in range(self.atividades):
+            codigo = turma * 100 + a
+            exercicios = [1000 + a * self.exercicios + k for k in range(self.exercicios)]
+            data_inicio = inicio + timedelta(days=7 * a)
+            data_termino = data_inicio + timedelta(days=14)
+            atividades[codigo] = (exercicios, data_inicio, data_termino)
+            with open(f'{turma_path}/assessments/{codigo}.data', 'w') as f:
+                f.write('-- ASSESSMENT DATA: \n'
+                        f'---- assessment title: Lab {a} \n'
+                        '---- class name: Introdução à Ciência dos Computadores \n'
+                        f'---- class number: {turma} \n'
+                        f"---- start: {data_inicio.strftime('%Y-%m-%d %H:%M')} \n"
+                        f"---- end: {data_termino.strftime('%Y-%m-%d %H:%M')} \n"
+                        '---- language: Python 3 \n'
+                        '---- codemirror mode: python/python.js \n'
+                        f"---- type: {rnd.choice(['homework', 'exam'])} \n"
+                        '---- weight: 1 \n'
+                        f'---- total_exercises: {len(exercicios)} \n'
+                        '-- EXERCISES: \n')
+                for k, exercicio in enumerate(exercicios):
+                    # alguns blocos possuem exercícios alternativos ('or')
+                    bloco = f'{exercicio} or {exercicio + 500}' if rnd.random() < 0.25 else f'{exercicio}'
+                    f.write(f'---- exercise {k + 1:02d}: {bloco} \n')
+        return atividades
+
+    def __generate_estudante(self, rnd: random.Random, path: str, atividades: dict):
+        for folder in ('executions', 'codemirror', 'codes'):
+            os.makedirs(f'{path}/{folder}')
+        with open(f'{path}/user.data', 'w') as f:
+            f.write('-- CURRENT DEGREE COURSE:  \n'
+                    f"---- course id: {rnd.choice([13, 21, 35])} \n"
+                    f"---- course name: {rnd.choice(['Física', 'Engenharia', 'Matemática'])} \n"
+                    '---- institution id: 1 \n'
+                    '---- institution name: UFAM \n'
+                    '-- HIGH SCHOOL:  \n'
+                    f'---- high school name: Escola {rnd.randint(1, 50)} \n'
+                    f"---- school type: {rnd.choice(['public school', 'private school'])} \n"
+                    f"---- shift: {rnd.choice(['morning shift', 'afternoon shift'])} \n"
+                    f'---- graduation year: {rnd.randint(2010, 2016)} \n'
+                    '-- OTHER INFORMATION:  \n'
+                    f"---- sex: {rnd.choice(['male', 'female'])} \n"
+                    f'---- year of birth: {rnd.randint(1990, 2000)} \n'
+                    f"---- civil status: {rnd.choice(['single', 'married'])} \n"
+                    f"---- have kids: {rnd.choice(['no', 'no', 'yes'])} \n")
+
+        for atividade, (exercicios, data_inicio, data_termino) in atividades.items():
+            for exercicio in exercicios:
+                nome = f'{atividade}_{exercicio}'
+                codigo = rnd.choice(SyntheticDataset.__codigos)
+                t = data_inicio + timedelta(hours=rnd.randint(0, 96), seconds=rnd.random() * 60)
+                with open(f'{path}/executions/{nome}.log', 'w') as f:
+                    self.__write_execucoes(rnd, f, t, codigo)
+                # nem todos os Exercícios possuem log do CodeMirror
+                if rnd.random() < 0.9:
+                    with open(f'{path}/codemirror/{nome}.log', 'w') as f:
+                        self.__write_eventos(rnd, f, t - timedelta(minutes=30))
+                with open(f'{path}/codes/{nome}.py', 'w') as f:
+                    f.write(codigo)
+
+    def __write_execucoes(self, rnd: random.Random, f, t: datetime, final: str):
+        n = rnd.randint(1, self.execucoes)
+        for k in range(n):
+            codigo = rnd.choice(SyntheticDataset.__codigos) if k < n - 1 else final
+            t += timedelta(seconds=rnd.random() * 300)
+            if rnd.random() < 0.5:
+                f.write(f'== TEST ({t}) \n-- CODE: \n{codigo}')
+                if rnd.random() < 0.4:
+                    f.write(f'-- ERROR: \nFile "XXXX", line 3 \n    soma = a + b \n    ^ \n{rnd.choice(SyntheticDataset.__erros)} \n')
+                else:
+                    f.write('-- OUTPUT: \n75 \n')
+            else:
+                acertou = k == n - 1 and rnd.random() < 0.7
+                f.write(f'== SUBMITION ({t}) \n-- CODE: \n{codigo}-- EXECUTION TIME: \n{rnd.random():.3f} \n')
+                if not acertou and rnd.random() < 0.3:
+                    f.write(f'-- ERROR: \nTraceback (most recent call last): \n  File "XXXX", line 2 \n'
+                            f'{rnd.choice(SyntheticDataset.__erros)} \n')
+                f.write('-- TEST CASE 1: \n---- input: \n3 \n---- correct output: \n75 \n---- user output: \n75 \n')
+                f.write(f'-- GRADE: \n{100 if acertou else rnd.choice([0, 50])}% \n')
+            f.write('*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-*-* \n')
+
+    def __write_eventos(self, rnd: random.Random, f, t: datetime):
+        for _ in range(rnd.randint(5, self.eventos)):
+            # a maioria dos eventos é próxima, alguns intervalos excedem o tempo de inatividade
+            t += timedelta(seconds=rnd.random() * (900 if rnd.random() < 0.1 else 30))
+            evento = rnd.choice(SyntheticDataset.__eventos)
+            if evento == 'submit' and rnd.random() < 0.3:
+                msg = 'Congratulations, your code is correct! '
+            else:
+                msg = '{"from":{"line":0,"ch":0}}'
+            # as datas do CodeMirror não possuem zeros à esquerda no mês e no dia
+            f.write(f'{t.year}-{t.month}-{t.day} {t.hour:02d}:{t.minute:02d}:{t.second:02d}.'
+                    f'{t.microsecond // 1000:03d}#{evento}#{msg}\n')
+
+
+def parse_args(argv=None):
+    """Interpreta os argumentos de linha de comando do gerador."""
+    arg_parser = argparse.ArgumentParser(description='Gera um dataset Codebench sintético.')
+    arg_parser.add_argument('path', help='diretório onde o dataset é gerado (ex: cb_dataset_v1.11)')
+    arg_parser.add_argument('--solutions', default='solutions',
+                            help="diretório do arquivo 'solucoes.csv' (padrão: solutions)")
+    arg_parser.add_argument('--periodos', type=int, default=2)
+    arg_parser.add_argument('--turmas', type=int, default=2, help='Turmas por Período')
+    arg_parser.add_argument('--atividades', type=int, default=4, help='Atividades por Turma')
+    arg_parser.add_argument('--exercicios', type=int, default=4, help='Exercícios por Atividade')
+    arg_parser.add_argument('--estudantes', type=int, default=20, help='Estudantes por Turma')
+    arg_parser.add_argument('--execucoes', type=int, default=6, help='máximo de submissões/testes por Exercício')
+    arg_parser.add_argument('--eventos', type=int, default=60, help='máximo de eventos do CodeMirror por Exercício')
+    arg_parser.add_argument('--seed', type=int, default=1)
+    return arg_parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    SyntheticDataset(args.periodos, args.turmas, args.atividades, args.exercicios, args.estudantes, args.execucoes,
+                     args.eventos, args.seed).generate(args.path, args.solutions)
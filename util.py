@@ -1,5 +1,9 @@
+import atexit
 import os
 import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 
 from model import *
@@ -43,14 +47,107 @@ class Util:
         return erros
 
 
+class RateLimitFilter(logging.Filter):
+    """
+    Filtro que limita a quantidade de mensagens (de nível INFO ou inferior) registradas por segundo.
+
+    O limite é aplicado a cada modelo de mensagem (ex: 'Extraindo informações de Execução: %s'), de modo que as
+    mensagens repetidas para cada arquivo do dataset são amostradas, enquanto as demais mensagens são mantidas. A
+    quantidade de mensagens suprimidas é informada na próxima mensagem registrada com o mesmo modelo.
+    """
+
+    def __init__(self, rate: int):
+        """
+        Método Construtor.
+
+        :param rate: Quantidade máxima de mensagens de um mesmo modelo registradas por segundo.
+        """
+        super().__init__()
+        self.rate = rate
+        self.suprimidas = 0
+        # modelo da mensagem -> [segundo, mensagens registradas, mensagens suprimidas]
+        self.janelas = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO:
+            return True
+        segundo = int(time.monotonic())
+        janela = self.janelas.get(record.msg)
+        if janela is None or janela[0] != segundo:
+            suprimidas = janela[2] if janela else 0
+            janela = self.janelas[record.msg] = [segundo, 0, 0]
+            if suprimidas:
+                record.msg = f"{record.msg} [+{suprimidas} mensagens semelhantes suprimidas]"
+        if janela[1] < self.rate:
+            janela[1] += 1
+            return True
+        janela[2] += 1
+        self.suprimidas += 1
+        return False
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    'Handler' que somente enfileira os registros de log, que são formatados e gravados pelos 'handlers' de destino numa
+    thread separada (ver 'QueueListener').
+
+    Os processos do pool de extração (ver '--workers') herdam este 'handler', mas não a thread que esvazia a fila:
+    nesses processos os registros são entregues diretamente aos 'handlers' de destino. Para que um processo não seja
+    criado (fork) enquanto a thread grava num dos arquivos, o que deixaria o arquivo bloqueado no novo processo, os
+    'handlers' de destino são bloqueados durante a criação de cada processo.
+    """
+
+    def __init__(self, log_queue: queue.Queue, handlers):
+        super().__init__(log_queue)
+        self.pid = os.getpid()
+        self.handlers = handlers
+        os.register_at_fork(before=self.__acquire_handlers, after_in_parent=self.__release_handlers)
+
+    def __acquire_handlers(self):
+        for handler in self.handlers:
+            handler.acquire()
+
+    def __release_handlers(self):
+        # no novo processo os bloqueios dos 'handlers' são recriados pelo próprio módulo 'logging'
+        for handler in reversed(self.handlers):
+            handler.release()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # o registro não deixa o processo, a mensagem é formatada somente pela thread que grava o log
+        return record
+
+    def emit(self, record: logging.LogRecord):
+        if os.getpid() == self.pid:
+            super().emit(record)
+        else:
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+
 class Logger:
 
     __path = os.getcwd() + '/logs'
     __cblogger = None
+    __listener = None
+    __rate_limit = None
 
     @staticmethod
-    def configure():
-        logging.basicConfig(level=logging.INFO)
+    def configure(level: int = logging.INFO, asynchronous: bool = False, rate_limit: int = 0):
+        """
+        Configura o log da extração.
+
+        :param level: Nível mínimo das mensagens registradas, as mensagens abaixo dele não são formatadas.
+        :type level: int
+        :param asynchronous: Indica se as mensagens devem ser gravadas por uma thread separada (ver
+            :class:`AsyncQueueHandler`), em vez de gravadas a cada chamada.
+        :type asynchronous: bool
+        :param rate_limit: Quantidade máxima de mensagens INFO de um mesmo modelo registradas por segundo (0 para
+            registrar todas as mensagens, ver :class:`RateLimitFilter`).
+        :type rate_limit: int
+        """
+        if not asynchronous:
+            logging.basicConfig(level=logging.INFO)
 
         if not os.path.exists(Logger.__path):
             os.mkdir(Logger.__path)
@@ -60,44 +157,78 @@ class Logger:
 
         if not Logger.__cblogger:
             Logger.__cblogger = logging.getLogger('cblogger')
+            Logger.__cblogger.setLevel(level)
+            handlers = []
 
             dfh = logging.FileHandler(f'{Logger.__path}/{data_hoje}_debug.log')
             dfh.setLevel(level=logging.DEBUG)
             dfh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(dfh)
+            handlers.append(dfh)
 
             ifh = logging.FileHandler(f'{Logger.__path}/{data_hoje}_info.log')
             ifh.setLevel(level=logging.INFO)
             ifh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(ifh)
+            handlers.append(ifh)
 
             wfh = logging.FileHandler(f'{Logger.__path}/{data_hoje}_warn.log')
             wfh.setLevel(level=logging.WARNING)
             wfh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(wfh)
+            handlers.append(wfh)
 
             efh = logging.FileHandler(f'{Logger.__path}/{data_hoje}_error.log')
             efh.setLevel(level=logging.ERROR)
             efh.setFormatter(formatter)
-            Logger.__cblogger.addHandler(efh)
+            handlers.append(efh)
 
             console_handler = logging.StreamHandler()
             console_handler.setLevel(level=logging.INFO)
             console_handler.setFormatter(formatter)
-            Logger.__cblogger.addHandler(console_handler)
+            handlers.append(console_handler)
+
+            if rate_limit > 0:
+                Logger.__rate_limit = RateLimitFilter(rate_limit)
+                Logger.__cblogger.addFilter(Logger.__rate_limit)
+
+            if asynchronous:
+                # as mensagens já são gravadas pelos 'handlers' do 'cblogger', sem repeti-las no 'root' logger
+                Logger.__cblogger.propagate = False
+                log_queue = queue.SimpleQueue()
+                Logger.__cblogger.addHandler(AsyncQueueHandler(log_queue, handlers))
+                Logger.__listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+                Logger.__listener.start()
+                atexit.register(Logger.close)
+            else:
+                for handler in handlers:
+                    Logger.__cblogger.addHandler(handler)
+
+    @staticmethod
+    def close():
+        """Grava as mensagens pendentes e encerra a thread de gravação do log assíncrono."""
+        if Logger.__rate_limit and Logger.__rate_limit.suprimidas:
+            Logger.__cblogger.info('Mensagens de log suprimidas (--log-rate): %s', Logger.__rate_limit.suprimidas)
+            Logger.__rate_limit.suprimidas = 0
+        if Logger.__listener:
+            Logger.__listener.stop()
+            Logger.__listener = None
+            # as mensagens registradas após o encerramento são gravadas diretamente pelos 'handlers' de destino
+            for handler in list(Logger.__cblogger.handlers):
+                if isinstance(handler, AsyncQueueHandler):
+                    Logger.__cblogger.removeHandler(handler)
+                    for target in handler.handlers:
+                        Logger.__cblogger.addHandler(target)
 
     @staticmethod
-    def debug(msg: str):
-        Logger.__cblogger.debug(msg)
+    def debug(msg: str, *args):
+        Logger.__cblogger.debug(msg, *args)
 
     @staticmethod
-    def info(msg: str):
-        Logger.__cblogger.info(msg)
+    def info(msg: str, *args):
+        Logger.__cblogger.info(msg, *args)
 
     @staticmethod
-    def warn(msg: str):
-        Logger.__cblogger.warning(msg)
+    def warn(msg: str, *args):
+        Logger.__cblogger.warning(msg, *args)
 
     @staticmethod
-    def error(msg: str):
-        Logger.__cblogger.error(msg, exc_info=True)
+    def error(msg: str, *args):
+        Logger.__cblogger.error(msg, *args, exc_info=True)